@@ -0,0 +1,63 @@
+"""
+Apoio às views assíncronas (servidas via ASGI, ver ``backend/asgi.py``).
+
+As views de ``/api/async/`` não passam pelo ``APIView`` do DRF, que é
+síncrono: autenticam com as mesmas classes, montam um ``Request`` do DRF já
+autenticado (paginação e serializers usam ``query_params`` e
+``build_absolute_uri``), aplicam as permissões da view síncrona
+correspondente e devolvem JSON no mesmo formato das views
+síncronas. Tudo que consulta o banco é resolvido antes da serialização;
+um serializer que tente consultar levanta ``SynchronousOnlyOperation``.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def authenticate(request):
+    """Autentica com as classes do DRF; aceita ``?token=`` (EventSource não envia headers)"""
+    token = request.GET.get('token')
+    if token and 'HTTP_AUTHORIZATION' not in request.META:
+        # Tokens de acesso são JWT (três partes); os demais são do authtoken
+        keyword = 'Bearer' if token.count('.') == 2 else 'Token'
+        request.META['HTTP_AUTHORIZATION'] = f'{keyword} {token}'
+
+    drf_request = Request(request)
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(drf_request)
+        except exceptions.AuthenticationFailed:
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+async def authorized_request(request, view_class):
+    """
+    ``Request`` do DRF com o usuário resolvido (ou anônimo), ou ``None`` se as
+    permissões de ``view_class``, a view síncrona equivalente, não deixam passar
+    """
+    user = await sync_to_async(authenticate)(request)
+    drf_request = Request(request, authenticators=())
+    drf_request.user = user or AnonymousUser()
+    view = view_class()
+    if all(permission().has_permission(drf_request, view) for permission in view_class.permission_classes):
+        return drf_request
+    return None
+
+
+def unauthorized():
+    return JsonResponse({'detail': 'As credenciais de autenticação não foram fornecidas.'}, status=401)
+
+
+def not_found(detail='Não encontrado.'):
+    return JsonResponse({'detail': detail}, status=404)
+
+
+def json_response(data, headers=None):
+    return JsonResponse(data, encoder=JSONEncoder, safe=False, headers=headers)
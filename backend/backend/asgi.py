@@ -3,6 +3,11 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The real-time push channel (``/api/stream/``) is an async streaming view and
+must be served through this entry point, e.g.::
+
+    uvicorn backend.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
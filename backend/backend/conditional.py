@@ -0,0 +1,101 @@
+"""
+GET condicional (``ETag``/``If-None-Match``) para as views da API.
+
+O ETag é montado a partir de partes baratas de obter, sem rodar o
+serializer:
+
+- carimbos de versão guardados no cache (``get_version``/``bump``), trocados
+  por sinais sempre que o recurso muda (fluxo de notificações de um usuário,
+  estado do usuário logado: curtidas, retweets e follows);
+- impressões digitais das linhas da página (``fingerprint``), lidas com um
+  ``values_list`` que traz só as colunas que aparecem na resposta.
+
+Os carimbos são tokens aleatórios, não contadores: se a chave sumir do cache
+nasce um token novo e o cliente apenas baixa a resposta de novo.
+"""
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def _version_key(scope, key):
+    return f'version:{scope}:{key}'
+
+
+def _token():
+    return uuid.uuid4().hex[:16]
+
+
+def get_version(scope, key):
+    cache_key = _version_key(scope, key)
+    version = cache.get(cache_key)
+    if version is None:
+        cache.add(cache_key, _token(), None)
+        version = cache.get(cache_key)
+    return version
+
+
+def bump(scope, keys):
+    """Invalida os ETags que dependem de ``scope`` para cada chave"""
+    cache.set_many({_version_key(scope, key): _token() for key in keys}, None)
+
+
+def fingerprint(rows):
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(repr(row).encode())
+    return digest.hexdigest()
+
+
+def make_etag(*parts):
+    # Fraco: a resposta é equivalente, não idêntica byte a byte (pode ser comprimida)
+    return 'W/"%s"' % hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.removeprefix('W/') == opaque for tag in parse_etags(header))
+
+
+class ConditionalGetMixin:
+    """
+    Views GET que respondem 304 quando o ETag do cliente ainda vale.
+
+    ``get_etag_parts`` devolve as partes do ETag (ou ``None`` para não usar
+    GET condicional naquela requisição); o caminho completo, com a query
+    string, e o usuário logado sempre entram no ETag.
+    """
+
+    def get_etag_parts(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        parts = self.get_etag_parts(request, *args, **kwargs)
+        etag = None
+        if parts is not None:
+            etag = make_etag(request.user.pk, request.get_full_path(), *parts)
+            if etag_matches(request.headers.get('If-None-Match'), etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                return self._conditional_headers(response, etag)
+
+        response = super().get(request, *args, **kwargs)
+        if etag and response.status_code == status.HTTP_200_OK:
+            self._conditional_headers(response, etag)
+        return response
+
+    def _conditional_headers(self, response, etag):
+        response['ETag'] = etag
+        response['Cache-Control'] = CACHE_CONTROL
+        patch_vary_headers(response, ['Authorization'])
+        return response
@@ -0,0 +1,71 @@
+"""
+Cache compartilhado de fragmentos de JSON.
+
+Um fragmento é a parte da representação de um objeto que não depende de
+quem está vendo (ex.: o ``PostSerializer`` sem ``is_liked``/``is_retweeted``);
+``posts.rendering`` e ``users.rendering`` montam a resposta juntando o
+fragmento com o estado do usuário logado.
+
+Os fragmentos são invalidados pelos sinais de save/delete dos modelos, pelos
+ajustes de contadores (``posts.counters.adjust``) e quando as renditions de
+uma imagem ficam prontas. Atualizações em massa que não disparam sinais
+ficam limitadas ao ``TIMEOUT``.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import metrics
+
+# Trocar quando o formato dos fragmentos mudar (descarta os antigos)
+VERSION = 1
+
+
+def _config():
+    return getattr(settings, 'RENDER_CACHE', {})
+
+
+def _cache():
+    return caches[_config().get('CACHE', 'default')]
+
+
+def _key(model, pk):
+    return f'fragment:{VERSION}:{model._meta.label_lower}:{pk}'
+
+
+def variant_for(request):
+    """Os fragmentos guardam URLs absolutas: cada entrada tem uma versão por origem"""
+    return request.build_absolute_uri('/') if request is not None else ''
+
+
+def get_many(model, ids, variant=''):
+    """``{pk: fragmento}`` dos que estão no cache"""
+    keys = {_key(model, pk): pk for pk in ids}
+    entries = _cache().get_many(list(keys))
+    found = {keys[key]: entry[variant] for key, entry in entries.items() if variant in entry}
+    name = model._meta.model_name
+    metrics.incr(f'render_cache.{name}.hit', len(found))
+    metrics.incr(f'render_cache.{name}.miss', len(keys) - len(found))
+    return found
+
+
+def set_many(model, fragments, variant=''):
+    if not fragments:
+        return
+    keys = {pk: _key(model, pk) for pk in fragments}
+    entries = _cache().get_many(list(keys.values()))
+    _cache().set_many(
+        {key: {**entries.get(key, {}), variant: fragments[pk]} for pk, key in keys.items()},
+        _config().get('TIMEOUT', 300),
+    )
+
+
+def invalidate(model, ids):
+    """Remove os fragmentos agora e de novo no commit (um leitor concorrente pode ter regravado a versão antiga)"""
+    if isinstance(ids, int):
+        ids = [ids]
+    keys = [_key(model, pk) for pk in ids]
+    if not keys:
+        return
+    _cache().delete_many(keys)
+    transaction.on_commit(lambda: _cache().delete_many(keys))
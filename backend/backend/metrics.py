@@ -0,0 +1,55 @@
+"""
+Contadores e tempos de operação do processo (acertos/erros de cache,
+latência da autenticação etc.).
+
+São mantidos em memória, por processo: com vários workers cada um expõe os
+seus em ``/api/metrics/`` e a agregação fica com quem coleta.
+"""
+import threading
+from collections import Counter
+
+_lock = threading.Lock()
+_counters = Counter()
+_timings = {}
+
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name, seconds):
+    """Registra a duração de uma operação (contagem, soma e máximo)"""
+    with _lock:
+        count, total, maximum = _timings.get(name, (0, 0.0, 0.0))
+        _timings[name] = (count + 1, total + seconds, max(maximum, seconds))
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        timings = dict(_timings)
+    ratios = {}
+    for name, hits in counters.items():
+        if name.endswith('.hit'):
+            prefix = name[:-len('.hit')]
+            total = hits + counters.get(f'{prefix}.miss', 0)
+            ratios[f'{prefix}.hit_ratio'] = round(hits / total, 4) if total else 0.0
+    return {
+        'counters': dict(sorted(counters.items())),
+        'ratios': dict(sorted(ratios.items())),
+        'timings': {
+            name: {
+                'count': count,
+                'avg_ms': round(total / count * 1000, 3),
+                'max_ms': round(maximum * 1000, 3),
+            }
+            for name, (count, total, maximum) in sorted(timings.items())
+        },
+    }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,192 @@
+"""
+Paginação por keyset (cursor) sobre ``(created_at, id)``.
+
+O corpo da resposta continua sendo a lista de itens; os cursores vão no
+cabeçalho ``Link`` (``rel="next"`` para itens mais antigos via ``until`` e
+``rel="prev"`` para itens mais novos via ``since``), de forma que o frontend
+possa fazer polling apenas do que chegou depois do último item visto.
+
+``OffsetPagination`` segue o mesmo formato para listas ordenadas por
+relevância (busca), onde não há chave estável para o cursor.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class LinkHeaderPagination(BasePagination):
+    """Corpo como lista simples e links de navegação no cabeçalho ``Link``"""
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+
+    def get_paginated_response(self, data):
+        return Response(data, headers=self.get_headers())
+
+    def get_headers(self):
+        links = []
+        next_link = self.get_next_link()
+        previous_link = self.get_previous_link()
+        if next_link:
+            links.append(f'<{next_link}>; rel="next"')
+        if previous_link:
+            links.append(f'<{previous_link}>; rel="prev"')
+        return {'Link': ', '.join(links)} if links else {}
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+
+class OffsetPagination(LinkHeaderPagination):
+    """Paginação por deslocamento; ``paginate_queryset`` só fatia o objeto recebido"""
+    offset_query_param = 'offset'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.offset = max(0, int(request.query_params.get(self.offset_query_param, 0)))
+        except ValueError:
+            self.offset = 0
+        rows = list(queryset[self.offset:self.offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.offset_query_param, self.offset + self.page_size)
+
+    def get_previous_link(self):
+        if self.offset <= 0:
+            return None
+        url = self.request.build_absolute_uri()
+        previous = self.offset - self.page_size
+        if previous <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, previous)
+
+
+class KeysetPagination(LinkHeaderPagination):
+    until_query_param = 'until'
+    since_query_param = 'since'
+    invalid_cursor_message = 'Cursor inválido'
+
+    # Campo de ordenação principal seguido do desempate por id
+    ordering = ('-created_at', '-id')
+    # Se True a página é devolvida do mais antigo para o mais novo (ex.: mensagens)
+    chronological = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, newer = self._page_queryset(queryset, request)
+        return self._page(list(queryset), newer)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` pelo ORM assíncrono"""
+        queryset, newer = self._page_queryset(queryset, request)
+        return self._page([row async for row in queryset.aiterator()], newer)
+
+    def _page_queryset(self, queryset, request):
+        """Consulta da página (com um item a mais) e se ela vem de ``since``"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.until = self.decode_cursor(request.query_params.get(self.until_query_param), queryset.model)
+        self.since = self.decode_cursor(request.query_params.get(self.since_query_param), queryset.model)
+
+        if self.since is not None:
+            queryset = queryset.filter(self._after(self.since)).order_by(*self._reversed_ordering())
+            return queryset[:self.page_size + 1], True
+        if self.until is not None:
+            queryset = queryset.filter(self._before(self.until))
+        return queryset.order_by(*self.ordering)[:self.page_size + 1], False
+
+    def _page(self, rows, newer):
+        if newer:
+            self.has_older = True
+            rows = rows[:self.page_size]
+            rows.reverse()
+        else:
+            self.has_older = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+
+        self.page = rows
+        if self.chronological:
+            return rows[::-1]
+        return rows
+
+    def get_next_link(self):
+        if not self.page or not self.has_older:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.since_query_param)
+        return replace_query_param(url, self.until_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        # Sempre presente para permitir polling de itens novos
+        if self.page:
+            cursor = self.encode_cursor(self.page[0])
+        elif self.since is not None:
+            cursor = self.request.query_params[self.since_query_param]
+        else:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.until_query_param)
+        return replace_query_param(url, self.since_query_param, cursor)
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self._fields():
+            value = getattr(obj, field)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, model):
+        """Valores do cursor convertidos pelos campos do modelo (``NotFound`` se inválido)"""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [model._meta.get_field(field).to_python(value) for field, value in zip(self._fields(), values)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def _reversed_ordering(self):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+
+    def _before(self, values):
+        """Itens que vêm depois do cursor na ordenação da página"""
+        return self._compare(values, descending_lookup='lt', ascending_lookup='gt')
+
+    def _after(self, values):
+        """Itens que vêm antes do cursor na ordenação da página"""
+        return self._compare(values, descending_lookup='gt', ascending_lookup='lt')
+
+    def _compare(self, values, descending_lookup, ascending_lookup):
+        (primary, tiebreak), (primary_value, tiebreak_value) = self.ordering, values
+        primary_lookup = descending_lookup if primary.startswith('-') else ascending_lookup
+        tiebreak_lookup = descending_lookup if tiebreak.startswith('-') else ascending_lookup
+        primary, tiebreak = primary.lstrip('-'), tiebreak.lstrip('-')
+        return Q(**{f'{primary}__{primary_lookup}': primary_value}) | Q(
+            **{primary: primary_value, f'{tiebreak}__{tiebreak_lookup}': tiebreak_value}
+        )
@@ -1,8 +1,17 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 
+from backend import database
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Threads que drenam as filas em segundo plano (notificações, imagens). O
+# backend.testing.TestRunner desliga; com outro runner use BACKGROUND_WORKERS=0
+BACKGROUND_WORKERS = os.environ.get('BACKGROUND_WORKERS', '1') != '0'
+
+TEST_RUNNER = 'backend.testing.TestRunner'
+
 SECRET_KEY = 'django-insecure-sua-chave-secreta-aqui-!@#$%'
 DEBUG = True
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '192.168.1.6']  
@@ -26,10 +35,15 @@ INSTALLED_APPS = [
     'interactions',
     'chats',
     'notifications',
+    'realtime',
+    'search',
+    'images',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', 
+    'backend.middleware.CompressionMiddleware',
+    'backend.database.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,12 +73,17 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Banco por variável de ambiente (backend.database): SQLite local por padrão,
+# DATABASE_URL=postgres://... em produção e réplicas em DATABASE_REPLICA_URLS
+DATABASES = database.databases_from_env(default_url=f'sqlite:///{BASE_DIR / "db.sqlite3"}')
+DATABASE_ROUTERS = ['backend.database.ReplicaRouter']
+
+# Só o que muda em relação a backend.database.DEFAULT_PRAGMAS (WAL,
+# synchronous=normal...); None desliga um padrão. Ex.: {'cache_size': -20000}
+SQLITE_PRAGMAS = {}
+
+# Só o que muda em relação a backend.database.ROUTING_DEFAULTS
+DATABASE_ROUTING = {}
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -82,16 +101,145 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Entrega de mídia (images.views.serve_media). Com ACCEL_REDIRECT (ex.:
+# '/protected-media/', location "internal" do nginx) o proxy envia o arquivo.
+MEDIA_SERVING = {
+    'ACCEL_REDIRECT': None,
+    'MAX_AGE': 3600,
+    'IMMUTABLE_MAX_AGE': 31536000,
+}
+
+# Uploads são gravados uma vez por conteúdo (blobs/ab/cd/<sha256>.ext)
+STORAGES = {
+    'default': {'BACKEND': 'images.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Timeline materializada (fan-out na escrita); trim_timelines corta periodicamente o excesso
+TIMELINE_MAX_LENGTH = 800
+TIMELINE_FANOUT_THRESHOLD = 10000
+
 # Configurações REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.JWTAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
-    ]
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'backend.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+}
+
+# Canal de push em tempo real (SSE em /api/stream/, servido via ASGI)
+REALTIME = {
+    'BACKEND': 'realtime.brokers.InMemoryBroker',
+    'OPTIONS': {'backlog': 200},
+    'HEARTBEAT': 15,
+}
+
+# Cache dos fragmentos renderizados: locmem por padrão; file/Redis por variável de ambiente
+RENDER_CACHE_BACKEND = os.environ.get('RENDER_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'render': {
+        'BACKEND': RENDER_CACHE_BACKEND,
+        'LOCATION': os.environ.get('RENDER_CACHE_LOCATION', 'render'),
+        'TIMEOUT': 300,
+        # O Redis despeja pela própria política de memória (maxmemory)
+        'OPTIONS': {} if 'redis' in RENDER_CACHE_BACKEND else {'MAX_ENTRIES': 20000, 'CULL_FREQUENCY': 4},
+    },
+}
+
+# JSON de posts/perfis que não depende de quem está vendo (ver backend.fragments)
+RENDER_CACHE = {
+    'CACHE': 'render',
+    'TIMEOUT': 300,
+}
+
+# Contadores de não lidos (notificações e mensagens por conversa)
+UNREAD_COUNTERS = {
+    'CACHE': 'default',
+    'TIMEOUT': 3600,
+}
+
+# Snapshots do usuário autenticado: LRU por processo + cache compartilhado
+AUTH_CACHE = {
+    'CACHE': 'default',
+    'TIMEOUT': 300,
+    'LOCAL_MAX_ENTRIES': 1024,
+    'LOCAL_TTL': 5,
+}
+
+# Login e troca de senha: baldes por IP/usuário, backoff de falhas e hashes
+# simultâneos limitados (users.throttling)
+AUTH_THROTTLE = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    'IP': {'CAPACITY': 30, 'PER_SECOND': 0.5},
+    'USERNAME': {'CAPACITY': 10, 'PER_SECOND': 1 / 60},
+    'FREE_FAILURES': 5,
+    'BACKOFF_BASE': 1,
+    'BACKOFF_MAX': 300,
+    # Metade dos núcleos para o PBKDF2; o resto segue atendendo o site
+    'HASH_CONCURRENCY': max(1, (os.cpu_count() or 2) // 2),
+    'HASH_WAIT': 0.1,
+}
+
+# Tokens de acesso assinados + refresh rotativo (users.tokens)
+JWT_AUTH = {
+    'ALGORITHM': 'HS256',
+    'ACCESS_LIFETIME': timedelta(minutes=5),
+    'REFRESH_LIFETIME': timedelta(days=14),
+    'LEEWAY': 10,
+    'CACHE': 'default',
+}
+
+# Conjunto de ids seguidos por usuário (users.graph), invalidado por follow/unfollow
+# e grafo completo em CSR para as sugestões de "quem seguir" (users.adjacency)
+FOLLOW_GRAPH = {
+    'CACHE_TIMEOUT': 300,
+    'SNAPSHOT_PATH': BASE_DIR / 'var' / 'follow_graph.bin',
+    'SUGGESTIONS_PER_USER': 20,
+    'SUGGESTIONS_FANOUT': 100,
+    'FOLLOW_BACK_BONUS': 2,
+}
+
+# Tendências: buckets de uso de hashtags somados na janela deslizante
+TRENDS = {
+    'BUCKET_SECONDS': 3600,
+    'WINDOW_HOURS': 24,
+    'CACHE_TIMEOUT': 60,
+}
+
+# Pipeline de imagens: renditions por largura máxima, geradas em segundo plano
+IMAGES = {
+    'WORKER': True,
+    'RENDITIONS': {'thumb': 150, 'medium': 600, 'large': 1200},
+    'FORMATS': ['webp', 'jpeg'],
+    'QUALITY': 80,
+    'PLACEHOLDER_SIZE': 16,
+}
+
+# Busca textual: 'fts5' (SQLite), 'postgres' (tsvector + GIN) ou 'scan' (icontains);
+# None escolhe pelo banco em uso
+SEARCH = {
+    'BACKEND': None,
+    'POSTGRES_CONFIG': 'simple',
+}
+
+# Pipeline assíncrono de notificações (nos testes a fila é drenada com flush())
+NOTIFICATIONS_PIPELINE = {
+    'WORKER': True,
+    'FLUSH_INTERVAL': 0.5,
+    'BATCH_SIZE': 500,
+    'AGGREGATION_WINDOW': 3600,
 }
 
 # Configurações CORS 
@@ -105,6 +253,9 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Cursores de paginação são enviados no cabeçalho Link
+CORS_EXPOSE_HEADERS = ['Link']
+
 CORS_ALLOW_HEADERS = [
     'accept',
     'accept-encoding',
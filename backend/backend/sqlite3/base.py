@@ -0,0 +1,25 @@
+"""
+SQLite do Django com ``OPTIONS['transaction_mode']`` (como no Django 5.1).
+
+Com ``IMMEDIATE`` a transação pega a trava de escrita já no ``BEGIN``. No
+modo padrão (``DEFERRED``) uma transação que lê e depois escreve precisa
+promover a trava, e se outro escritor chegou antes o SQLite devolve
+``database is locked`` na hora, sem esperar o busy timeout.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        mode = (kwargs.pop('transaction_mode', None) or 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f'transaction_mode inválido: {mode} (use um de {", ".join(TRANSACTION_MODES)})')
+        self.transaction_mode = mode
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
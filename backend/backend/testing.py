@@ -0,0 +1,29 @@
+"""
+Runner dos testes (``TEST_RUNNER``).
+
+Sem threads de fundo: as filas de ``backend.worker`` são drenadas pelos
+próprios testes com ``flush()``, e o que um teste deixou pendente é
+descartado antes do próximo.
+"""
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import iter_test_cases
+
+from . import worker
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._workers_off = override_settings(BACKGROUND_WORKERS=False)
+        self._workers_off.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._workers_off.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def build_suite(self, *args, **kwargs):
+        suite = super().build_suite(*args, **kwargs)
+        for test in iter_test_cases(suite):
+            test.addCleanup(worker.clear_all)
+        return suite
@@ -1,7 +1,13 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from backend.views import MetricsAPI
+from chats import async_views as chats_async
+from notifications import async_views as notifications_async
+from posts import async_views as posts_async
+from images.views import serve_media
+from notifications.views import UnreadSummaryView
+from posts.views import TrendsAPI
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,7 +16,19 @@ urlpatterns = [
     path('api/chats/', include('chats.urls')),
     path('api/notifications/', include('notifications.urls')),
     path('api/interactions/', include('interactions.urls')),  
-]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    path('api/stream/', include('realtime.urls')),
+    path('api/search/', include('search.urls')),
+    path('api/unread-summary/', UnreadSummaryView.as_view(), name='unread-summary'),
+    path('api/trends/', TrendsAPI.as_view(), name='trends'),
+    path('api/metrics/', MetricsAPI.as_view(), name='metrics'),
+    # Leituras mais frequentes em views assíncronas (servir via ASGI)
+    path('api/async/posts/', posts_async.post_list, name='async-post-list'),
+    path('api/async/chats/conversations/', chats_async.conversation_list, name='async-conversation-list'),
+    path(
+        'api/async/chats/conversations/<int:conversation_id>/messages/',
+        chats_async.message_list, name='async-message-list',
+    ),
+    path('api/async/notifications/', notifications_async.notification_list, name='async-notification-list'),
+    # Mídia servida pela aplicação em qualquer ambiente (ETag, Range, cache)
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+]
\ No newline at end of file
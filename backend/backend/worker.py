@@ -0,0 +1,132 @@
+"""
+Fila de trabalho em processo, drenada em lotes por uma thread daemon.
+
+Usada para tirar escritas secundárias (notificações, processamento de
+imagens) do caminho da requisição. ``drain()`` processa tudo o que estiver
+pendente de forma síncrona, o que mantém os testes determinísticos.
+
+Um lote cujo handler falhou volta para o início da fila e é tentado de novo
+até ``max_attempts`` vezes; a thread espera ``retry_delay`` (dobrando a cada
+falha seguida) antes de tentar outra vez.
+
+A thread só existe com ``BACKGROUND_WORKERS`` ligado (desligado pelo
+``backend.testing.TestRunner``); ``clear_all()`` descarta o que ficou
+pendente entre um teste e outro.
+"""
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_queues = weakref.WeakSet()
+
+
+def workers_enabled():
+    return getattr(settings, 'BACKGROUND_WORKERS', True)
+
+
+def clear_all():
+    for queue in list(_queues):
+        queue.clear()
+
+
+class BackgroundQueue:
+    def __init__(self, handler, name, flush_interval=0.5, batch_size=500, worker=True, max_attempts=5,
+                 retry_delay=1.0):
+        self.handler = handler
+        self.name = name
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.worker = worker
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Itens guardados como (item, tentativas que já falharam)
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        _queues.add(self)
+
+    def put(self, item):
+        self.put_many([item])
+
+    def put_many(self, items):
+        self._items.extend((item, 0) for item in items)
+        if not self.worker:
+            return
+        self._ensure_worker()
+        if len(self._items) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self):
+        return len(self._items)
+
+    def clear(self):
+        self._items.clear()
+
+    def drain(self):
+        """
+        Processa todos os itens pendentes; devolve quantos foram processados
+
+        Se o handler falhar, o lote volta para a fila e a exceção é propagada.
+        """
+        processed = 0
+        with self._drain_lock:
+            while True:
+                batch = self._pop_batch()
+                if not batch:
+                    return processed
+                try:
+                    self.handler([item for item, _ in batch])
+                except Exception:
+                    self._requeue(batch)
+                    raise
+                processed += len(batch)
+
+    def _requeue(self, batch):
+        retry = [(item, attempts + 1) for item, attempts in batch if attempts + 1 < self.max_attempts]
+        if len(retry) < len(batch):
+            logger.error(
+                'Fila %s descartou %d item(ns) após %d tentativas', self.name, len(batch) - len(retry),
+                self.max_attempts,
+            )
+        self._items.extendleft(reversed(retry))
+
+    def _pop_batch(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._items.popleft())
+            except IndexError:
+                break
+        return batch
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        failures = 0
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.drain()
+                failures = 0
+            except Exception:
+                logger.exception('Falha ao processar lote da fila %s', self.name)
+                failures += 1
+                time.sleep(self.retry_delay * 2 ** (failures - 1))
+            finally:
+                close_old_connections()
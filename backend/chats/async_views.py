@@ -0,0 +1,78 @@
+"""
+Conversas e mensagens servidas pelo ORM assíncrono (``/api/async/chats/``).
+
+Mesmo formato e paginação de ``ConversationListView`` e
+``MessageListView``; follows, fotos e não lidas são resolvidos juntos antes
+da serialização.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db.models import prefetch_related_objects
+from rest_framework.exceptions import NotFound
+
+from backend import aio
+from backend.database import use_replica
+from images import processing as images
+from notifications import unread
+from users import graph
+from .models import Conversation
+from .serializers import ConversationSerializer, MessageSerializer
+from .views import ConversationListView, ConversationPagination, MessageListView, MessagePagination
+
+
+@use_replica
+async def conversation_list(request):
+    request = await aio.authorized_request(request, ConversationListView)
+    if request is None:
+        return aio.unauthorized()
+
+    paginator = ConversationPagination()
+    queryset = Conversation.objects.filter(participants=request.user).select_related('last_message__sender')
+    try:
+        conversations = await paginator.apaginate_queryset(queryset, request)
+    except NotFound as error:
+        return aio.not_found(error.detail)
+    # O aiterator do Django 4.2 não aceita prefetch_related
+    await sync_to_async(prefetch_related_objects)(conversations, 'participants')
+
+    users = [participant for conversation in conversations for participant in conversation.participants.all()]
+    users += [conversation.last_message.sender for conversation in conversations if conversation.last_message]
+    context = {'request': request}
+    _, following, context['unread_messages'] = await asyncio.gather(
+        images.aresolve_into(context, users),
+        sync_to_async(graph.following_ids)(request.user),
+        sync_to_async(unread.get_messages)(request.user.id),
+    )
+    context['viewer_state'] = {'following': following}
+    data = ConversationSerializer(conversations, many=True, context=context).data
+    return aio.json_response(data, headers=paginator.get_headers())
+
+
+async def message_list(request, conversation_id):
+    request = await aio.authorized_request(request, MessageListView)
+    if request is None:
+        return aio.unauthorized()
+
+    conversation = await Conversation.objects.filter(id=conversation_id, participants=request.user).afirst()
+    if conversation is None:
+        return aio.json_response([])
+
+    # Avança o ponteiro de leitura antes de ler a página (is_read vem atualizado)
+    await conversation.amark_read(request.user)
+    unread.clear_conversation(request.user.id, conversation.id)
+
+    paginator = MessagePagination()
+    try:
+        messages = await paginator.apaginate_queryset(conversation.messages.select_related('sender'), request)
+    except NotFound as error:
+        return aio.not_found(error.detail)
+
+    context = {'request': request}
+    _, following = await asyncio.gather(
+        images.aresolve_into(context, [message.sender for message in messages]),
+        sync_to_async(graph.following_ids)(request.user),
+    )
+    context['viewer_state'] = {'following': following}
+    data = MessageSerializer(messages, many=True, context=context).data
+    return aio.json_response(data, headers=paginator.get_headers())
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0002_message_is_deleted_message_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["conversation", "created_at", "id"],
+                name="chats_messa_convers_92fdf6_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 4.2 on 2026-10-18 18:59
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+import django.db.models.deletion
+
+
+def populate_inbox(apps, schema_editor):
+    Conversation = apps.get_model("chats", "Conversation")
+    Message = apps.get_model("chats", "Message")
+    ConversationReadState = apps.get_model("chats", "ConversationReadState")
+
+    for conversation in Conversation.objects.prefetch_related("participants"):
+        messages = Message.objects.filter(conversation=conversation)
+        conversation.last_message = messages.order_by("-id").first()
+        conversation.save(update_fields=["last_message"])
+
+        states = []
+        for user in conversation.participants.all():
+            # Última mensagem própria ou já lida pelo participante
+            last_read = (
+                messages.filter(Q(sender=user) | Q(is_read=True))
+                .order_by("-id")
+                .values_list("id", flat=True)
+                .first()
+            )
+            states.append(
+                ConversationReadState(
+                    conversation=conversation, user=user, last_read_message_id=last_read
+                )
+            )
+        ConversationReadState.objects.bulk_create(states, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("chats", "0003_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="chats.message",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ConversationReadState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "conversation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="read_states",
+                        to="chats.conversation",
+                    ),
+                ),
+                (
+                    "last_read_message",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="chats.message",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="conversation_read_states",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("conversation", "user")},
+            },
+        ),
+        migrations.RunPython(populate_inbox, migrations.RunPython.noop),
+    ]
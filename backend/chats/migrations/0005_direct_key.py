@@ -0,0 +1,93 @@
+# Generated by Django 4.2 on 2026-10-18 19:01
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+import django.db.models.deletion
+
+
+def merge_direct_conversations(apps, schema_editor):
+    """Preenche a chave canônica e funde conversas 1:1 duplicadas na mais antiga"""
+    Conversation = apps.get_model("chats", "Conversation")
+    Message = apps.get_model("chats", "Message")
+    ConversationReadState = apps.get_model("chats", "ConversationReadState")
+
+    by_key = defaultdict(list)
+    for conversation in Conversation.objects.prefetch_related("participants").order_by(
+        "id"
+    ):
+        participant_ids = sorted(user.id for user in conversation.participants.all())
+        if len(participant_ids) == 2:
+            by_key[tuple(participant_ids)].append(conversation)
+
+    for (user_low_id, user_high_id), conversations in by_key.items():
+        keeper, duplicates = conversations[0], conversations[1:]
+        if duplicates:
+            duplicate_ids = [conversation.id for conversation in duplicates]
+            Message.objects.filter(conversation_id__in=duplicate_ids).update(
+                conversation=keeper
+            )
+
+            pointers = (
+                ConversationReadState.objects.filter(
+                    conversation_id__in=[keeper.id, *duplicate_ids]
+                )
+                .values("user_id")
+                .annotate(last_read=Max("last_read_message_id"))
+            )
+            for row in pointers:
+                ConversationReadState.objects.update_or_create(
+                    conversation=keeper,
+                    user_id=row["user_id"],
+                    defaults={"last_read_message_id": row["last_read"]},
+                )
+            Conversation.objects.filter(id__in=duplicate_ids).delete()
+            keeper.last_message = (
+                Message.objects.filter(conversation=keeper).order_by("-id").first()
+            )
+
+        keeper.user_low_id = user_low_id
+        keeper.user_high_id = user_high_id
+        keeper.save(update_fields=["user_low", "user_high", "last_message"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("chats", "0004_inbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="user_high",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="user_low",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(merge_direct_conversations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="conversation",
+            constraint=models.UniqueConstraint(
+                fields=("user_low", "user_high"), name="unique_direct_conversation"
+            ),
+        ),
+    ]
@@ -1,27 +1,76 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.utils import timezone
 
 class Conversation(models.Model):
     """Modelo para representar uma conversa entre dois usuários"""
     participants = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='conversations')
+    # Ponteiro desnormalizado para a última mensagem (listagem da caixa de entrada)
+    last_message = models.ForeignKey(
+        'Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    # Chave canônica de conversas 1:1 (menor id, maior id)
+    user_low = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    user_high = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user_low', 'user_high'], name='unique_direct_conversation'),
+        ]
     
     def __str__(self):
         return f"Conversa {self.id}"
     
+    @staticmethod
+    def direct_key(user1, user2):
+        return tuple(sorted([user1.id, user2.id]))
+    
     @classmethod
     def get_or_create_conversation(cls, user1, user2):
-        conversations = cls.objects.filter(participants=user1).filter(participants=user2)
-        if conversations.exists():
-            return conversations.first(), False
-        conversation = cls.objects.create()
-        conversation.participants.add(user1, user2)
+        """Busca pela chave única; em corrida, quem perder reaproveita a conversa criada"""
+        user_low_id, user_high_id = cls.direct_key(user1, user2)
+        conversation = cls.objects.filter(user_low_id=user_low_id, user_high_id=user_high_id).first()
+        if conversation:
+            return conversation, False
+        
+        try:
+            with transaction.atomic():
+                conversation = cls.objects.create(user_low_id=user_low_id, user_high_id=user_high_id)
+                conversation.participants.add(user1, user2)
+                ConversationReadState.objects.bulk_create([
+                    ConversationReadState(conversation=conversation, user=user1),
+                    ConversationReadState(conversation=conversation, user=user2),
+                ])
+        except IntegrityError:
+            return cls.objects.get(user_low_id=user_low_id, user_high_id=user_high_id), False
         return conversation, True
+    
+    def mark_read(self, user):
+        """Avança o ponteiro de leitura do usuário até a última mensagem"""
+        state = ConversationReadState.objects.filter(conversation=self, user=user)
+        previous_id = state.values_list('last_read_message_id', flat=True).first() or 0
+        if self.last_message_id and previous_id < self.last_message_id:
+            self.messages.filter(
+                id__gt=previous_id, id__lte=self.last_message_id
+            ).exclude(sender=user).update(is_read=True)
+            state.update(last_read_message_id=self.last_message_id)
+
+    async def amark_read(self, user):
+        """``mark_read`` pelo ORM assíncrono"""
+        state = ConversationReadState.objects.filter(conversation=self, user=user)
+        previous_id = await state.values_list('last_read_message_id', flat=True).afirst() or 0
+        if self.last_message_id and previous_id < self.last_message_id:
+            await self.messages.filter(
+                id__gt=previous_id, id__lte=self.last_message_id
+            ).exclude(sender=user).aupdate(is_read=True)
+            await state.aupdate(last_read_message_id=self.last_message_id)
 
 
 class Message(models.Model):
@@ -36,6 +85,9 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Mensagem de {self.sender.username}"
@@ -44,4 +96,20 @@ class Message(models.Model):
         """Sobrescreve o método delete para apenas marcar como apagada"""
         self.is_deleted = True
         self.content = ""  
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+class ConversationReadState(models.Model):
+    """Até qual mensagem cada participante já leu a conversa"""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='read_states')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='conversation_read_states')
+    last_read_message = models.ForeignKey(
+        Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['conversation', 'user']
+    
+    def __str__(self):
+        return f"Leitura de {self.user_id} na conversa {self.conversation_id}"
@@ -1,6 +1,18 @@
 from rest_framework import serializers
 from .models import Conversation, Message
 from users.serializers import UserSerializer
+from notifications import unread
+from images import processing as images
+
+
+class MessageListSerializer(serializers.ListSerializer):
+    """Resolve as fotos dos remetentes da página em uma consulta"""
+
+    def to_representation(self, data):
+        messages = list(data.all() if hasattr(data, 'all') else data)
+        images.resolve_into(self.context, [message.sender for message in messages])
+        return super().to_representation(messages)
+
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
@@ -8,6 +20,28 @@ class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
         fields = ['id', 'sender', 'content', 'is_read', 'is_deleted', 'created_at', 'updated_at']
+        list_serializer_class = MessageListSerializer
+
+
+class ConversationListSerializer(serializers.ListSerializer):
+    """Resolve follows e fotos dos participantes de todas as conversas de uma vez"""
+
+    def to_representation(self, data):
+        conversations = list(data.all() if hasattr(data, 'all') else data)
+        participants = {
+            participant.id: participant
+            for conversation in conversations
+            for participant in conversation.participants.all()
+        }
+        images.resolve_into(self.context, participants.values())
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated and 'viewer_state' not in self.context:
+            self.context['viewer_state'] = {
+                'following': set(
+                    request.user.following.filter(id__in=participants).values_list('id', flat=True)
+                ),
+            }
+        return super().to_representation(conversations)
 
 
 class ConversationSerializer(serializers.ModelSerializer):
@@ -18,16 +52,18 @@ class ConversationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Conversation
         fields = ['id', 'participants', 'last_message', 'unread_count', 'created_at', 'updated_at']
+        list_serializer_class = ConversationListSerializer
     
     def get_last_message(self, obj):
-        last_message = obj.messages.last()
-        if last_message:
-            return MessageSerializer(last_message).data
+        if obj.last_message:
+            return MessageSerializer(obj.last_message, context=self.context).data
         return None
     
     def get_unread_count(self, obj):
-        user = self.context.get('request').user
-        return obj.messages.filter(is_read=False).exclude(sender=user).count()
+        if 'unread_messages' not in self.context:
+            user = self.context.get('request').user
+            self.context['unread_messages'] = unread.get_messages(user.id)
+        return self.context['unread_messages'].get(obj.id, 0)
 
 
 class SendMessageSerializer(serializers.Serializer):
@@ -1,7 +1,10 @@
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import Message
-from notifications.models import Notification
+from django.utils import timezone
+from .models import Conversation, ConversationReadState, Message
+from notifications import pipeline, unread
+from realtime.events import publish_message
 
 @receiver(post_save, sender=Message)
 def create_message_notification(sender, instance, created, **kwargs):
@@ -11,9 +14,24 @@ def create_message_notification(sender, instance, created, **kwargs):
         recipient = conversation.participants.exclude(id=instance.sender.id).first()
         
         if recipient:
-            Notification.objects.create(
+            pipeline.notify(
                 recipient=recipient,
                 sender=instance.sender,
                 notification_type='message',
                 text=f"{instance.sender.username} enviou uma mensagem"
-            )
\ No newline at end of file
+            )
+            # Só conta a mensagem se ela for gravada de fato
+            transaction.on_commit(lambda: unread.incr_messages(recipient.id, conversation.id))
+            publish_message(instance, recipient.id)
+
+
+@receiver(post_save, sender=Message)
+def update_conversation_pointers(sender, instance, created, **kwargs):
+    """Atualiza a última mensagem da conversa e o ponteiro de leitura do remetente"""
+    if created:
+        Conversation.objects.filter(pk=instance.conversation_id).update(
+            last_message=instance, updated_at=timezone.now()
+        )
+        ConversationReadState.objects.filter(
+            conversation_id=instance.conversation_id, user_id=instance.sender_id
+        ).update(last_read_message=instance)
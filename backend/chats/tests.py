@@ -1,3 +1,136 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from notifications import unread
+from users.models import User
+from .models import Conversation, ConversationReadState, Message
+
+
+class InboxTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.contacts = 0
+
+    def start_conversation(self):
+        self.contacts += 1
+        contact = User.objects.create_user(
+            username=f'contato{self.contacts}', email=f'contato{self.contacts}@example.com', password='pass12345'
+        )
+        conversation, _ = Conversation.get_or_create_conversation(self.user, contact)
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.create(conversation=conversation, sender=contact, content='oi')
+            Message.objects.create(conversation=conversation, sender=contact, content='tudo bem?')
+        return conversation, contact
+
+    def list_inbox(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/chats/conversations/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(context.captured_queries)
+
+    def test_inbox_is_listed_in_constant_queries(self):
+        unread.get_messages(self.user.id)  # aquece o cache de não lidas
+        for _ in range(2):
+            self.start_conversation()
+        response, few = self.list_inbox()
+        self.assertEqual([item['unread_count'] for item in response.data], [2, 2])
+        self.assertEqual(response.data[0]['last_message']['content'], 'tudo bem?')
+
+        for _ in range(3):
+            self.start_conversation()
+        response, many = self.list_inbox()
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(few, many)
+
+    def test_rolled_back_message_is_not_counted(self):
+        conversation, contact = self.start_conversation()
+        unread.get_messages(self.user.id)  # aquece o cache de não lidas
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Message.objects.create(conversation=conversation, sender=contact, content='desfeita')
+                transaction.set_rollback(True)
+
+        self.assertEqual(unread.get_messages(self.user.id), {conversation.id: 2})
+
+    def test_reading_only_touches_messages_after_the_pointer(self):
+        conversation, contact = self.start_conversation()
+        self.client.get(f'/api/chats/conversations/{conversation.id}/messages/')
+        state = ConversationReadState.objects.get(conversation=conversation, user=self.user)
+        self.assertEqual(state.last_read_message_id, conversation.messages.last().id)
+
+        newest = Message.objects.create(conversation=conversation, sender=contact, content='?')
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(f'/api/chats/conversations/{conversation.id}/messages/')
+        updates = [q['sql'] for q in context.captured_queries if q['sql'].startswith('UPDATE "chats_message"')]
+
+        self.assertEqual(len(updates), 1)
+        self.assertTrue(Message.objects.get(pk=newest.pk).is_read)
+
+
+class DirectConversationTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+
+    def test_same_pair_in_any_order_reuses_the_conversation(self):
+        conversation, created = Conversation.get_or_create_conversation(self.alice, self.bob)
+        again, created_again = Conversation.get_or_create_conversation(self.bob, self.alice)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(conversation.pk, again.pk)
+        self.assertEqual((conversation.user_low_id, conversation.user_high_id), (self.alice.id, self.bob.id))
+
+    def test_losing_a_creation_race_returns_the_existing_conversation(self):
+        existing, _ = Conversation.get_or_create_conversation(self.alice, self.bob)
+        # Simula a outra requisição: a busca inicial não encontra nada
+        with mock.patch.object(Conversation.objects, 'filter', return_value=Conversation.objects.none()):
+            conversation, created = Conversation.get_or_create_conversation(self.bob, self.alice)
+
+        self.assertFalse(created)
+        self.assertEqual(conversation.pk, existing.pk)
+        self.assertEqual(Conversation.objects.count(), 1)
+
+
+class AsyncChatTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        for i in range(2):
+            contact = User.objects.create_user(username=f'c{i}', email=f'c{i}@example.com', password='pass12345')
+            self.conversation, _ = Conversation.get_or_create_conversation(self.user, contact)
+            for content in ('oi', 'tudo bem?'):
+                Message.objects.create(conversation=self.conversation, sender=contact, content=content)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    async def get(self, path):
+        return await self.async_client.get(f'/api/async/chats/{path}', headers={'authorization': f'Token {self.token.key}'})
+
+    async def test_conversations_match_the_sync_listing(self):
+        expected = await sync_to_async(self.client.get)('/api/chats/conversations/?page_size=1')
+        response = await self.get('conversations/?page_size=1')
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response['Link'], expected['Link'].replace('/api/chats/', '/api/async/chats/'))
+        self.assertEqual(response.json()[0]['unread_count'], 2)
+
+    async def test_messages_are_marked_read(self):
+        response = await self.get(f'conversations/{self.conversation.id}/messages/')
+        self.assertEqual([item['content'] for item in response.json()], ['oi', 'tudo bem?'])
+        self.assertTrue(all(item['is_read'] for item in response.json()))
+        counts = await sync_to_async(unread.get_messages)(self.user.id)
+        self.assertEqual(counts.get(self.conversation.id, 0), 0)
+        expected = await sync_to_async(self.client.get)(f'/api/chats/conversations/{self.conversation.id}/messages/')
+        self.assertEqual(response.json(), expected.json())
+
+        response = await self.get('conversations/999/messages/')
+        self.assertEqual(response.json(), [])
@@ -5,19 +5,30 @@ from django.db.models import Q
 from django.contrib.auth import get_user_model
 from .models import Conversation, Message
 from .serializers import ConversationSerializer, MessageSerializer, SendMessageSerializer
+from backend.pagination import KeysetPagination
+from notifications import unread
 
 User = get_user_model()
 
 
+class ConversationPagination(KeysetPagination):
+    ordering = ('-updated_at', '-id')
+
+
+class MessagePagination(KeysetPagination):
+    chronological = True
+
+
 class ConversationListView(generics.ListAPIView):
     """Lista todas as conversas do usuário"""
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ConversationPagination
     
     def get_queryset(self):
         return Conversation.objects.filter(
             participants=self.request.user
-        ).order_by('-updated_at')
+        ).select_related('last_message__sender').prefetch_related('participants').order_by('-updated_at')
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -77,6 +88,9 @@ class MessageListView(generics.ListAPIView):
     """Lista mensagens de uma conversa"""
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessagePagination
+    # Marca a conversa como lida e quem acabou de enviar espera ver a própria mensagem
+    use_replica = False
     
     def get_queryset(self):
         conversation_id = self.kwargs['conversation_id']
@@ -88,11 +102,11 @@ class MessageListView(generics.ListAPIView):
         if not conversation:
             return Message.objects.none()
         
-        # Marcar mensagens como lidas
-        messages = conversation.messages.exclude(sender=self.request.user)
-        messages.update(is_read=True)
+        # Avança o ponteiro de leitura (só atualiza mensagens novas)
+        conversation.mark_read(self.request.user)
+        unread.clear_conversation(self.request.user.id, conversation.id)
         
-        return conversation.messages.all()
+        return conversation.messages.select_related('sender')
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -116,8 +130,8 @@ class MarkAsReadView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        messages = conversation.messages.exclude(sender=request.user)
-        messages.update(is_read=True)
+        conversation.mark_read(request.user)
+        unread.clear_conversation(request.user.id, conversation.id)
         
         return Response({'status': 'Mensagens marcadas como lidas'})
     
@@ -0,0 +1,143 @@
+"""
+Contagem de referências dos blobs do ``ContentAddressedStorage``.
+
+Cada campo de imagem de ``Post``/``User`` e cada rendition de
+``ProcessedImage`` que aponta para um blob soma uma referência em ``Blob``.
+Os sinais de ``images.signals`` e o ``render`` mantêm as contagens;
+``collect`` apaga os blobs sem referência há mais que o período de carência
+(e arquivos que nunca chegaram a ser referenciados, ex.: transação desfeita).
+As linhas são travadas e conferidas de novo antes de sair, e só os arquivos
+cujas linhas saíram de fato são apagados: um ``retain`` concorrente (o mesmo
+arquivo reenviado) mantém o blob.
+``reconcile`` recalcula tudo a partir das tabelas.
+"""
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Blob, ProcessedImage
+from . import processing
+from .storage import BLOBS_DIR, is_blob
+
+
+def _adjust(names, sign):
+    counts = Counter(name for name in names if is_blob(name))
+    if not counts:
+        return
+    if sign > 0:
+        Blob.objects.bulk_create([Blob(name=name) for name in counts], ignore_conflicts=True)
+    by_count = defaultdict(list)
+    for name, count in counts.items():
+        by_count[count].append(name)
+    now = timezone.now()
+    for count, group in by_count.items():
+        Blob.objects.filter(name__in=group).update(ref_count=F('ref_count') + sign * count, updated_at=now)
+
+
+def retain(names):
+    _adjust(names, 1)
+
+
+def release(names):
+    _adjust(names, -1)
+
+
+def rendition_names(processed):
+    return [
+        rendition[output_format]
+        for rendition in processed.renditions.values()
+        for output_format in processing.OUTPUT_FORMATS
+        if rendition.get(output_format)
+    ]
+
+
+def references():
+    """Contagem real de referências, lida das tabelas"""
+    counts = Counter()
+    for label, fields in processing.IMAGE_FIELDS.items():
+        model = apps.get_model(label)
+        for field in fields:
+            for name in model.objects.exclude(**{field: ''}).values_list(field, flat=True).iterator():
+                if is_blob(name):
+                    counts[name] += 1
+    for processed in ProcessedImage.objects.only('renditions').iterator():
+        counts.update(name for name in rendition_names(processed) if is_blob(name))
+    return counts
+
+
+def reconcile():
+    """Corrige ``ref_count`` de todos os blobs; devolve quantos foram alterados"""
+    counts = references()
+    Blob.objects.bulk_create([Blob(name=name) for name in counts], ignore_conflicts=True)
+    changed = []
+    now = timezone.now()
+    for blob in Blob.objects.iterator():
+        expected = counts.get(blob.name, 0)
+        if blob.ref_count != expected:
+            blob.ref_count = expected
+            blob.updated_at = now
+            changed.append(blob)
+    Blob.objects.bulk_update(changed, ['ref_count', 'updated_at'], batch_size=1000)
+    return len(changed)
+
+
+def collect(grace=timedelta(hours=1), dry_run=False):
+    """Apaga blobs órfãos; devolve os nomes removidos"""
+    cutoff = timezone.now() - grace
+    if dry_run:
+        orphans = list(
+            Blob.objects.filter(ref_count__lte=0, updated_at__lt=cutoff).values_list('name', flat=True)
+        )
+        processed = ProcessedImage.objects.filter(source__in=orphans)
+        renditions = [name for item in processed for name in rendition_names(item) if is_blob(name)]
+        extra = [name for name in dict.fromkeys(renditions) if name not in orphans]
+        return orphans + extra + _collect_untracked(cutoff, dry_run)
+
+    with transaction.atomic():
+        removed = _delete_unreferenced(Blob.objects.filter(ref_count__lte=0, updated_at__lt=cutoff))
+        processed = ProcessedImage.objects.filter(source__in=removed)
+        renditions = [name for item in processed for name in rendition_names(item) if is_blob(name)]
+        # As renditions saem junto com o original, a menos que outro registro as use
+        processed.delete()
+        release(renditions)
+        removed += _delete_unreferenced(
+            Blob.objects.filter(name__in=renditions, ref_count__lte=0).exclude(name__in=removed)
+        )
+    # Um retain() depois do commit recria a linha: o arquivo fica
+    retained = set(Blob.objects.filter(name__in=removed).values_list('name', flat=True))
+    removed = [name for name in removed if name not in retained]
+    for name in removed:
+        default_storage.delete(name)
+    return removed + _collect_untracked(cutoff, dry_run)
+
+
+def _delete_unreferenced(queryset):
+    """Apaga as linhas de ``queryset`` travadas com a condição ainda valendo; devolve os nomes"""
+    names = list(queryset.select_for_update().values_list('name', flat=True))
+    Blob.objects.filter(name__in=names).delete()
+    return names
+
+
+def _collect_untracked(cutoff, dry_run):
+    """Arquivos em ``blobs/`` sem linha em ``Blob`` (nunca referenciados)"""
+    root = default_storage.path(BLOBS_DIR)
+    if not os.path.isdir(root):
+        return []
+    tracked = set(Blob.objects.values_list('name', flat=True))
+    removed = []
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, default_storage.location).replace(os.sep, '/')
+            modified = datetime.fromtimestamp(os.path.getmtime(path), tz=dt_timezone.utc)
+            if name not in tracked and modified < cutoff:
+                removed.append(name)
+                if not dry_run:
+                    os.unlink(path)
+    return removed
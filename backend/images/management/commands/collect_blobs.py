@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from images import blobs
+
+
+class Command(BaseCommand):
+    help = 'Remove blobs do storage sem nenhuma referência (coleta de lixo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=1,
+                            help='Só remove blobs órfãos há mais tempo que isso (padrão: 1h)')
+        parser.add_argument('--reconcile', action='store_true',
+                            help='Recalcula as contagens a partir das tabelas antes de coletar')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas lista o que seria removido')
+
+    def handle(self, *args, **options):
+        if options['reconcile'] and not options['dry_run']:
+            changed = blobs.reconcile()
+            self.stdout.write(f'{changed} contagem(ns) corrigida(s)')
+
+        with transaction.atomic():
+            removed = blobs.collect(timedelta(hours=options['grace_hours']), dry_run=options['dry_run'])
+        for name in removed:
+            self.stdout.write(f'  {name}')
+        verb = 'seriam removido(s)' if options['dry_run'] else 'removido(s)'
+        self.stdout.write(self.style.SUCCESS(f'{len(removed)} blob(s) {verb}'))
@@ -0,0 +1,53 @@
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from images import blobs, processing
+from images.models import ProcessedImage
+from images.storage import is_blob
+
+
+class Command(BaseCommand):
+    help = 'Move uploads antigos (nomeados pelo upload) para o storage endereçado por conteúdo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-originals', action='store_true',
+                            help='Não apaga os arquivos antigos depois de copiados')
+
+    def handle(self, *args, **options):
+        moved = {}
+        missing = saved_bytes = 0
+        for label, fields in processing.IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            for field in fields:
+                legacy = set(model.objects.exclude(**{field: ''}).values_list(field, flat=True)) - {None}
+                for name in sorted(legacy):
+                    if is_blob(name):
+                        continue
+                    if name not in moved:
+                        if not default_storage.exists(name):
+                            missing += 1
+                            continue
+                        with default_storage.open(name) as file:
+                            moved[name] = default_storage.save(name, file)
+                    # update() não dispara sinais; as contagens são refeitas no fim
+                    model.objects.filter(**{field: name}).update(**{field: moved[name]})
+
+        distinct_blobs = set(moved.values())
+        for old_name, new_name in moved.items():
+            processed = ProcessedImage.objects.filter(source=old_name)
+            if ProcessedImage.objects.filter(source=new_name).exists():
+                processed.delete()
+            else:
+                processed.update(source=new_name)
+            if not options['keep_originals']:
+                saved_bytes += default_storage.size(old_name)
+                default_storage.delete(old_name)
+        if not options['keep_originals']:
+            saved_bytes -= sum(default_storage.size(name) for name in distinct_blobs)
+
+        blobs.reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(moved)} arquivo(s) em {len(distinct_blobs)} blob(s); '
+            f'{missing} ausente(s); {max(saved_bytes, 0)} byte(s) liberado(s)'
+        ))
@@ -0,0 +1,66 @@
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from images import blobs, processing
+from images.models import ProcessedImage
+from images.storage import is_blob
+
+
+class Command(BaseCommand):
+    help = 'Gera renditions e placeholders das imagens já enviadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Reprocessa também as imagens prontas')
+        parser.add_argument('--strip-metadata', action='store_true',
+                            help='Regrava os originais sem metadados antes de processar')
+
+    def handle(self, *args, **options):
+        sources = set()
+        for label, fields in processing.IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            for field in fields:
+                sources.update(
+                    model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                    .values_list(field, flat=True)
+                )
+        if not options['force']:
+            sources -= set(ProcessedImage.objects.filter(status='ready').values_list('source', flat=True))
+
+        processed = failed = 0
+        for source in sorted(sources):
+            if not default_storage.exists(source):
+                self.stderr.write(f'Arquivo ausente: {source}')
+                failed += 1
+                continue
+            if options['strip_metadata']:
+                source = self.strip(source)
+            processing.process_batch([source], force=options['force'])
+            if ProcessedImage.objects.filter(source=source, status='ready').exists():
+                processed += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{processed} imagem(ns) processada(s), {failed} com falha'))
+
+    def strip(self, source):
+        """Grava a cópia sem metadados e aponta os registros para ela; devolve o novo nome"""
+        with default_storage.open(source) as file:
+            stripped = processing.strip_metadata(file)
+        if stripped is None:
+            return source
+        name = default_storage.save(source, stripped)
+        if name == source:
+            return source
+
+        references = 0
+        for label, fields in processing.IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            for field in fields:
+                references += model.objects.filter(**{field: source}).update(**{field: name})
+        blobs.retain([name] * references)
+        blobs.release([source] * references)
+        # Blobs antigos ficam para o collect_blobs; arquivos antigos não são contados
+        if not is_blob(source):
+            default_storage.delete(source)
+        return name
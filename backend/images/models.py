@@ -0,0 +1,41 @@
+from django.db import models
+
+
+class ProcessedImage(models.Model):
+    """Renditions, dimensões e placeholder de um arquivo enviado (chave: nome no storage)"""
+
+    STATUS_CHOICES = (
+        ('ready', 'Pronta'),
+        ('failed', 'Falhou'),
+    )
+
+    source = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ready')
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    # Data URI de uma miniatura borrada (LQIP) exibida enquanto a imagem carrega
+    placeholder = models.TextField(blank=True)
+    # {"thumb": {"width": 150, "height": 100, "webp": "<nome>", "jpeg": "<nome>"}, ...}
+    renditions = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.source
+
+
+class Blob(models.Model):
+    """Arquivo do storage endereçado por conteúdo e quantas referências ele tem"""
+    name = models.CharField(max_length=255, unique=True)
+    # Campos de Post/User e renditions de ProcessedImage que apontam para o arquivo
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count})'
@@ -0,0 +1,253 @@
+"""
+Pipeline das imagens enviadas (``Post.image``, ``User.profile_picture`` e
+``User.banner_image``).
+
+Na entrada o arquivo é regravado sem metadados (EXIF, GPS, XMP), já com a
+orientação aplicada. Depois do commit o nome do arquivo vai para a fila
+``images``; o worker gera as renditions (thumb/medium/large em WebP e JPEG),
+as dimensões e um placeholder LQIP, guardados em ``ProcessedImage``. Os
+serializers leem esse registro para montar o mapa de renditions/``srcset``.
+Use ``flush()`` para processar a fila de forma síncrona.
+"""
+import base64
+import logging
+import posixpath
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models import Exists, OuterRef
+from PIL import Image, ImageFilter, ImageOps, UnidentifiedImageError
+
+from backend.worker import BackgroundQueue, workers_enabled
+from . import blobs
+from .models import ProcessedImage
+
+logger = logging.getLogger(__name__)
+
+# Campos de imagem processados por modelo ("app_label.Model": [campos])
+IMAGE_FIELDS = {
+    'posts.Post': ['image'],
+    'users.User': ['profile_picture', 'banner_image'],
+}
+
+# Formato do Pillow e extensão de cada formato de saída
+OUTPUT_FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+# Formatos regravados na entrada; os demais (ex.: GIF) e as animações ficam como vieram
+STRIPPABLE_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+RENDITIONS_DIR = 'renditions'
+
+
+def _config():
+    return getattr(settings, 'IMAGES', {})
+
+
+def renditions():
+    return _config().get('RENDITIONS', {'thumb': 150, 'medium': 600, 'large': 1200})
+
+
+def output_formats():
+    return _config().get('FORMATS', ['webp', 'jpeg'])
+
+
+def quality():
+    return _config().get('QUALITY', 80)
+
+
+def strip_metadata(upload):
+    """Cópia do upload sem metadados e com a orientação EXIF aplicada (``None`` se não suportado)"""
+    try:
+        upload.seek(0)
+        image = Image.open(upload)
+        image_format = image.format
+        # Regravar uma animação guardaria só o primeiro quadro
+        if image_format not in STRIPPABLE_FORMATS or getattr(image, 'is_animated', False):
+            return None
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError):
+        return None
+    finally:
+        upload.seek(0)
+
+    options = {'icc_profile': image.info.get('icc_profile')}
+    if image_format == 'JPEG':
+        options.update(quality=95, optimize=True)
+    elif image_format == 'WEBP':
+        options.update(quality=95)
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue(), name=posixpath.basename(upload.name))
+
+
+def _flatten(image):
+    """RGB para JPEG; transparência vira fundo branco"""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB') if image.mode != 'RGB' else image
+
+
+def _encode(image, output_format):
+    pillow_format, _ = OUTPUT_FORMATS[output_format]
+    if pillow_format == 'JPEG':
+        image = _flatten(image)
+    buffer = BytesIO()
+    image.save(buffer, pillow_format, quality=quality(), optimize=pillow_format == 'JPEG')
+    return buffer.getvalue()
+
+
+def placeholder(image):
+    """Miniatura borrada em data URI (LQIP)"""
+    size = _config().get('PLACEHOLDER_SIZE', 16)
+    tiny = _flatten(image.copy())
+    tiny.thumbnail((size, size))
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    tiny.save(buffer, 'JPEG', quality=50)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def _resize(image, width):
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def render(source):
+    """Gera renditions e placeholder de ``source``; devolve o ``ProcessedImage``"""
+    with default_storage.open(source) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+
+    previous = ProcessedImage.objects.filter(source=source).first()
+    stem = posixpath.splitext(source)[0]
+    generated = {}
+    for label, width in renditions().items():
+        resized = _resize(image, width)
+        entry = {'width': resized.width, 'height': resized.height}
+        for output_format in output_formats():
+            _, extension = OUTPUT_FORMATS[output_format]
+            name = f'{RENDITIONS_DIR}/{stem}/{label}.{extension}'
+            entry[output_format] = default_storage.save(name, ContentFile(_encode(resized, output_format)))
+        generated[label] = entry
+
+    processed, _ = ProcessedImage.objects.update_or_create(
+        source=source,
+        defaults={
+            'status': 'ready',
+            'width': image.width,
+            'height': image.height,
+            'placeholder': placeholder(image),
+            'renditions': generated,
+        },
+    )
+    # Renditions são blobs: as antigas só saem do disco por release()/collect()
+    blobs.retain(blobs.rendition_names(processed))
+    if previous is not None:
+        blobs.release(blobs.rendition_names(previous))
+    return processed
+
+
+def process_batch(sources, force=False):
+    if not force:
+        # Reenvio de um arquivo idêntico cai no mesmo blob, já processado
+        ready = set(ProcessedImage.objects.filter(source__in=sources, status='ready').values_list('source', flat=True))
+        sources = [source for source in sources if source not in ready]
+    for source in sources:
+        try:
+            render(source)
+        except Exception:
+            logger.exception('Falha ao processar a imagem %s', source)
+            ProcessedImage.objects.update_or_create(source=source, defaults={'status': 'failed'})
+
+
+@lru_cache(maxsize=None)
+def get_queue():
+    config = _config()
+    return BackgroundQueue(
+        process_batch,
+        name='images',
+        flush_interval=config.get('FLUSH_INTERVAL', 0.5),
+        batch_size=config.get('BATCH_SIZE', 20),
+        worker=config.get('WORKER', True) and workers_enabled(),
+    )
+
+
+def enqueue(sources):
+    """Agenda o processamento para depois do commit"""
+    sources = [source for source in sources if source]
+    if sources:
+        transaction.on_commit(lambda: get_queue().put_many(sources))
+
+
+
+@receiver(setting_changed)
+def reset_queue(setting, **kwargs):
+    # A fila nova (e a decisão de ter worker) segue as configurações alteradas
+    if setting in ('IMAGES', 'BACKGROUND_WORKERS'):
+        get_queue.cache_clear()
+
+
+def flush():
+    return get_queue().drain()
+
+
+def image_names(instances):
+    """Nomes de todos os arquivos de imagem dos objetos informados"""
+    names = set()
+    for instance in instances:
+        for field in IMAGE_FIELDS.get(instance._meta.label, []):
+            file = getattr(instance, field)
+            if file:
+                names.add(file.name)
+    return names
+
+
+def ready_annotations(*paths):
+    """Anotações ``Exists`` dizendo se o arquivo em cada caminho já tem renditions"""
+    return {
+        f'{path.replace("__", "_")}_ready': Exists(
+            ProcessedImage.objects.filter(source=OuterRef(path), status='ready')
+        )
+        for path in paths
+    }
+
+
+def resolve_into(context, instances):
+    """
+    Completa ``context['images']`` (``{source: ProcessedImage ou None}``) com
+    os arquivos de ``instances`` que ainda não foram resolvidos, em uma consulta.
+    """
+    known = context.setdefault('images', {})
+    missing = image_names(instances) - known.keys()
+    if missing:
+        ready = {
+            processed.source: processed
+            for processed in ProcessedImage.objects.filter(source__in=missing, status='ready')
+        }
+        known.update({name: ready.get(name) for name in missing})
+
+
+async def aresolve_into(context, instances):
+    """``resolve_into`` pelo ORM assíncrono"""
+    known = context.setdefault('images', {})
+    missing = image_names(instances) - known.keys()
+    if missing:
+        ready = {
+            processed.source: processed
+            async for processed in ProcessedImage.objects.filter(source__in=missing, status='ready').aiterator()
+        }
+        known.update({name: ready.get(name) for name in missing})
@@ -0,0 +1,53 @@
+from rest_framework import serializers
+
+from .models import ProcessedImage
+from .processing import OUTPUT_FORMATS
+
+
+class RenditionsField(serializers.Field):
+    """
+    Mapa de renditions de um campo de imagem.
+
+    Usa ``context['images']`` (resolvido em lote pelos list serializers) e cai
+    numa consulta por arquivo quando o contexto não traz o arquivo. Devolve
+    ``None`` enquanto a imagem não foi processada.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        images = self.context.get('images', {})
+        if value.name in images:
+            processed = images[value.name]
+        else:
+            processed = ProcessedImage.objects.filter(source=value.name, status='ready').first()
+        if processed is None:
+            return None
+
+        storage = value.storage
+        renditions = {}
+        srcset = {}
+        for label, rendition in processed.renditions.items():
+            entry = {'width': rendition['width'], 'height': rendition['height']}
+            for output_format in OUTPUT_FORMATS:
+                if rendition.get(output_format):
+                    url = self._absolute(storage.url(rendition[output_format]))
+                    entry[output_format] = url
+                    srcset.setdefault(output_format, []).append(f'{url} {rendition["width"]}w')
+            renditions[label] = entry
+
+        return {
+            'width': processed.width,
+            'height': processed.height,
+            'placeholder': processed.placeholder,
+            'renditions': renditions,
+            'srcset': {output_format: ', '.join(items) for output_format, items in srcset.items()},
+        }
+
+    def _absolute(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
@@ -0,0 +1,74 @@
+from django.apps import apps
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from backend import fragments
+from . import blobs, processing
+from .models import ProcessedImage
+
+
+def strip_uploads(sender, instance, **kwargs):
+    """Regrava sem metadados os arquivos recém-enviados, antes de irem para o storage"""
+    pending = []
+    for field in processing.IMAGE_FIELDS[sender._meta.label]:
+        file = getattr(instance, field)
+        if not file or file._committed:
+            continue
+        stripped = processing.strip_metadata(file)
+        if stripped is not None:
+            setattr(instance, field, stripped)
+        pending.append(field)
+    instance._pending_images = pending
+
+
+def remember_stored_images(sender, instance, update_fields=None, **kwargs):
+    """Guarda os nomes gravados no banco antes do save, para ajustar as referências depois"""
+    fields = processing.IMAGE_FIELDS[sender._meta.label]
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    stored = {}
+    if fields and not instance._state.adding and instance.pk:
+        stored = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+    instance._stored_images = stored
+
+
+def enqueue_uploads(sender, instance, **kwargs):
+    fields = getattr(instance, '_pending_images', [])
+    if fields:
+        processing.enqueue([getattr(instance, field).name for field in fields])
+        instance._pending_images = []
+
+
+def update_blob_references(sender, instance, created, update_fields=None, **kwargs):
+    fields = processing.IMAGE_FIELDS[sender._meta.label]
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    stored = getattr(instance, '_stored_images', {})
+    current = {field: getattr(instance, field).name or '' for field in fields}
+    previous = {field: stored.get(field) or '' for field in fields}
+    blobs.retain([name for field, name in current.items() if name != previous[field]])
+    blobs.release([name for field, name in previous.items() if name != current[field]])
+    instance._stored_images = current
+
+
+def release_blob_references(sender, instance, **kwargs):
+    blobs.release([getattr(instance, field).name for field in processing.IMAGE_FIELDS[sender._meta.label]])
+
+
+def invalidate_rendered_fragments(sender, instance, **kwargs):
+    """Renditions prontas mudam o JSON de quem usa a imagem"""
+    for label, fields in processing.IMAGE_FIELDS.items():
+        model = apps.get_model(label)
+        uses = Q(_connector=Q.OR, **{field: instance.source for field in fields})
+        fragments.invalidate(model, list(model.objects.filter(uses).values_list('pk', flat=True)))
+
+
+post_save.connect(invalidate_rendered_fragments, sender=ProcessedImage, dispatch_uid='images_fragments')
+
+for label in processing.IMAGE_FIELDS:
+    model = apps.get_model(label)
+    pre_save.connect(strip_uploads, sender=model, dispatch_uid=f'images_strip_{label}')
+    pre_save.connect(remember_stored_images, sender=model, dispatch_uid=f'images_remember_{label}')
+    post_save.connect(enqueue_uploads, sender=model, dispatch_uid=f'images_enqueue_{label}')
+    post_save.connect(update_blob_references, sender=model, dispatch_uid=f'images_retain_{label}')
+    post_delete.connect(release_blob_references, sender=model, dispatch_uid=f'images_release_{label}')
@@ -0,0 +1,74 @@
+"""
+Storage endereçado por conteúdo.
+
+O nome final de cada arquivo é o sha256 do conteúdo, em diretórios
+fragmentados pelos primeiros bytes (``blobs/ab/cd/abcd...ef.jpg``). Uploads
+idênticos (o mesmo meme repostado, o mesmo avatar reenviado) viram um único
+arquivo; as referências de ``Post``/``User`` são contadas em ``Blob`` (ver
+``images.blobs``) e os órfãos são removidos por ``collect_blobs``.
+
+O hash é calculado em streaming enquanto o conteúdo é copiado para um
+arquivo temporário no mesmo diretório, que depois é renomeado atomicamente;
+o arquivo nunca é carregado inteiro na memória.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+BLOBS_DIR = 'blobs'
+TMP_DIR = 'tmp'
+
+
+def blob_name(digest, extension):
+    return f'{BLOBS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(f'{BLOBS_DIR}/')
+
+
+def is_temporary(name):
+    """Uploads ainda sendo copiados (``blobs/tmp/``), que nunca são servidos"""
+    return name == f'{BLOBS_DIR}/{TMP_DIR}' or name.startswith(f'{BLOBS_DIR}/{TMP_DIR}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # O nome pedido é descartado em _save; não há colisão a evitar
+        return name
+
+    def _save(self, name, content):
+        extension = posixpath.splitext(name)[1].lower()
+        temp_dir = self.path(f'{BLOBS_DIR}/{TMP_DIR}')
+        os.makedirs(temp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp:
+            try:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp.write(chunk)
+            except BaseException:
+                temp.close()
+                os.unlink(temp.name)
+                raise
+
+        name = blob_name(digest.hexdigest(), extension)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            os.unlink(temp.name)
+            return name
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Duas gravações simultâneas do mesmo conteúdo produzem o mesmo arquivo
+        os.replace(temp.name, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
@@ -0,0 +1,238 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models.signals import post_delete
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from users.models import User
+from . import blobs, processing
+from .models import Blob, ProcessedImage
+
+
+def jpeg_with_exif(size=(800, 400)):
+    image = Image.new('RGB', size, (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = 'CameraMaker'  # Make
+    exif[0x0112] = 6  # Orientation: girar 90°
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+def animated_webp():
+    frames = [Image.new('RGB', (64, 64), color) for color in ((255, 0, 0), (0, 0, 255))]
+    buffer = BytesIO()
+    frames[0].save(buffer, 'WEBP', save_all=True, append_images=frames[1:], duration=100, loop=0)
+    return buffer.getvalue()
+
+
+class ImagePipelineTests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+
+    def test_upload_is_stripped_and_renditions_are_served(self):
+        upload = SimpleUploadedFile('foto.jpg', jpeg_with_exif(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/posts/', {'content': 'foto', 'image': upload}, format='multipart')
+        post = Post.objects.get()
+
+        with default_storage.open(post.image.name) as file:
+            stored = Image.open(file)
+            self.assertEqual(len(stored.getexif()), 0)
+            self.assertEqual(stored.size, (400, 800))
+
+        self.assertEqual(processing.flush(), 1)
+        data = self.client.get('/api/posts/').data[0]['image_renditions']
+        self.assertEqual((data['width'], data['height']), (400, 800))
+        self.assertTrue(data['placeholder'].startswith('data:image/jpeg;base64,'))
+        self.assertEqual(set(data['renditions']), {'thumb', 'medium', 'large'})
+        self.assertEqual(data['renditions']['thumb']['width'], 150)
+        self.assertEqual(data['renditions']['large']['width'], 400)
+        self.assertIn(' 150w', data['srcset']['webp'])
+
+    def test_animated_upload_keeps_its_frames(self):
+        upload = SimpleUploadedFile('anim.webp', animated_webp(), content_type='image/webp')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/posts/', {'content': 'anim', 'image': upload}, format='multipart')
+
+        with default_storage.open(Post.objects.get().image.name) as file:
+            self.assertEqual(Image.open(file).n_frames, 2)
+
+    def test_backfill_command_processes_old_uploads(self):
+        name = default_storage.save('post_images/antiga.jpg', ContentFile(jpeg_with_exif()))
+        post = Post.objects.create(user=self.user, content='antiga')
+        Post.objects.filter(pk=post.pk).update(image=name)
+
+        call_command('process_images', '--strip-metadata', stdout=StringIO())
+
+        # Sem metadados o conteúdo muda, e com ele o nome do blob
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, name)
+        processed = ProcessedImage.objects.get(source=post.image.name)
+        self.assertEqual(processed.status, 'ready')
+        self.assertEqual(len(processed.renditions['medium']), 4)
+        with default_storage.open(post.image.name) as file:
+            self.assertEqual(len(Image.open(file).getexif()), 0)
+        self.assertEqual(Blob.objects.get(name=post.image.name).ref_count, 1)
+        # O arquivo antigo nunca foi referenciado por sinal: sai na varredura do GC
+        call_command('collect_blobs', '--grace-hours=0', stdout=StringIO())
+        self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(post.image.name))
+
+
+class ContentAddressedStorageTests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, filename):
+        upload = SimpleUploadedFile(filename, jpeg_with_exif(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/posts/', {'content': 'meme', 'image': upload}, format='multipart')
+        processing.flush()
+        return Post.objects.latest('id')
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload('meme.jpg')
+        second = self.upload('meme (1).jpg')
+
+        digest = hashlib.sha256(default_storage.open(first.image.name).read()).hexdigest()
+        self.assertEqual(first.image.name, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(Blob.objects.get(name=first.image.name).ref_count, 2)
+        self.assertEqual(ProcessedImage.objects.count(), 1)
+
+    def test_orphans_are_collected_with_their_renditions(self):
+        first = self.upload('meme.jpg')
+        second = self.upload('meme.jpg')
+        name = first.image.name
+        renditions = blobs.rendition_names(ProcessedImage.objects.get(source=name))
+
+        first.delete()
+        call_command('collect_blobs', '--grace-hours=0', stdout=StringIO())
+        self.assertTrue(default_storage.exists(name))
+
+        second.delete()
+        call_command('collect_blobs', '--grace-hours=0', stdout=StringIO())
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(any(default_storage.exists(rendition) for rendition in renditions))
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(ProcessedImage.objects.exists())
+
+    def test_rerender_leaves_rendition_blobs_to_ref_counting(self):
+        post = self.upload('meme.jpg')
+        renditions = blobs.rendition_names(ProcessedImage.objects.get(source=post.image.name))
+
+        processing.process_batch([post.image.name], force=True)
+
+        self.assertEqual(blobs.rendition_names(ProcessedImage.objects.get(source=post.image.name)), renditions)
+        self.assertTrue(all(default_storage.exists(rendition) for rendition in renditions))
+        self.assertEqual(dict(Blob.objects.filter(name__in=renditions).values_list('name', 'ref_count')), Counter(renditions))
+
+    def test_blob_retained_during_collection_is_kept(self):
+        post = self.upload('meme.jpg')
+        name = post.image.name
+        post.delete()
+
+        # O mesmo arquivo reenviado enquanto a coleta roda
+        def reupload(sender, instance, **kwargs):
+            blobs.retain([instance.source])
+        post_delete.connect(reupload, sender=ProcessedImage)
+        self.addCleanup(post_delete.disconnect, reupload, sender=ProcessedImage)
+
+        removed = blobs.collect(grace=timedelta(0))
+
+        self.assertNotIn(name, removed)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(Blob.objects.get(name=name).ref_count, 1)
+
+    def test_reconcile_repairs_counts(self):
+        post = self.upload('meme.jpg')
+        Blob.objects.filter(name=post.image.name).update(ref_count=0)
+
+        call_command('collect_blobs', '--reconcile', '--grace-hours=0', stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertEqual(Blob.objects.get(name=post.image.name).ref_count, 1)
+
+
+class MediaServingTests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.content = bytes(range(256)) * 4
+        self.name = default_storage.save('post_images/foto.jpg', ContentFile(self.content))
+        self.url = f'/media/{self.name}'
+
+    def test_hashed_names_are_immutable_and_revalidate_with_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+
+        # If-Range com ETag diferente: arquivo inteiro
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-0', HTTP_IF_RANGE='"outro"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_accel_redirect_and_traversal(self):
+        with self.settings(MEDIA_SERVING={'ACCEL_REDIRECT': '/protected-media/'}):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+    def test_partial_uploads_are_not_served(self):
+        temp_dir = os.path.join(settings.MEDIA_ROOT, 'blobs', 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        with open(os.path.join(temp_dir, 'upload-parcial.jpg'), 'wb') as file:
+            file.write(self.content[:100])
+
+        self.assertEqual(self.client.get('/media/blobs/tmp/upload-parcial.jpg').status_code, 404)
+        self.assertEqual(self.client.get('/media/blobs/./tmp/upload-parcial.jpg').status_code, 404)
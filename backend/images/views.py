@@ -0,0 +1,149 @@
+"""
+Servidor de arquivos de mídia para produção (substitui ``static()``).
+
+- ``ETag``/``If-None-Match`` e ``Last-Modified``/``If-Modified-Since`` com
+  resposta 304; para blobs o ETag é o próprio sha256 do nome.
+- ``Range`` de um único intervalo (206/416, com ``If-Range``).
+- ``Cache-Control`` longo e ``immutable`` para nomes endereçados por conteúdo.
+- Respostas completas usam ``FileResponse``, que o servidor WSGI envia com
+  ``sendfile`` quando disponível; com ``MEDIA_SERVING['ACCEL_REDIRECT']`` a
+  entrega fica com o proxy (nginx) via ``X-Accel-Redirect``.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_http_methods
+from django.views.static import was_modified_since
+
+from .storage import is_blob, is_temporary
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _config():
+    return getattr(settings, 'MEDIA_SERVING', {})
+
+
+def cache_control(name):
+    if is_blob(name):
+        return f'public, max-age={_config().get("IMMUTABLE_MAX_AGE", 31536000)}, immutable'
+    return f'public, max-age={_config().get("MAX_AGE", 3600)}'
+
+
+def etag_for(name, stat):
+    if is_blob(name):
+        return '"%s"' % posixpath.splitext(posixpath.basename(name))[0]
+    return '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+
+
+def etag_matches(header, etag):
+    """Comparação fraca, como pede o ``If-None-Match``"""
+    if header.strip() == '*':
+        return True
+    return any(tag.removeprefix('W/') == etag for tag in parse_etags(header))
+
+
+def parse_range(header, size):
+    """``(início, fim)`` inclusivos; ``None`` para ignorar; ``ValueError`` se insatisfazível"""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Vários intervalos ou unidade desconhecida: responde o arquivo inteiro
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if length == 0:
+            raise ValueError
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_http_methods(['GET', 'HEAD'])
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Arquivo não encontrado')
+    name = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    if is_temporary(name) or not os.path.isfile(full_path):
+        raise Http404('Arquivo não encontrado')
+
+    stat = os.stat(full_path)
+    etag = etag_for(name, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': cache_control(name),
+        'Accept-Ranges': 'bytes',
+    }
+
+    if_none_match = request.headers.get('If-None-Match')
+    not_modified = (
+        etag_matches(if_none_match, etag) if if_none_match
+        else not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime)
+    )
+    if not_modified:
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    accel_prefix = _config().get('ACCEL_REDIRECT')
+    if accel_prefix:
+        # O proxy entrega o arquivo (inclusive Range) a partir da location interna
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + name
+        return response
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416, headers=headers)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type, headers=headers)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, length), status=206, content_type=content_type, headers=headers
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(length)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
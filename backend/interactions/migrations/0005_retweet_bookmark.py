@@ -0,0 +1,147 @@
+# Generated by Django 4.2 on 2026-10-18 19:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def copy_retweets(apps, schema_editor):
+    """Copia a tabela automática do M2M ``Post.retweets`` para ``Retweet``"""
+    Post = apps.get_model("posts", "Post")
+    Retweet = apps.get_model("interactions", "Retweet")
+    rows = Post.retweets.through.objects.values_list("user_id", "post_id")
+    batch = []
+    for user_id, post_id in rows.iterator(chunk_size=2000):
+        batch.append(Retweet(user_id=user_id, post_id=post_id))
+        if len(batch) >= 2000:
+            Retweet.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    Retweet.objects.bulk_create(batch, ignore_conflicts=True)
+    # A data real do retweet não existia; a do post é o limite inferior
+    Retweet.objects.update(
+        created_at=Subquery(
+            Post.objects.filter(pk=OuterRef("post_id")).values("created_at")[:1]
+        )
+    )
+
+
+def restore_retweets(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Retweet = apps.get_model("interactions", "Retweet")
+    Post.retweets.through.objects.bulk_create(
+        [
+            Post.retweets.through(user_id=user_id, post_id=post_id)
+            for user_id, post_id in Retweet.objects.values_list("user_id", "post_id")
+        ],
+        batch_size=2000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0008_hashtags_mentions"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("interactions", "0004_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Retweet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retweet_links",
+                        to="posts.post",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retweet_links",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Bookmark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bookmarks",
+                        to="posts.post",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bookmarks",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="retweet",
+            index=models.Index(
+                fields=["post", "-created_at", "-id"],
+                name="interaction_post_id_4bd0c4_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="retweet",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="interaction_user_id_f6c0e8_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="retweet",
+            constraint=models.UniqueConstraint(
+                fields=("user", "post"), name="unique_retweet"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="interaction_user_id_9a4f44_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="bookmark",
+            constraint=models.UniqueConstraint(
+                fields=("user", "post"), name="unique_bookmark"
+            ),
+        ),
+        migrations.RunPython(copy_retweets, restore_retweets),
+    ]
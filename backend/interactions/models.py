@@ -13,6 +13,42 @@ class Like(models.Model):
     def __str__(self):
         return f'{self.user.username} likes {self.post.id}'
 
+class Retweet(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='retweet_links')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='retweet_links')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_retweet'),
+        ]
+        indexes = [
+            # "Retweetado por" e timeline de retweets, ambos paginados por keyset
+            models.Index(fields=['post', '-created_at', '-id']),
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} retweeted {self.post.id}'
+
+
+class Bookmark(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='bookmarks')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='bookmarks')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_bookmark'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} bookmarked {self.post.id}'
+
+
 class Comment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comments')
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
@@ -22,6 +58,9 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f'{self.user.username}: {self.content[:50]}'
\ No newline at end of file
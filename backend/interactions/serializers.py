@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Like, Comment
+from .models import Bookmark, Comment, Like, Retweet
+from images import processing as images
+from posts.queries import resolve_viewer_state
+from posts.serializers import PostSerializer
 from users.serializers import UserSerializer
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -17,4 +20,54 @@ class LikeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Like
         fields = ['id', 'user', 'post', 'created_at']
-        read_only_fields = ['user', 'created_at']
\ No newline at end of file
+        read_only_fields = ['user', 'created_at']
+
+
+class RetweeterListSerializer(serializers.ListSerializer):
+    """Resolve as fotos de todos os usuários da página em uma consulta"""
+
+    def to_representation(self, data):
+        rows = list(data.all() if hasattr(data, 'all') else data)
+        images.resolve_into(self.context, [row.user for row in rows])
+        return super().to_representation(rows)
+
+
+class RetweeterSerializer(serializers.ModelSerializer):
+    """Uma linha de "retweetado por" """
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Retweet
+        fields = ['user', 'created_at']
+        list_serializer_class = RetweeterListSerializer
+
+
+class PostEntryListSerializer(serializers.ListSerializer):
+    """Estado do usuário logado e imagens resolvidos para a página de posts inteira"""
+
+    def to_representation(self, data):
+        rows = list(data.all() if hasattr(data, 'all') else data)
+        posts = [row.post for row in rows]
+        request = self.context.get('request')
+        if request is not None:
+            self.context['viewer_state'] = resolve_viewer_state(request.user, posts)
+        images.resolve_into(self.context, posts + [post.user for post in posts])
+        return super().to_representation(rows)
+
+
+class RetweetedPostSerializer(serializers.ModelSerializer):
+    post = PostSerializer(read_only=True)
+
+    class Meta:
+        model = Retweet
+        fields = ['post', 'created_at']
+        list_serializer_class = PostEntryListSerializer
+
+
+class BookmarkSerializer(serializers.ModelSerializer):
+    post = PostSerializer(read_only=True)
+
+    class Meta:
+        model = Bookmark
+        fields = ['post', 'created_at']
+        list_serializer_class = PostEntryListSerializer
@@ -0,0 +1,208 @@
+"""
+Camada única de escrita das interações: curtida, retweet, favorito,
+comentário e follow.
+
+Curtidas, retweets, favoritos e follows são relações: cada escrita é um
+único ``INSERT ... ON CONFLICT DO NOTHING`` ou ``DELETE`` com ``RETURNING``,
+e a linha devolvida diz se algo mudou; dois toques simultâneos viram uma
+escrita e um no-op, sem carregar conjuntos de relações no Python. Essas
+funções devolvem ``(mudou, contador atualizado)``.
+
+Os efeitos colaterais (contadores, notificações, ETags e fragmentos) ficam
+nas funções ``*_added``/``*_removed``: as escritas daqui as chamam quando a
+linha mudou e ``interactions.signals`` as liga aos sinais do ORM, para que
+escritas feitas fora desta camada (admin, shell, fixtures) tenham o mesmo
+efeito. Follows continuam emitindo ``m2m_changed``, tratado em
+``users.signals``.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router, transaction
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
+
+from backend import conditional
+from notifications import pipeline
+from posts import counters
+from posts.models import Post
+from .models import Bookmark, Comment, Like, Retweet
+
+User = get_user_model()
+
+
+def _connection(model):
+    return connections[router.db_for_write(model)]
+
+
+def _insert(model, **values):
+    """Id da linha inserida, ou ``None`` se ela já existia"""
+    connection = _connection(model)
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in values]
+    params = [field.get_db_prep_save(values[field.attname], connection) for field in fields]
+    sql = 'INSERT INTO %s (%s) VALUES (%s) ON CONFLICT DO NOTHING RETURNING %s' % (
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+        quote(model._meta.pk.column),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _delete(model, **values):
+    """Id da linha removida, ou ``None`` se ela não existia"""
+    connection = _connection(model)
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in values]
+    sql = 'DELETE FROM %s WHERE %s RETURNING %s' % (
+        quote(model._meta.db_table),
+        ' AND '.join('%s = %%s' % quote(field.column) for field in fields),
+        quote(model._meta.pk.column),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [values[field.attname] for field in fields])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _counter(model, pk, field):
+    return model.objects.filter(pk=pk).values_list(field, flat=True).first() or 0
+
+
+def _notify_author(post, sender, notification_type, text):
+    if sender.id != post.user_id:
+        pipeline.notify(
+            recipient=post.user,
+            sender=sender,
+            notification_type=notification_type,
+            content_type_id=ContentType.objects.get_for_model(Post).id,
+            object_id=post.id,
+            text=text,
+        )
+
+
+# Efeitos colaterais
+
+def like_added(like):
+    counters.adjust(Post, like.post_id, likes_count=1)
+    conditional.bump('viewer', [like.user_id])
+    _notify_author(like.post, like.user, 'like', f'{like.user.username} curtiu seu post')
+
+
+def like_removed(like):
+    counters.adjust(Post, like.post_id, likes_count=-1)
+    conditional.bump('viewer', [like.user_id])
+
+
+def retweet_added(user_id, post_id):
+    counters.adjust(Post, post_id, retweets_count=1)
+    conditional.bump('viewer', [user_id])
+
+
+def retweet_removed(user_id, post_id):
+    counters.adjust(Post, post_id, retweets_count=-1)
+    conditional.bump('viewer', [user_id])
+
+
+def bookmark_changed(user_id):
+    conditional.bump('viewer', [user_id])
+
+
+def comment_added(comment):
+    counters.adjust(Post, comment.post_id, comments_count=1)
+    _notify_author(comment.post, comment.user, 'comment', f'{comment.user.username} comentou: {comment.content[:50]}')
+
+
+def comment_removed(comment):
+    counters.adjust(Post, comment.post_id, comments_count=-1)
+
+
+# Escritas
+
+@transaction.atomic
+def like(user, post):
+    now = timezone.now()
+    pk = _insert(Like, user_id=user.id, post_id=post.id, created_at=now)
+    if pk is not None:
+        like_added(Like(id=pk, user=user, post=post, created_at=now))
+    return pk is not None, _counter(Post, post.id, 'likes_count')
+
+
+@transaction.atomic
+def unlike(user, post):
+    pk = _delete(Like, user_id=user.id, post_id=post.id)
+    if pk is not None:
+        like_removed(Like(id=pk, user=user, post=post))
+    return pk is not None, _counter(Post, post.id, 'likes_count')
+
+
+@transaction.atomic
+def retweet(user, post):
+    changed = _insert(Retweet, user_id=user.id, post_id=post.id, created_at=timezone.now()) is not None
+    if changed:
+        retweet_added(user.id, post.id)
+    return changed, _counter(Post, post.id, 'retweets_count')
+
+
+@transaction.atomic
+def unretweet(user, post):
+    changed = _delete(Retweet, user_id=user.id, post_id=post.id) is not None
+    if changed:
+        retweet_removed(user.id, post.id)
+    return changed, _counter(Post, post.id, 'retweets_count')
+
+
+@transaction.atomic
+def bookmark(user, post):
+    changed = _insert(Bookmark, user_id=user.id, post_id=post.id, created_at=timezone.now()) is not None
+    if changed:
+        bookmark_changed(user.id)
+    return changed, None
+
+
+@transaction.atomic
+def unbookmark(user, post):
+    changed = _delete(Bookmark, user_id=user.id, post_id=post.id) is not None
+    if changed:
+        bookmark_changed(user.id)
+    return changed, None
+
+
+@transaction.atomic
+def comment(user, post, content):
+    # O save dispara comment_added pelo sinal
+    return Comment.objects.create(user=user, post=post, content=content)
+
+
+@transaction.atomic
+def delete_comment(comment):
+    comment.delete()
+
+
+def _m2m_changed(through, instance, action, model, pk_set, reverse):
+    m2m_changed.send(
+        sender=through, instance=instance, action=action, reverse=reverse,
+        model=model, pk_set=pk_set, using=router.db_for_write(through),
+    )
+
+
+@transaction.atomic
+def follow(follower, followed):
+    # Na tabela de follows, from_user é quem é seguido e to_user quem segue
+    through = User.followers.through
+    changed = _insert(through, from_user_id=followed.id, to_user_id=follower.id) is not None
+    if changed:
+        _m2m_changed(through, follower, 'post_add', User, {followed.id}, reverse=True)
+    return changed, _counter(User, followed.id, 'followers_count')
+
+
+@transaction.atomic
+def unfollow(follower, followed):
+    through = User.followers.through
+    changed = _delete(through, from_user_id=followed.id, to_user_id=follower.id) is not None
+    if changed:
+        _m2m_changed(through, follower, 'post_remove', User, {followed.id}, reverse=True)
+    return changed, _counter(User, followed.id, 'followers_count')
@@ -0,0 +1,59 @@
+"""
+Escritas via ORM (admin, shell, ``post.retweets.add``) passam pelos mesmos
+efeitos colaterais de ``interactions.services``.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import services
+from .models import Bookmark, Comment, Like, Retweet
+
+
+@receiver(post_save, sender=Like)
+def like_saved(sender, instance, created, **kwargs):
+    if created:
+        services.like_added(instance)
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, **kwargs):
+    services.like_removed(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        services.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    services.comment_removed(instance)
+
+
+@receiver(post_save, sender=Retweet)
+def retweet_saved(sender, instance, created, **kwargs):
+    if created:
+        services.retweet_added(instance.user_id, instance.post_id)
+
+
+@receiver(post_delete, sender=Retweet)
+def retweet_deleted(sender, instance, **kwargs):
+    # Também cobre post.retweets.remove(), que apaga as linhas de Retweet
+    services.retweet_removed(instance.user_id, instance.post_id)
+
+
+@receiver(m2m_changed, sender=Retweet)
+def retweets_added(sender, instance, action, reverse, pk_set, **kwargs):
+    """``post.retweets.add()`` grava em lote, sem ``post_save``"""
+    if action != 'post_add' or not pk_set:
+        return
+    pairs = [(instance.id, post_id) for post_id in pk_set] if reverse else [(user_id, instance.id) for user_id in pk_set]
+    for user_id, post_id in pairs:
+        services.retweet_added(user_id, post_id)
+
+
+@receiver(post_save, sender=Bookmark)
+@receiver(post_delete, sender=Bookmark)
+def bookmark_changed(sender, instance, **kwargs):
+    services.bookmark_changed(instance.user_id)
@@ -1,3 +1,140 @@
-from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from notifications import pipeline
+from notifications.models import Notification
+from posts.models import Post
+from users.models import User
+from .models import Like
+from . import services
+
+
+class RelationEndpointTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.post = Post.objects.create(user=self.bob, content='post do bob')
+        self.client.force_authenticate(user=self.alice)
+
+    def test_put_and_delete_like_are_idempotent(self):
+        url = f'/api/posts/{self.post.id}/like/'
+
+        first = self.client.put(url)
+        second = self.client.put(url)
+        self.assertEqual(first.data, {'status': 'liked', 'changed': True, 'likes_count': 1})
+        self.assertEqual(second.data, {'status': 'liked', 'changed': False, 'likes_count': 1})
+
+        first = self.client.delete(url)
+        second = self.client.delete(url)
+        self.assertEqual(first.data, {'status': 'unliked', 'changed': True, 'likes_count': 0})
+        self.assertEqual(second.data['changed'], False)
+        self.assertFalse(Like.objects.exists())
+
+    def test_double_tap_counts_and_notifies_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            services.like(self.alice, self.post)
+            changed, count = services.like(self.alice, self.post)
+        pipeline.flush()
+
+        self.assertEqual((changed, count), (False, 1))
+        self.assertEqual(Notification.objects.filter(recipient=self.bob, notification_type='like').count(), 1)
+
+    def test_retweet_and_follow(self):
+        response = self.client.put(f'/api/posts/{self.post.id}/retweet/')
+        self.assertEqual(response.data, {'status': 'retweeted', 'changed': True, 'retweets_count': 1})
+        self.assertTrue(self.post.retweets.filter(id=self.alice.id).exists())
+
+        response = self.client.put('/api/user/bob/follow/')
+        self.assertEqual(response.data, {'status': 'followed', 'changed': True, 'followers_count': 1})
+        self.assertTrue(self.alice.following.filter(id=self.bob.id).exists())
+
+        response = self.client.delete('/api/user/bob/follow/')
+        self.assertEqual(response.data, {'status': 'unfollowed', 'changed': True, 'followers_count': 0})
+
+    def test_noop_does_not_load_relation_sets(self):
+        for i in range(20):
+            follower = User.objects.create_user(username=f'f{i}', email=f'f{i}@example.com', password='pass12345')
+            follower.following.add(self.bob)
+        self.client.put('/api/user/bob/follow/')
+
+        # Alvo, INSERT condicional e leitura do contador (mais o savepoint)
+        with self.assertNumQueries(5):
+            response = self.client.put('/api/user/bob/follow/')
+        self.assertEqual(response.data['followers_count'], 21)
+
+    def test_post_still_toggles_and_errors_keep_their_shape(self):
+        url = f'/api/posts/{self.post.id}/like/'
+        self.assertEqual(self.client.post(url).data['status'], 'liked')
+        self.assertEqual(self.client.post(url).data['status'], 'unliked')
+
+        self.assertEqual(self.client.put('/api/posts/999/like/').status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.put('/api/user/alice/follow/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+
+
+class InteractionServiceTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.post = Post.objects.create(user=self.bob, content='post do bob')
+        self.client.force_authenticate(user=self.alice)
+
+    def test_orm_and_service_retweets_share_the_counter_path(self):
+        self.post.retweets.add(self.alice)
+        services.retweet(self.bob, self.post)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.retweets_count, 2)
+
+        # remove() apaga linhas de Retweet: um único decremento por linha
+        self.post.retweets.remove(self.alice)
+        services.unretweet(self.bob, self.post)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.retweets_count, 0)
+
+    def test_comments_go_through_the_service(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/interactions/posts/{self.post.id}/comments/', {'content': 'oi'})
+        pipeline.flush()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['content'], 'oi')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertTrue(Notification.objects.filter(recipient=self.bob, notification_type='comment').exists())
+
+        self.client.delete(f'/api/interactions/comments/{response.data["id"]}/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+        response = self.client.post('/api/interactions/posts/999/comments/', {'content': 'oi'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bookmarks(self):
+        response = self.client.put(f'/api/posts/{self.post.id}/bookmark/')
+        self.assertEqual(response.data, {'status': 'bookmarked', 'changed': True})
+
+        response = self.client.get('/api/interactions/bookmarks/')
+        self.assertEqual([item['post']['id'] for item in response.data], [self.post.id])
+        self.assertTrue(response.data[0]['post']['is_bookmarked'])
+        self.assertTrue(self.client.get(f'/api/posts/{self.post.id}/').data['is_bookmarked'])
+
+        self.client.delete(f'/api/posts/{self.post.id}/bookmark/')
+        self.assertEqual(self.client.get('/api/interactions/bookmarks/').data, [])
+
+    def test_retweeted_by_and_retweet_timeline_are_paginated(self):
+        retweeters = [self.alice]
+        for i in range(3):
+            user = User.objects.create_user(username=f'r{i}', email=f'r{i}@example.com', password='pass12345')
+            retweeters.append(user)
+        for user in retweeters:
+            services.retweet(user, self.post)
+
+        response = self.client.get(f'/api/interactions/posts/{self.post.id}/retweets/?page_size=2')
+        self.assertEqual([item['user']['username'] for item in response.data], ['r2', 'r1'])
+        self.assertIn('rel="next"', response['Link'])
+
+        other = Post.objects.create(user=self.bob, content='outro post')
+        services.retweet(self.alice, other)
+        response = self.client.get('/api/interactions/users/alice/retweets/')
+        self.assertEqual([item['post']['id'] for item in response.data], [other.id, self.post.id])
+        self.assertTrue(all(item['post']['is_retweeted'] for item in response.data))
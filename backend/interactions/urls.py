@@ -4,4 +4,7 @@ from . import views
 urlpatterns = [
     path('posts/<int:post_id>/comments/', views.CommentListCreateAPI.as_view(), name='comment-list'),
     path('comments/<int:pk>/', views.CommentDetailAPI.as_view(), name='comment-detail'),
+    path('posts/<int:post_id>/retweets/', views.RetweetedByAPI.as_view(), name='retweeted-by'),
+    path('users/<str:username>/retweets/', views.RetweetTimelineAPI.as_view(), name='retweet-timeline'),
+    path('bookmarks/', views.BookmarkListAPI.as_view(), name='bookmark-list'),
 ]
\ No newline at end of file
@@ -1,7 +1,13 @@
-from requests import Response
-from rest_framework import generics, permissions
-from .models import Comment, Like
-from .serializers import CommentSerializer, LikeSerializer
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from backend.pagination import KeysetPagination
+from posts.models import Post
+from users.models import User
+from . import services
+from .models import Bookmark, Comment, Retweet
+from .serializers import BookmarkSerializer, CommentSerializer, RetweetedPostSerializer, RetweeterSerializer
 
 class CommentListCreateAPI(generics.ListCreateAPIView):
     serializer_class = CommentSerializer
@@ -12,8 +18,8 @@ class CommentListCreateAPI(generics.ListCreateAPIView):
         return Comment.objects.filter(post_id=post_id).order_by('-created_at')
     
     def perform_create(self, serializer):
-        post_id = self.kwargs['post_id']
-        serializer.save(user=self.request.user, post_id=post_id)
+        post = get_object_or_404(Post.objects.select_related('user'), pk=self.kwargs['post_id'])
+        serializer.instance = services.comment(self.request.user, post, serializer.validated_data['content'])
 
 
 class CommentDetailAPI(generics.RetrieveUpdateDestroyAPIView):
@@ -24,24 +30,89 @@ class CommentDetailAPI(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return Comment.objects.filter(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        services.delete_comment(instance)
+
 
-class LikePostAPI(generics.GenericAPIView):
+class RelationAPI(APIView):
+    """
+    Relação do usuário logado com um alvo (curtida, retweet, follow).
+
+    ``PUT`` cria e ``DELETE`` desfaz, ambos idempotentes; ``POST`` alterna, como
+    antes. As escritas são condicionais (ver ``interactions.services``) e a
+    resposta traz o contador atualizado.
+    """
     permission_classes = [permissions.IsAuthenticated]
-    
-    def post(self, request, pk):
-        from posts.models import Post
-        try:
-            post = Post.objects.get(pk=pk)
-        except Post.DoesNotExist:
-            return Response({'error': 'Post não encontrado'}, status=404)
-        
-        like, created = Like.objects.get_or_create(
-            user=request.user,
-            post=post
-        )
-        
-        if not created:
-            like.delete()
-            return Response({'status': 'unliked'})
-        
-        return Response({'status': 'liked'})
\ No newline at end of file
+    activate = deactivate = None
+    statuses = ('active', 'inactive')
+    counter_field = 'count'
+    not_found_message = 'Não encontrado'
+
+    def get_target(self, **kwargs):
+        raise NotImplementedError
+
+    def validate_target(self, target):
+        """Mensagem de erro (400) ou ``None``"""
+        return None
+
+    def handle_relation(self, request, action, **kwargs):
+        target = self.get_target(**kwargs)
+        if target is None:
+            return Response({'error': self.not_found_message}, status=status.HTTP_404_NOT_FOUND)
+        error = self.validate_target(target)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if action == 'toggle':
+            changed, count = self.activate(request.user, target)
+            active = True
+            if not changed:
+                changed, count = self.deactivate(request.user, target)
+                active = False
+        else:
+            active = action == 'activate'
+            changed, count = (self.activate if active else self.deactivate)(request.user, target)
+        data = {'status': self.statuses[0 if active else 1], 'changed': changed}
+        if self.counter_field:
+            data[self.counter_field] = count
+        return Response(data)
+
+    def post(self, request, **kwargs):
+        return self.handle_relation(request, 'toggle', **kwargs)
+
+    def put(self, request, **kwargs):
+        return self.handle_relation(request, 'activate', **kwargs)
+
+    def delete(self, request, **kwargs):
+        return self.handle_relation(request, 'deactivate', **kwargs)
+
+
+class RetweetedByAPI(generics.ListAPIView):
+    """Quem retweetou o post, do mais recente para o mais antigo"""
+    serializer_class = RetweeterSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return Retweet.objects.filter(post_id=self.kwargs['post_id']).select_related('user')
+
+
+class RetweetTimelineAPI(generics.ListAPIView):
+    """Posts retweetados por um usuário, na ordem dos retweets"""
+    serializer_class = RetweetedPostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        user = get_object_or_404(User, username=self.kwargs['username'])
+        return Retweet.objects.filter(user=user).select_related('post__user')
+
+
+class BookmarkListAPI(generics.ListAPIView):
+    """Favoritos do usuário logado"""
+    serializer_class = BookmarkSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return Bookmark.objects.filter(user=self.request.user).select_related('post__user')
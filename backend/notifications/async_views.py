@@ -0,0 +1,49 @@
+"""
+Notificações servidas pelo ORM assíncrono (``/api/async/notifications/``).
+
+Mesmo formato de ``NotificationListView``: a página e o contador de não
+lidas são consultados juntos.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import NotFound
+
+from backend import aio
+from backend.database import use_replica
+from backend.pagination import KeysetPagination
+from images import processing as images
+from users import graph
+from . import unread
+from .models import Notification
+from .serializers import NotificationSerializer
+from .views import NotificationListView
+
+
+@use_replica
+async def notification_list(request):
+    request = await aio.authorized_request(request, NotificationListView)
+    if request is None:
+        return aio.unauthorized()
+
+    paginator = KeysetPagination()
+    queryset = Notification.objects.filter(recipient=request.user).select_related('sender')
+    try:
+        notifications, unread_count = await asyncio.gather(
+            paginator.apaginate_queryset(queryset, request),
+            unread.aget_notifications(request.user.id),
+        )
+    except NotFound as error:
+        return aio.not_found(error.detail)
+
+    context = {'request': request}
+    _, following = await asyncio.gather(
+        images.aresolve_into(context, [notification.sender for notification in notifications]),
+        sync_to_async(graph.following_ids)(request.user),
+    )
+    context['viewer_state'] = {'following': following}
+    data = NotificationSerializer(notifications, many=True, context=context).data
+    return aio.json_response(
+        {'notifications': data, 'unread_count': unread_count},
+        headers=paginator.get_headers(),
+    )
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-18 20:49
+
+from django.db import migrations, models
+
+
+def seed_actor_ids(apps, schema_editor):
+    # Só o último remetente é conhecido; agregados ainda abertos seguem dele em diante
+    Notification = apps.get_model("notifications", "Notification")
+    batch = []
+    for notification in (
+        Notification.objects.filter(is_read=False).only("id", "sender_id").iterator()
+    ):
+        notification.actor_ids = [notification.sender_id]
+        batch.append(notification)
+        if len(batch) >= 1000:
+            Notification.objects.bulk_update(batch, ["actor_ids"])
+            batch = []
+    Notification.objects.bulk_update(batch, ["actor_ids"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_actor_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="actor_ids",
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(seed_actor_ids, migrations.RunPython.noop),
+    ]
@@ -33,14 +33,19 @@ class Notification(models.Model):
     content_object = GenericForeignKey('content_type', 'object_id')
     
     text = models.CharField(max_length=255)
+    # Quantos remetentes foram agregados nesta notificação ("X e N outros...")
+    actor_count = models.PositiveIntegerField(default=1)
+    # Ids distintos desses remetentes: repetir a ação não conta de novo
+    actor_ids = models.JSONField(default=list)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['recipient', '-created_at']),
+            models.Index(fields=['recipient', '-created_at', '-id']),
             models.Index(fields=['recipient', 'is_read']),
+            models.Index(fields=['recipient', 'notification_type', 'object_id']),
         ]
     
     def __str__(self):
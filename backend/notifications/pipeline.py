@@ -0,0 +1,175 @@
+"""
+Pipeline assíncrono de notificações.
+
+Os sinais apenas enfileiram eventos (após o commit da transação); um worker
+em segundo plano drena a fila em lotes e grava com ``bulk_create``. Curtidas
+e follows para a mesma ``(destinatário, tipo, objeto)`` dentro da janela de
+agregação viram uma única notificação ("X e 41 outros curtiram seu post").
+Use ``flush()`` para drenar a fila de forma síncrona (testes, comandos).
+"""
+from collections import Counter, namedtuple
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from backend import conditional
+from backend.worker import BackgroundQueue, workers_enabled
+from realtime.events import publish_notification
+from . import unread
+from .models import Notification
+
+User = get_user_model()
+
+NotificationEvent = namedtuple('NotificationEvent', [
+    'recipient_id', 'sender_id', 'sender_username', 'notification_type',
+    'text', 'content_type_id', 'object_id',
+])
+
+# Tipos agregáveis: (texto para um remetente, texto para vários)
+AGGREGATE_TEXTS = {
+    'like': ('curtiu seu post', 'curtiram seu post'),
+    'follow': ('começou a seguir você', 'começaram a seguir você'),
+}
+
+
+def _config():
+    return getattr(settings, 'NOTIFICATIONS_PIPELINE', {})
+
+
+@lru_cache(maxsize=None)
+def get_queue():
+    config = _config()
+    return BackgroundQueue(
+        write_batch,
+        name='notifications',
+        flush_interval=config.get('FLUSH_INTERVAL', 0.5),
+        batch_size=config.get('BATCH_SIZE', 500),
+        worker=config.get('WORKER', True) and workers_enabled(),
+    )
+
+
+def notify(recipient, sender, notification_type, text, content_type_id=None, object_id=None):
+    """Enfileira uma notificação para ser gravada depois do commit"""
+    event = NotificationEvent(
+        recipient.id, sender.id, sender.username, notification_type,
+        text, content_type_id, object_id,
+    )
+    transaction.on_commit(lambda: get_queue().put(event))
+
+
+def notify_many(recipients, sender, notification_type, text, content_type_id=None, object_id=None):
+    """Mesma notificação para vários destinatários, enfileirada de uma vez"""
+    events = [
+        NotificationEvent(
+            recipient.id, sender.id, sender.username, notification_type,
+            text, content_type_id, object_id,
+        )
+        for recipient in recipients
+    ]
+    if events:
+        transaction.on_commit(lambda: get_queue().put_many(events))
+
+
+
+@receiver(setting_changed)
+def reset_queue(setting, **kwargs):
+    # A fila nova (e a decisão de ter worker) segue as configurações alteradas
+    if setting in ('NOTIFICATIONS_PIPELINE', 'BACKGROUND_WORKERS'):
+        get_queue.cache_clear()
+
+
+def flush():
+    return get_queue().drain()
+
+
+def aggregated_text(username, notification_type, actor_count):
+    single, plural = AGGREGATE_TEXTS[notification_type]
+    if actor_count == 1:
+        return f'{username} {single}'
+    others = actor_count - 1
+    return f'{username} e {others} {"outro" if others == 1 else "outros"} {plural}'
+
+
+def _key(event):
+    return (event.recipient_id, event.notification_type, event.object_id)
+
+
+def write_batch(events):
+    """Grava um lote de eventos, agregando os tipos de ``AGGREGATE_TEXTS``"""
+    to_create = []
+    groups = {}
+    for event in events:
+        if event.notification_type in AGGREGATE_TEXTS:
+            groups.setdefault(_key(event), []).append(event)
+        else:
+            to_create.append(_build(event, event.text))
+
+    existing = {}
+    if groups:
+        window = timedelta(seconds=_config().get('AGGREGATION_WINDOW', 3600))
+        candidates = Notification.objects.filter(
+            recipient_id__in={key[0] for key in groups},
+            notification_type__in={key[1] for key in groups},
+            is_read=False,
+            created_at__gte=timezone.now() - window,
+        ).order_by('created_at')
+        for notification in candidates:
+            existing[(notification.recipient_id, notification.notification_type, notification.object_id)] = notification
+
+    to_update = []
+    for key, group in groups.items():
+        notification = existing.get(key)
+        known_senders = set(notification.actor_ids) if notification else set()
+        senders = {}
+        for event in group:
+            if event.sender_id not in known_senders:
+                senders[event.sender_id] = event
+        if not senders:
+            continue
+
+        latest = list(senders.values())[-1]
+        if notification is None:
+            notification = _build(latest, '')
+            notification.actor_ids = list(senders)
+            notification.actor_count = len(senders)
+            to_create.append(notification)
+        else:
+            notification.sender_id = latest.sender_id
+            notification.actor_ids = notification.actor_ids + list(senders)
+            notification.actor_count += len(senders)
+            to_update.append(notification)
+        notification.text = aggregated_text(latest.sender_username, latest.notification_type, notification.actor_count)
+
+    with transaction.atomic():
+        Notification.objects.bulk_create(to_create)
+        Notification.objects.bulk_update(to_update, ['sender', 'actor_count', 'actor_ids', 'text'])
+
+    conditional.bump('notifications', {notification.recipient_id for notification in to_create + to_update})
+    created_per_recipient = Counter(notification.recipient_id for notification in to_create)
+    for recipient_id, created in created_per_recipient.items():
+        unread.incr_notifications(recipient_id, created)
+
+    written = to_create + to_update
+    senders = User.objects.in_bulk({notification.sender_id for notification in written})
+    for notification in written:
+        notification.sender = senders[notification.sender_id]
+        publish_notification(notification)
+    return written
+
+
+def _build(event, text):
+    return Notification(
+        recipient_id=event.recipient_id,
+        sender_id=event.sender_id,
+        notification_type=event.notification_type,
+        content_type_id=event.content_type_id,
+        object_id=event.object_id,
+        actor_ids=[event.sender_id],
+        text=text,
+    )
@@ -7,4 +7,4 @@ class NotificationSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Notification
-        fields = ['id', 'sender', 'notification_type', 'text', 'is_read', 'created_at', 'object_id']
\ No newline at end of file
+        fields = ['id', 'sender', 'notification_type', 'text', 'is_read', 'created_at', 'object_id', 'actor_count']
\ No newline at end of file
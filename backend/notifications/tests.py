@@ -1,3 +1,198 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from interactions.models import Like
+from posts.models import Post
+from users.models import User
+from . import pipeline, unread
+from .models import Notification
+
+
+class NotificationPipelineTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.post = Post.objects.create(user=self.author, content='post')
+        self.fans = [
+            User.objects.create_user(username=f'fa{i}', email=f'fa{i}@example.com', password='pass12345')
+            for i in range(4)
+        ]
+
+    def like(self, fans):
+        with self.captureOnCommitCallbacks(execute=True):
+            for fan in fans:
+                Like.objects.create(user=fan, post=self.post)
+
+    def test_nothing_is_written_until_the_queue_drains(self):
+        self.like(self.fans[:1])
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(pipeline.flush(), 1)
+        self.assertEqual(Notification.objects.get().text, 'fa0 curtiu seu post')
+
+    def test_burst_of_likes_is_aggregated(self):
+        self.like(self.fans[:3])
+        pipeline.flush()
+        self.like(self.fans[3:])
+        pipeline.flush()
+
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.actor_count, 4)
+        self.assertEqual(notification.sender, self.fans[3])
+        self.assertEqual(notification.text, 'fa3 e 3 outros curtiram seu post')
+        self.assertEqual(notification.object_id, self.post.id)
+        self.assertEqual(notification.content_type, ContentType.objects.get_for_model(Post))
+
+    def test_repeated_actions_count_each_sender_once(self):
+        self.like(self.fans[:2])
+        pipeline.flush()
+        Like.objects.filter(user=self.fans[0]).delete()
+        self.like(self.fans[:1])
+        pipeline.flush()
+
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.text, 'fa1 e 1 outro curtiram seu post')
+
+    def test_worker_mode_follows_settings(self):
+        self.assertFalse(pipeline.get_queue().worker)
+        with override_settings(BACKGROUND_WORKERS=True):
+            self.assertTrue(pipeline.get_queue().worker)
+        with override_settings(NOTIFICATIONS_PIPELINE={'WORKER': False}, BACKGROUND_WORKERS=True):
+            self.assertFalse(pipeline.get_queue().worker)
+
+    def test_read_notification_starts_a_new_aggregate(self):
+        self.like(self.fans[:2])
+        pipeline.flush()
+        Notification.objects.update(is_read=True)
+        self.like(self.fans[2:3])
+        pipeline.flush()
+
+        self.assertEqual(
+            list(Notification.objects.order_by('id').values_list('actor_count', 'is_read')),
+            [(2, True), (1, False)],
+        )
+
+
+class UnreadSummaryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.client.force_authenticate(user=self.bob)
+
+    def send_message(self):
+        self.client.force_authenticate(user=self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/chats/send/', {'recipient_id': self.bob.id, 'content': 'oi'})
+        pipeline.flush()
+        self.client.force_authenticate(user=self.bob)
+        return response.data['conversation_id']
+
+    def test_summary_is_updated_incrementally_and_served_from_cache(self):
+        unread.summary(self.bob.id)  # aquece o cache
+        conversation_id = self.send_message()
+        self.send_message()
+
+        with self.assertNumQueries(0):
+            summary = unread.summary(self.bob.id)
+        self.assertEqual(summary, {'notifications': 2, 'messages': 2, 'conversations': {conversation_id: 2}})
+
+        self.client.post(f'/api/chats/conversations/{conversation_id}/read/')
+        response = self.client.post('/api/notifications/mark-read/', {
+            'notification_id': Notification.objects.filter(recipient=self.bob).first().id
+        })
+        self.assertEqual(response.data['unread_count'], 1)
+
+        response = self.client.get('/api/unread-summary/')
+        self.assertEqual(response.data, {'notifications': 1, 'messages': 0, 'conversations': {}})
+
+    def test_summary_is_rebuilt_on_cache_miss(self):
+        conversation_id = self.send_message()
+        cache.clear()
+
+        response = self.client.get('/api/unread-summary/')
+
+        self.assertEqual(response.data['notifications'], 1)
+        self.assertEqual(response.data['conversations'], {conversation_id: 1})
+
+    def test_busy_lock_invalidates_instead_of_losing_updates(self):
+        unread.summary(self.bob.id)  # aquece o cache
+        # Outro processo segurando o lock do dicionário de conversas
+        lock_key = f'{unread.messages_key(self.bob.id)}:lock'
+        cache.add(lock_key, True)
+        with mock.patch.object(unread, 'LOCK_ATTEMPTS', 1):
+            conversation_id = self.send_message()
+
+        self.assertIsNone(cache.get(unread.messages_key(self.bob.id)))
+        cache.delete(lock_key)
+        self.assertEqual(unread.summary(self.bob.id)['conversations'], {conversation_id: 1})
+
+        self.send_message()
+        self.assertIsNone(cache.get(lock_key))
+        self.assertEqual(unread.summary(self.bob.id)['conversations'], {conversation_id: 2})
+
+
+class ConditionalNotificationsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.client.force_authenticate(user=self.bob)
+
+    def test_new_and_read_notifications_invalidate_the_etag(self):
+        etag = self.client.get('/api/notifications/')['ETag']
+
+        with self.assertNumQueries(1):  # a página, com os perfis dos remetentes
+            response = self.client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.following.add(self.bob)
+        pipeline.flush()
+        response = self.client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unread_count'], 1)
+
+        etag = response['ETag']
+        self.client.post('/api/notifications/mark-all-read/')
+        response = self.client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_sender_profile_change_invalidates_the_etag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.following.add(self.bob)
+        pipeline.flush()
+        etag = self.client.get('/api/notifications/')['ETag']
+
+        self.alice.username = 'alice2'
+        self.alice.save()
+
+        response = self.client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['notifications'][0]['sender']['username'], 'alice2')
+
+
+class AsyncNotificationListTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        for i in range(3):
+            Notification.objects.create(recipient=self.bob, sender=self.alice, notification_type='follow', text=f'{i}')
+        self.token = Token.objects.create(user=self.bob)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    async def test_matches_the_sync_listing(self):
+        response = await self.async_client.get(
+            '/api/async/notifications/?page_size=2', headers={'authorization': f'Token {self.token.key}'}
+        )
+        expected = await sync_to_async(self.client.get)('/api/notifications/?page_size=2')
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response['Link'], expected['Link'].replace('/api/', '/api/async/'))
+        self.assertEqual(response.json()['unread_count'], 3)
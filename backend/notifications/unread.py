@@ -0,0 +1,145 @@
+"""
+Contadores de não lidos por usuário guardados no cache.
+
+Guarda o total de notificações não lidas e as mensagens não lidas por
+conversa. Criação de mensagens/notificações e as views de "marcar como lido"
+atualizam os valores incrementalmente; quando a chave não existe (expirou ou
+foi despejada) o valor é reconstruído do banco na próxima leitura.
+
+O dicionário de conversas é lido, alterado e regravado sob um lock no próprio
+cache (``cache.add``), que vale entre processos e servidores; sem conseguir o
+lock, a chave é apagada e reconstruída na leitura seguinte.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.db.models.functions import Coalesce
+
+from chats.models import Message
+from .models import Notification
+
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 50
+LOCK_WAIT = 0.01
+
+
+def _config():
+    return getattr(settings, 'UNREAD_COUNTERS', {})
+
+
+def _cache():
+    return caches[_config().get('CACHE', 'default')]
+
+
+def _timeout():
+    return _config().get('TIMEOUT', 3600)
+
+
+def notifications_key(user_id):
+    return f'unread:notifications:{user_id}'
+
+
+def messages_key(user_id):
+    return f'unread:messages:{user_id}'
+
+
+def rebuild_notifications(user_id):
+    count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+    _cache().set(notifications_key(user_id), count, _timeout())
+    return count
+
+
+def get_notifications(user_id):
+    count = _cache().get(notifications_key(user_id))
+    if count is None:
+        count = rebuild_notifications(user_id)
+    return count
+
+
+async def aget_notifications(user_id):
+    """``get_notifications`` pelo cache e ORM assíncronos"""
+    count = await _cache().aget(notifications_key(user_id))
+    if count is None:
+        count = await Notification.objects.filter(recipient_id=user_id, is_read=False).acount()
+        await _cache().aset(notifications_key(user_id), count, _timeout())
+    return count
+
+
+def incr_notifications(user_id, delta=1):
+    """Soma ``delta`` se a chave existir; sem chave o valor é reconstruído na leitura"""
+    try:
+        if _cache().incr(notifications_key(user_id), delta) < 0:
+            _cache().set(notifications_key(user_id), 0, _timeout())
+    except ValueError:
+        pass
+
+
+def set_notifications(user_id, count):
+    _cache().set(notifications_key(user_id), count, _timeout())
+
+
+def rebuild_messages(user_id):
+    # Não lidas = mensagens de outros depois do ponteiro de leitura do usuário
+    rows = (
+        Message.objects.filter(
+            conversation__read_states__user_id=user_id,
+            id__gt=Coalesce('conversation__read_states__last_read_message_id', 0),
+        )
+        .exclude(sender_id=user_id)
+        .values('conversation_id')
+        .annotate(total=Count('id'))
+        .values_list('conversation_id', 'total')
+    )
+    counts = dict(rows)
+    _cache().set(messages_key(user_id), counts, _timeout())
+    return counts
+
+
+def get_messages(user_id):
+    """Dicionário ``{conversation_id: não lidas}`` do usuário"""
+    counts = _cache().get(messages_key(user_id))
+    if counts is None:
+        counts = rebuild_messages(user_id)
+    return counts
+
+
+def _update_messages(user_id, update):
+    cache = _cache()
+    key = messages_key(user_id)
+    lock_key = f'{key}:lock'
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock_key, True, LOCK_TIMEOUT):
+            break
+        time.sleep(LOCK_WAIT)
+    else:
+        cache.delete(key)
+        return
+    try:
+        counts = cache.get(key)
+        if counts is None:
+            return
+        update(counts)
+        cache.set(key, counts, _timeout())
+    finally:
+        cache.delete(lock_key)
+
+
+def incr_messages(user_id, conversation_id, delta=1):
+    def update(counts):
+        counts[conversation_id] = counts.get(conversation_id, 0) + delta
+    _update_messages(user_id, update)
+
+
+def clear_conversation(user_id, conversation_id):
+    _update_messages(user_id, lambda counts: counts.pop(conversation_id, None))
+
+
+def summary(user_id):
+    conversations = {conversation_id: n for conversation_id, n in get_messages(user_id).items() if n}
+    return {
+        'notifications': get_notifications(user_id),
+        'messages': sum(conversations.values()),
+        'conversations': conversations,
+    }
@@ -4,31 +4,55 @@ from rest_framework.views import APIView
 from django.db.models import Q
 from .models import Notification
 from .serializers import NotificationSerializer
+from . import unread
+from backend import conditional
+from backend.conditional import ConditionalGetMixin
+from images.processing import ready_annotations
+from users.serializers import PROFILE_FINGERPRINT_FIELDS
 
-class NotificationListView(generics.ListAPIView):
+# Fotos do remetente que aparecem na notificação (renditions prontas mudam a resposta)
+SENDER_IMAGE_PATHS = ('sender__profile_picture', 'sender__banner_image')
+
+class NotificationListView(ConditionalGetMixin, generics.ListAPIView):
     """Lista notificações do usuário"""
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    page = None
+
+    def get_etag_parts(self, request, *args, **kwargs):
+        # Perfil do remetente (username, foto...) entra no ETag; a página é
+        # carregada uma vez aqui e reaproveitada por list() quando não há 304
+        annotations = ready_annotations(*SENDER_IMAGE_PATHS)
+        self.page = self.paginate_queryset(self.get_queryset().annotate(**annotations))
+        return [
+            conditional.get_version('notifications', request.user.id),
+            conditional.get_version('viewer', request.user.id),
+            conditional.fingerprint(
+                (
+                    *(getattr(notification.sender, field) for field in PROFILE_FINGERPRINT_FIELDS),
+                    *(getattr(notification, annotation) for annotation in annotations),
+                )
+                for notification in self.page
+            ),
+        ]
     
     def get_queryset(self):
         return Notification.objects.filter(
             recipient=self.request.user
-        ).select_related('sender')[:50]  # Últimas 50 notificações
+        ).select_related('sender')
     
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        if self.page is None:
+            self.page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(self.page, many=True)
         
-        # Contar não lidas
-        unread_count = Notification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        ).count()
+        # Contador de não lidas vem do cache
+        unread_count = unread.get_notifications(request.user.id)
         
         return Response({
             'notifications': serializer.data,
             'unread_count': unread_count
-        })
+        }, headers=self.paginator.get_headers())
 
 
 class MarkAsReadView(APIView):
@@ -40,24 +64,25 @@ class MarkAsReadView(APIView):
         
         if notification_id:
             # Marcar uma específica
-            Notification.objects.filter(
+            updated = Notification.objects.filter(
                 id=notification_id,
-                recipient=request.user
+                recipient=request.user,
+                is_read=False
             ).update(is_read=True)
+            unread.incr_notifications(request.user.id, -updated)
+            if updated:
+                conditional.bump('notifications', [request.user.id])
         else:
             # Marcar todas como lidas
             Notification.objects.filter(
                 recipient=request.user,
                 is_read=False
             ).update(is_read=True)
+            unread.set_notifications(request.user.id, 0)
+            conditional.bump('notifications', [request.user.id])
         
         # Retornar novo contador
-        unread_count = Notification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        ).count()
-        
-        return Response({'unread_count': unread_count})
+        return Response({'unread_count': unread.get_notifications(request.user.id)})
 
 
 class MarkAllAsReadView(APIView):
@@ -69,5 +94,15 @@ class MarkAllAsReadView(APIView):
             recipient=request.user,
             is_read=False
         ).update(is_read=True)
+        unread.set_notifications(request.user.id, 0)
+        conditional.bump('notifications', [request.user.id])
         
-        return Response({'status': 'Todas notificações marcadas como lidas'})
\ No newline at end of file
+        return Response({'status': 'Todas notificações marcadas como lidas'})
+
+
+class UnreadSummaryView(APIView):
+    """Resumo de não lidas (notificações e mensagens) servido só do cache"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        return Response(unread.summary(request.user.id))
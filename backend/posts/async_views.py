@@ -0,0 +1,58 @@
+"""
+Listagem de posts servida pelo ORM assíncrono (``/api/async/posts/``).
+
+Mesmos parâmetros (``feed``, ``user``, ``tag``), paginação e formato da
+listagem de ``PostListCreateAPI``; o estado de quem vê e as imagens da
+página são consultados juntos antes da serialização.
+"""
+import asyncio
+
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import NotFound
+
+from backend import aio
+from backend.database import use_replica
+from backend.pagination import KeysetPagination
+from images import processing as images
+from . import ingest, timeline
+from .models import Post
+from .queries import aresolve_viewer_state, feed_queryset
+from .serializers import PostSerializer
+from .views import PostListCreateAPI
+
+User = get_user_model()
+
+
+@use_replica
+async def post_list(request):
+    request = await aio.authorized_request(request, PostListCreateAPI)
+    if request is None:
+        return aio.unauthorized()
+
+    queryset = Post.objects.all()
+    username = request.query_params.get('user')
+    if username:
+        user = await User.objects.filter(username=username).afirst()
+        if user is None:
+            return aio.json_response([])
+        queryset = queryset.filter(user=user)
+    elif request.query_params.get('feed'):
+        queryset = queryset.filter(id__in=await timeline.aget_feed_post_ids(request.user))
+
+    tag = request.query_params.get('tag')
+    if tag:
+        queryset = queryset.filter(hashtag_links__hashtag__name=ingest.normalize_tag(tag))
+
+    paginator = KeysetPagination()
+    try:
+        posts = await paginator.apaginate_queryset(feed_queryset(queryset), request)
+    except NotFound as error:
+        return aio.not_found(error.detail)
+
+    context = {'request': request}
+    context['viewer_state'], _ = await asyncio.gather(
+        aresolve_viewer_state(request.user, posts),
+        images.aresolve_into(context, posts + [post.user for post in posts]),
+    )
+    data = PostSerializer(posts, many=True, context=context).data
+    return aio.json_response(data, headers=paginator.get_headers())
@@ -0,0 +1,54 @@
+"""
+Contadores desnormalizados de ``Post`` e ``User``.
+
+Os contadores são ajustados com expressões ``F()`` (sem ler a linha para o
+Python) pelos sinais de curtida, comentário, retweet, follow e criação/remoção
+de posts. ``reconcile`` recalcula tudo em lote para corrigir desvios.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from backend import fragments
+from interactions.models import Comment, Like
+from .models import Post
+
+User = get_user_model()
+
+
+def adjust(model, ids, **deltas):
+    """Soma ``deltas`` aos contadores das linhas ``ids`` sem deixá-los negativos"""
+    if isinstance(ids, int):
+        ids = [ids]
+    model.objects.filter(pk__in=ids).update(
+        **{field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()}
+    )
+    fragments.invalidate(model, ids)
+
+
+def count_subquery(model, field):
+    """``COUNT(*)`` correlacionado de ``model`` agrupado por ``field``"""
+    rows = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def reconcile():
+    """Recalcula todos os contadores; devolve o número de linhas atualizadas"""
+    follows = User.followers.through
+    posts = Post.objects.update(
+        likes_count=count_subquery(Like, 'post'),
+        comments_count=count_subquery(Comment, 'post'),
+        retweets_count=count_subquery(Post.retweets.through, 'post'),
+    )
+    users = User.objects.update(
+        followers_count=count_subquery(follows, 'from_user'),
+        following_count=count_subquery(follows, 'to_user'),
+        posts_count=count_subquery(Post, 'user'),
+    )
+    return posts, users
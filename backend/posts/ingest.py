@@ -0,0 +1,150 @@
+"""
+Estágio de ingestão de posts: extrai ``#hashtags`` e ``@menções`` do conteúdo.
+
+Roda na criação e na edição do post (via sinal) e sincroniza as tabelas
+``PostHashtag`` e ``Mention`` só com a diferença em relação ao que já estava
+gravado. Cada hashtag nova soma 1 no bucket de tendências da hora corrente
+(``HashtagBucket``); ao sair do post o mesmo bucket é decrementado. As
+tendências são a soma dos buckets dentro da janela, sem varrer posts.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from notifications import pipeline
+from .models import Hashtag, HashtagBucket, Mention, Post, PostHashtag
+
+User = get_user_model()
+
+HASHTAG_RE = re.compile(r'(?<![\w#])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]{1,150})')
+
+
+def _config():
+    return getattr(settings, 'TRENDS', {})
+
+
+def bucket_seconds():
+    return _config().get('BUCKET_SECONDS', 3600)
+
+
+def extract_hashtags(text):
+    """Hashtags em minúsculas, na ordem em que aparecem e sem repetição"""
+    return list(dict.fromkeys(tag.lower() for tag in HASHTAG_RE.findall(text or '')))
+
+
+def extract_mentions(text):
+    # Pontuação no fim (ex.: "@ana.") não faz parte do username
+    usernames = (username.rstrip('.+-') for username in MENTION_RE.findall(text or ''))
+    return list(dict.fromkeys(username for username in usernames if username))
+
+
+def bucket_start(moment):
+    size = bucket_seconds()
+    return moment - timedelta(seconds=moment.timestamp() % size)
+
+
+def normalize_tag(tag):
+    return tag.strip().lstrip('#').lower()
+
+
+def ingest_post(post):
+    """Sincroniza hashtags e menções de ``post`` com o conteúdo atual"""
+    _sync_hashtags(post, extract_hashtags(post.content))
+    _sync_mentions(post, extract_mentions(post.content))
+
+
+def remove_post(post):
+    """Desconta as hashtags de um post que está sendo apagado"""
+    for link in PostHashtag.objects.filter(post=post):
+        _adjust_buckets([link.hashtag_id], link.created_at, -1)
+
+
+def _sync_hashtags(post, names):
+    current = dict(PostHashtag.objects.filter(post=post).values_list('hashtag__name', 'id'))
+    removed = [link_id for name, link_id in current.items() if name not in names]
+    added = [name for name in names if name not in current]
+
+    if removed:
+        for link in PostHashtag.objects.filter(id__in=removed):
+            _adjust_buckets([link.hashtag_id], link.created_at, -1)
+        PostHashtag.objects.filter(id__in=removed).delete()
+
+    if added:
+        Hashtag.objects.bulk_create([Hashtag(name=name) for name in added], ignore_conflicts=True)
+        hashtag_ids = list(Hashtag.objects.filter(name__in=added).values_list('id', flat=True))
+        PostHashtag.objects.bulk_create(
+            [PostHashtag(post=post, hashtag_id=hashtag_id) for hashtag_id in hashtag_ids],
+            ignore_conflicts=True,
+        )
+        _adjust_buckets(hashtag_ids, timezone.now(), 1)
+
+
+def _adjust_buckets(hashtag_ids, moment, delta):
+    start = bucket_start(moment)
+    if delta > 0:
+        # Garante as linhas sem corrida e incrementa tudo numa única consulta
+        HashtagBucket.objects.bulk_create(
+            [HashtagBucket(hashtag_id=hashtag_id, bucket_start=start) for hashtag_id in hashtag_ids],
+            ignore_conflicts=True,
+        )
+    HashtagBucket.objects.filter(hashtag_id__in=hashtag_ids, bucket_start=start).update(
+        count=Greatest(F('count') + delta, 0)
+    )
+
+
+def _sync_mentions(post, usernames):
+    users = list(User.objects.filter(username__in=usernames).exclude(pk=post.user_id))
+    current = set(Mention.objects.filter(post=post).values_list('user_id', flat=True))
+    wanted = {user.id for user in users}
+
+    if current - wanted:
+        Mention.objects.filter(post=post, user_id__in=current - wanted).delete()
+
+    new_users = [user for user in users if user.id not in current]
+    if not new_users:
+        return
+    Mention.objects.bulk_create(
+        [Mention(post=post, user=user) for user in new_users], ignore_conflicts=True
+    )
+    pipeline.notify_many(
+        recipients=new_users,
+        sender=post.user,
+        notification_type='mention',
+        content_type_id=ContentType.objects.get_for_model(Post).id,
+        object_id=post.id,
+        text=f'{post.user.username} mencionou você: {post.content[:50]}',
+    )
+
+
+def trending(hours=None, limit=10):
+    """Hashtags mais usadas na janela deslizante, somando só os buckets"""
+    hours = hours or _config().get('WINDOW_HOURS', 24)
+    cache_key = f'trends:{hours}:{limit}'
+    trends = cache.get(cache_key)
+    if trends is None:
+        since = bucket_start(timezone.now() - timedelta(hours=hours))
+        trends = list(
+            HashtagBucket.objects.filter(bucket_start__gte=since, count__gt=0)
+            .values('hashtag__name')
+            .annotate(total=Sum('count'))
+            .order_by('-total', 'hashtag__name')[:limit]
+        )
+        trends = [{'hashtag': row['hashtag__name'], 'count': row['total']} for row in trends]
+        cache.set(cache_key, trends, _config().get('CACHE_TIMEOUT', 60))
+    return trends
+
+
+def prune_buckets(older_than_hours):
+    """Apaga buckets fora de qualquer janela consultada"""
+    deleted, _ = HashtagBucket.objects.filter(
+        bucket_start__lt=timezone.now() - timedelta(hours=older_than_hours)
+    ).delete()
+    return deleted
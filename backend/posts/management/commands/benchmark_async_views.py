@@ -0,0 +1,103 @@
+import asyncio
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+# (view síncrona, view assíncrona equivalente)
+ENDPOINTS = {
+    'feed': ('/api/posts/?feed=true', '/api/async/posts/?feed=true'),
+    'conversations': ('/api/chats/conversations/', '/api/async/chats/conversations/'),
+    'notifications': ('/api/notifications/', '/api/async/notifications/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Gerador de carga local: compara req/s e p99 das listagens síncronas (WSGI, uma thread por '
+        'requisição) com as de /api/async/ (ASGI, um event loop) no banco configurado'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Usuário autenticado nas requisições')
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), action='append')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    # Os clientes de teste sempre se apresentam como "testserver"
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'Usuário {options["username"]} não encontrado')
+        token, _ = Token.objects.get_or_create(user=user)
+        headers = {'authorization': f'Token {token.key}'}
+
+        for name in options['endpoint'] or sorted(ENDPOINTS):
+            sync_path, async_path = ENDPOINTS[name]
+            # As views síncronas ainda imprimem logs de depuração
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync_result = self.run_sync(sync_path, headers, options)
+            async_result = asyncio.run(self.run_async(async_path, headers, options))
+            for label, (elapsed, latencies) in (('wsgi', sync_result), ('asgi', async_result)):
+                self.report(f'{name} {label}', elapsed, latencies)
+
+    def run_sync(self, path, headers, options):
+        def worker(count):
+            client = Client(headers=headers)
+            latencies = []
+            for _ in range(count):
+                started = time.perf_counter()
+                response = client.get(path)
+                latencies.append(time.perf_counter() - started)
+                self.ensure_ok(response, path)
+            connection.close()
+            return latencies
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = pool.map(worker, self.split(options))
+            latencies = [latency for result in results for latency in result]
+        return time.perf_counter() - started, latencies
+
+    async def run_async(self, path, headers, options):
+        # No Django 4.2 os headers do construtor do AsyncClient não chegam ao escopo ASGI
+        client = AsyncClient()
+
+        async def worker(count):
+            latencies = []
+            for _ in range(count):
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                self.ensure_ok(response, path)
+            return latencies
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(worker(count) for count in self.split(options)))
+        return time.perf_counter() - started, [latency for result in results for latency in result]
+
+    def split(self, options):
+        """Requisições por cliente simultâneo"""
+        base, extra = divmod(options['requests'], options['concurrency'])
+        return [base + (1 if i < extra else 0) for i in range(options['concurrency'])]
+
+    def ensure_ok(self, response, path):
+        if response.status_code != 200:
+            raise CommandError(f'{path} respondeu {response.status_code}')
+
+    def report(self, label, elapsed, latencies):
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f'{label}: {len(latencies) / elapsed:.0f} req/s, p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms'
+        )
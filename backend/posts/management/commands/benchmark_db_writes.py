@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.test import override_settings
+
+TABLE = 'benchmark_db_writes'
+
+# Padrões do Django/SQLite antes de backend.database
+BASELINE = {
+    'PRAGMAS': {'journal_mode': 'delete', 'synchronous': 'full', 'busy_timeout': 5000, 'mmap_size': 0},
+    'TRANSACTION_MODE': 'DEFERRED',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Escritores simultâneos no banco configurado (ler e depois gravar na mesma transação, como curtidas, '
+        'mensagens e notificações); no SQLite compara os padrões antigos com WAL + BEGIN IMMEDIATE'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--transactions', type=int, default=200, help='Transações por thread')
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE {TABLE} (worker integer NOT NULL, seq integer NOT NULL)')
+        # Trocar o journal_mode exige que nenhuma outra conexão esteja aberta
+        connection.close()
+        try:
+            if connection.vendor == 'sqlite':
+                self.report('padrão', self.run_with(BASELINE, options))
+                self.report('ajustado', self.run(options))
+            else:
+                self.report(connection.vendor, self.run(options))
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE {TABLE}')
+
+    def run_with(self, profile, options):
+        # As threads abrem conexões novas com o dicionário compartilhado do alias
+        database_options = connections.settings['default']['OPTIONS']
+        previous = database_options.get('transaction_mode')
+        database_options['transaction_mode'] = profile['TRANSACTION_MODE']
+        try:
+            with override_settings(SQLITE_PRAGMAS=profile['PRAGMAS']):
+                return self.run(options)
+        finally:
+            database_options['transaction_mode'] = previous
+
+    def run(self, options):
+        def worker(number):
+            latencies, errors = [], 0
+            try:
+                for seq in range(options['transactions']):
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic(), connection.cursor() as cursor:
+                            cursor.execute(f'SELECT COUNT(*) FROM {TABLE} WHERE worker = %s', [number])
+                            cursor.execute(f'INSERT INTO {TABLE} (worker, seq) VALUES (%s, %s)', [number, seq])
+                    except OperationalError:
+                        errors += 1
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            return latencies, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['threads']) as pool:
+            results = list(pool.map(worker, range(options['threads'])))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(latency for result, _ in results for latency in result)
+        return elapsed, latencies, sum(errors for _, errors in results)
+
+    def report(self, label, result):
+        elapsed, latencies, errors = result
+        committed = len(latencies) - errors
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f'{label}: {committed / elapsed:.0f} commits/s, {errors} erro(s) (database is locked), '
+            f'p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms'
+        )
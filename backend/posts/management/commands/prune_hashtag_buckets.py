@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import ingest
+
+
+class Command(BaseCommand):
+    help = 'Apaga buckets de tendências mais antigos que a janela informada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24 * 7, help='Idade máxima dos buckets (padrão: 7 dias)')
+
+    def handle(self, *args, **options):
+        deleted = ingest.prune_buckets(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} bucket(s) removido(s)'))
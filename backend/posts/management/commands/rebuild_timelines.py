@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói as timelines materializadas (todas ou dos usuários informados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Usuários a reconstruir (padrão: todos)')
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        total = 0
+        for user in users.iterator():
+            timeline.rebuild(user)
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{total} timeline(s) reconstruída(s)'))
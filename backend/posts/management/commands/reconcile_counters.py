@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Recalcula em lote os contadores desnormalizados de posts e usuários'
+
+    def handle(self, *args, **options):
+        posts, users = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Contadores recalculados: {posts} post(s), {users} usuário(s)'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Corta as timelines materializadas que passaram de TIMELINE_MAX_LENGTH (rodar periodicamente)'
+
+    def handle(self, *args, **options):
+        trimmed = timeline.trim_oversized()
+        self.stdout.write(self.style.SUCCESS(f'{trimmed} timeline(s) aparada(s)'))
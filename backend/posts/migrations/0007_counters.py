@@ -0,0 +1,63 @@
+# Generated by Django 4.2 on 2026-10-18 18:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    rows = (
+        model.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    User = apps.get_model("users", "User")
+    Like = apps.get_model("interactions", "Like")
+    Comment = apps.get_model("interactions", "Comment")
+    follows = User.followers.through
+
+    Post.objects.update(
+        likes_count=count_subquery(Like, "post"),
+        comments_count=count_subquery(Comment, "post"),
+        retweets_count=count_subquery(Post.retweets.through, "post"),
+    )
+    User.objects.update(
+        followers_count=count_subquery(follows, "from_user"),
+        following_count=count_subquery(follows, "to_user"),
+        posts_count=count_subquery(Post, "user"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0006_keyset_indexes"),
+        ("users", "0006_counters"),
+        ("interactions", "0004_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="retweets_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
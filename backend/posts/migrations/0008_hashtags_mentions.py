@@ -0,0 +1,208 @@
+# Generated by Django 4.2 on 2026-10-18 19:08
+
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+HASHTAG_RE = re.compile(r"(?<![\w#])#(\w{1,100})")
+MENTION_RE = re.compile(r"(?<![\w@])@([\w.+-]{1,150})")
+
+
+def populate_hashtags_and_mentions(apps, schema_editor):
+    # Posts existentes: sem notificações, buckets pela data de criação do post
+    Post = apps.get_model("posts", "Post")
+    User = apps.get_model("users", "User")
+    Hashtag = apps.get_model("posts", "Hashtag")
+    PostHashtag = apps.get_model("posts", "PostHashtag")
+    Mention = apps.get_model("posts", "Mention")
+    HashtagBucket = apps.get_model("posts", "HashtagBucket")
+    size = getattr(settings, "TRENDS", {}).get("BUCKET_SECONDS", 3600)
+
+    links, mentions, buckets = [], [], Counter()
+    usernames = dict(User.objects.values_list("username", "id"))
+    for post_id, user_id, content, created_at in Post.objects.values_list(
+        "id", "user_id", "content", "created_at"
+    ).iterator():
+        names = dict.fromkeys(tag.lower() for tag in HASHTAG_RE.findall(content))
+        start = created_at - timedelta(seconds=created_at.timestamp() % size)
+        for name in names:
+            hashtag, _ = Hashtag.objects.get_or_create(name=name)
+            links.append(PostHashtag(post_id=post_id, hashtag=hashtag))
+            buckets[(hashtag.id, start)] += 1
+        for username in dict.fromkeys(
+            m.rstrip(".+-") for m in MENTION_RE.findall(content)
+        ):
+            mentioned_id = usernames.get(username)
+            if mentioned_id and mentioned_id != user_id:
+                mentions.append(Mention(post_id=post_id, user_id=mentioned_id))
+
+    PostHashtag.objects.bulk_create(links, batch_size=1000)
+    # auto_now_add grava "agora"; o bucket contado foi o da criação do post
+    PostHashtag.objects.update(
+        created_at=Subquery(
+            Post.objects.filter(pk=OuterRef("post_id")).values("created_at")[:1]
+        )
+    )
+    Mention.objects.bulk_create(mentions, batch_size=1000)
+    HashtagBucket.objects.bulk_create(
+        [
+            HashtagBucket(hashtag_id=hashtag_id, bucket_start=start, count=count)
+            for (hashtag_id, start), count in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("posts", "0007_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Hashtag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PostHashtag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "hashtag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="post_links",
+                        to="posts.hashtag",
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hashtag_links",
+                        to="posts.post",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("hashtag", "post")},
+            },
+        ),
+        migrations.CreateModel(
+            name="Mention",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="mention_links",
+                        to="posts.post",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="mention_links",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "post")},
+            },
+        ),
+        migrations.CreateModel(
+            name="HashtagBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket_start", models.DateTimeField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "hashtag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="buckets",
+                        to="posts.hashtag",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="hashtags",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="posts",
+                through="posts.PostHashtag",
+                to="posts.hashtag",
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="mentions",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="mentioned_in",
+                through="posts.Mention",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="hashtagbucket",
+            index=models.Index(
+                fields=["bucket_start"], name="posts_hasht_bucket__c5644f_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="hashtagbucket",
+            unique_together={("hashtag", "bucket_start")},
+        ),
+        migrations.RunPython(populate_hashtags_and_mentions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 19:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interactions", "0005_retweet_bookmark"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("posts", "0008_hashtags_mentions"),
+    ]
+
+    # Não dá para incluir ``through`` num M2M existente: a tabela automática sai
+    # (os dados já foram copiados em interactions.0005) e o campo volta apontando
+    # para ``interactions.Retweet``
+    operations = [
+        migrations.RemoveField(
+            model_name="post",
+            name="retweets",
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="retweets",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="retweeted_posts",
+                through="interactions.Retweet",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -11,27 +11,98 @@ class Post(models.Model):
     
     retweets = models.ManyToManyField(
         settings.AUTH_USER_MODEL,
+        through='interactions.Retweet',
         related_name='retweeted_posts',
         blank=True
     )
+    # Preenchidos por posts.ingest a partir do conteúdo
+    hashtags = models.ManyToManyField('Hashtag', through='PostHashtag', related_name='posts', blank=True)
+    mentions = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, through='Mention', related_name='mentioned_in', blank=True
+    )
+    
+    # Contadores desnormalizados (mantidos por posts.counters)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    retweets_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f'{self.user.username}: {self.content[:50]}'
     
-    @property
-    def likes_count(self):
-        return self.likes.count()
-    
-    @property
-    def comments_count(self):
-        return self.comments.count()
-    
-    @property
-    def retweets_count(self):
-        return self.retweets.count()
-    
     def is_retweeted_by(self, user):
-        return self.retweets.filter(id=user.id).exists()
\ No newline at end of file
+        return self.retweets.filter(id=user.id).exists()
+
+
+class TimelineEntry(models.Model):
+    """Entrada materializada da timeline (caixa de entrada) de um usuário"""
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['owner', 'post']
+        indexes = [
+            models.Index(fields=['owner', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.owner_id} <- {self.post_id}'
+
+
+
+class Hashtag(models.Model):
+    """Hashtag normalizada (minúsculas, sem o ``#``)"""
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostHashtag(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='hashtag_links')
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='post_links')
+    # Quando a hashtag entrou no post (define o bucket de tendências contado)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['hashtag', 'post']
+
+    def __str__(self):
+        return f'{self.post_id} #{self.hashtag_id}'
+
+
+class Mention(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='mention_links')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mention_links')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'post']
+
+    def __str__(self):
+        return f'{self.post_id} @{self.user_id}'
+
+
+class HashtagBucket(models.Model):
+    """Uso de uma hashtag dentro de uma janela de tempo (base das tendências)"""
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='buckets')
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['hashtag', 'bucket_start']
+        indexes = [
+            models.Index(fields=['bucket_start']),
+        ]
+
+    def __str__(self):
+        return f'#{self.hashtag_id} @ {self.bucket_start:%Y-%m-%d %H:%M}: {self.count}'
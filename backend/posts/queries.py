@@ -0,0 +1,88 @@
+"""
+Camada de consulta do feed.
+
+Os contadores já vêm desnormalizados nas linhas de ``Post`` e ``User``; aqui
+só resolvemos o estado do usuário logado (curtidas, retweets, favoritos e
+quem ele segue) para a página inteira com uma consulta por relação, evitando N+1 no
+``PostSerializer``.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from backend import conditional
+from images.processing import ready_annotations
+from interactions.models import Bookmark, Like, Retweet
+from users import graph
+from users.serializers import PROFILE_FINGERPRINT_FIELDS
+
+# Colunas de Post exibidas pelo PostSerializer (impressão digital dos ETags)
+POST_FINGERPRINT_FIELDS = (
+    'id', 'content', 'image', 'location', 'updated_at',
+    'likes_count', 'comments_count', 'retweets_count',
+)
+
+
+def feed_queryset(queryset):
+    """Posts com o autor carregado na mesma consulta"""
+    return queryset.select_related('user')
+
+
+# Se a imagem do post e as do autor já têm renditions (mudam a resposta)
+READY_PATHS = ('image', 'user__profile_picture', 'user__banner_image')
+
+
+def fingerprint_annotations():
+    return ready_annotations(*READY_PATHS)
+
+
+def page_fingerprint(posts):
+    """Impressão digital de uma página já carregada (anotada com ``fingerprint_annotations``)"""
+    annotations = list(fingerprint_annotations())
+    return conditional.fingerprint(
+        (
+            *(getattr(post, field) for field in POST_FINGERPRINT_FIELDS),
+            *(getattr(post.user, field) for field in PROFILE_FINGERPRINT_FIELDS),
+            *(getattr(post, annotation) for annotation in annotations),
+        )
+        for post in posts
+    )
+
+
+def resolve_viewer_state(viewer, posts):
+    """Curtidas, retweets e follows do usuário logado para uma página de posts"""
+    if not viewer or not viewer.is_authenticated or not posts:
+        return None
+
+    post_ids = [post.id for post in posts]
+    return {
+        'liked': set(
+            Like.objects.filter(user=viewer, post_id__in=post_ids).values_list('post_id', flat=True)
+        ),
+        'retweeted': set(
+            Retweet.objects.filter(user=viewer, post_id__in=post_ids).values_list('post_id', flat=True)
+        ),
+        'bookmarked': set(
+            Bookmark.objects.filter(user=viewer, post_id__in=post_ids).values_list('post_id', flat=True)
+        ),
+        'following': graph.following_ids(viewer),
+    }
+
+
+async def _apost_ids(queryset):
+    return {post_id async for post_id in queryset.values_list('post_id', flat=True)}
+
+
+async def aresolve_viewer_state(viewer, posts):
+    """``resolve_viewer_state`` pelo ORM assíncrono, com as relações consultadas juntas"""
+    if not viewer or not viewer.is_authenticated or not posts:
+        return None
+
+    post_ids = [post.id for post in posts]
+    liked, retweeted, bookmarked, following = await asyncio.gather(
+        _apost_ids(Like.objects.filter(user=viewer, post_id__in=post_ids)),
+        _apost_ids(Retweet.objects.filter(user=viewer, post_id__in=post_ids)),
+        _apost_ids(Bookmark.objects.filter(user=viewer, post_id__in=post_ids)),
+        sync_to_async(graph.following_ids)(viewer),
+    )
+    return {'liked': liked, 'retweeted': retweeted, 'bookmarked': bookmarked, 'following': following}
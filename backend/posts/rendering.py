@@ -0,0 +1,57 @@
+"""
+Representação de posts em duas camadas: fragmento compartilhado do
+``PostSerializer`` sem o autor (``backend.fragments``), o autor vindo de
+``users.rendering`` e ``is_liked``/``is_retweeted``/``is_bookmarked`` de
+quem está vendo.
+
+O autor fica num fragmento próprio para que mudanças no perfil não
+precisem invalidar todos os posts dele.
+"""
+from backend import fragments
+from users.rendering import render_users
+from .models import Post
+from .queries import resolve_viewer_state
+from .serializers import PostSerializer
+
+VIEWER_FIELDS = ('is_liked', 'is_retweeted', 'is_bookmarked')
+EMPTY_VIEWER_STATE = {
+    'liked': frozenset(), 'retweeted': frozenset(), 'bookmarked': frozenset(), 'following': frozenset(),
+}
+
+
+def render_fragments(posts, context):
+    posts = {post.id: post for post in posts}
+    variant = fragments.variant_for(context.get('request'))
+    found = fragments.get_many(Post, posts, variant)
+    missing = [post for post_id, post in posts.items() if post_id not in found]
+    if missing:
+        context = {**context, 'viewer_state': EMPTY_VIEWER_STATE}
+        fresh = {}
+        for item in PostSerializer(missing, many=True, context=context).data:
+            for field in VIEWER_FIELDS + ('user',):
+                item.pop(field)
+            fresh[item['id']] = dict(item)
+        fragments.set_many(Post, fresh, variant)
+        found.update(fresh)
+    return found
+
+
+def render_posts(posts, context):
+    """Lista de dicts no formato do ``PostSerializer``"""
+    posts = list(posts)
+    found = render_fragments(posts, context)
+    request = context.get('request')
+    state = resolve_viewer_state(request.user if request is not None else None, posts) or EMPTY_VIEWER_STATE
+    authors = {
+        author['id']: author
+        for author in render_users({post.user for post in posts}, context, following=state['following'])
+    }
+
+    rendered = []
+    for post in posts:
+        item = {**found[post.id], 'user': authors[post.user_id]}
+        item['is_liked'] = post.id in state['liked']
+        item['is_retweeted'] = post.id in state['retweeted']
+        item['is_bookmarked'] = post.id in state['bookmarked']
+        rendered.append({field: item[field] for field in PostSerializer.Meta.fields})
+    return rendered
@@ -1,6 +1,22 @@
 from rest_framework import serializers
 from .models import Post
+from .queries import resolve_viewer_state
 from users.serializers import UserSerializer
+from images import processing as images
+from images.serializers import RenditionsField
+
+
+class PostListSerializer(serializers.ListSerializer):
+    """Resolve o estado do usuário logado e as imagens uma única vez para a página toda"""
+
+    def to_representation(self, data):
+        posts = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        if request is not None and 'viewer_state' not in self.context:
+            self.context['viewer_state'] = resolve_viewer_state(request.user, posts)
+        images.resolve_into(self.context, posts + [post.user for post in posts])
+        return super().to_representation(posts)
+
 
 class PostSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -9,25 +25,44 @@ class PostSerializer(serializers.ModelSerializer):
     retweets_count = serializers.IntegerField(read_only=True) 
     is_liked = serializers.SerializerMethodField()
     is_retweeted = serializers.SerializerMethodField() 
+    is_bookmarked = serializers.SerializerMethodField()
+    image_renditions = RenditionsField(source='image')
     
     class Meta:
         model = Post
-        fields = ['id', 'user', 'content', 'image', 'location', 'created_at', 
-                 'likes_count', 'comments_count', 'retweets_count', 'is_liked', 'is_retweeted']
+        fields = ['id', 'user', 'content', 'image', 'image_renditions', 'location', 'created_at', 
+                 'likes_count', 'comments_count', 'retweets_count', 'is_liked', 'is_retweeted',
+                 'is_bookmarked']
         read_only_fields = ['user', 'created_at']
+        list_serializer_class = PostListSerializer
     
     def get_is_liked(self, obj):
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state['liked']
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.likes.filter(user=request.user).exists()
         return False
     
     def get_is_retweeted(self, obj):
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state['retweeted']
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.retweets.filter(id=request.user.id).exists()
         return False
 
+    def get_is_bookmarked(self, obj):
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state['bookmarked']
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            return obj.bookmarks.filter(user=request.user).exists()
+        return False
+
 class PostCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
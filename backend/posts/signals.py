@@ -1,29 +1,46 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from django.contrib.contenttypes.models import ContentType
-from interactions.models import Like, Comment  
-from notifications.models import Notification
-
-@receiver(post_save, sender=Like)
-def create_like_notification(sender, instance, created, **kwargs):
-    if created and instance.user != instance.post.user:
-        Notification.objects.create(
-            recipient=instance.post.user,
-            sender=instance.user,
-            notification_type='like',
-            content_type=ContentType.objects.get_for_model(instance.post),
-            object_id=instance.post.id,
-            text=f"{instance.user.username} curtiu seu post"
-        )
-
-@receiver(post_save, sender=Comment)
-def create_comment_notification(sender, instance, created, **kwargs):
-    if created and instance.user != instance.post.user:
-        Notification.objects.create(
-            recipient=instance.post.user,
-            sender=instance.user,
-            notification_type='comment',
-            content_type=ContentType.objects.get_for_model(instance.post),
-            object_id=instance.post.id,
-            text=f"{instance.user.username} comentou: {instance.content[:50]}"
-        )
\ No newline at end of file
+from django.contrib.auth import get_user_model
+from .models import Post
+from backend import fragments
+from . import counters, ingest, timeline
+
+User = get_user_model()
+
+# Curtidas, retweets e comentários: ver interactions.services/interactions.signals
+
+
+@receiver(post_save, sender=Post)
+def fanout_new_post(sender, instance, created, **kwargs):
+    """Empurra o post novo para as timelines do autor e dos seguidores"""
+    if created:
+        timeline.fanout_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def ingest_post_content(sender, instance, created, update_fields=None, **kwargs):
+    """Extrai hashtags e menções na criação e quando o conteúdo muda"""
+    if update_fields is None or 'content' in update_fields:
+        ingest.ingest_post(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def discount_post_hashtags(sender, instance, **kwargs):
+    ingest.remove_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def increment_posts_count(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust(User, instance.user_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_posts_count(sender, instance, **kwargs):
+    counters.adjust(User, instance.user_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_fragment(sender, instance, **kwargs):
+    fragments.invalidate(Post, instance.id)
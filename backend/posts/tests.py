@@ -1,7 +1,29 @@
-from rest_framework import status
+import base64
+import gzip
+import json
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import permissions, status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 from users.models import User
-from posts.models import Post
+from backend import metrics
+from posts import timeline
+from posts.models import Post, TimelineEntry
+from posts.serializers import PostSerializer
+from posts.views import PostListCreateAPI
+from users import graph
+from interactions.models import Like
+from notifications import pipeline
+from notifications.models import Notification
 
 
 class FeedPostsTests(APITestCase):
@@ -27,3 +49,410 @@ class FeedPostsTests(APITestCase):
         self.assertIn(self.own_post.id, returned_ids)
         self.assertIn(self.followed_post.id, returned_ids)
         self.assertNotIn(self.other_post.id, returned_ids)
+
+
+
+class ConditionalFeedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.author = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.user.following.add(self.author)
+        self.post = Post.objects.create(user=self.author, content='post do bob ' + 'x' * 300)
+        self.client.force_authenticate(user=self.user)
+
+    def revalidate(self, etag):
+        return self.client.get('/api/posts/?feed=true', HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_feed_is_answered_with_304(self):
+        etag = self.client.get('/api/posts/?feed=true')['ETag']
+
+        with self.assertNumQueries(3):  # timeline, celebridades seguidas e impressão digital da página
+            response = self.revalidate(etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_full_response_builds_the_page_once(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/posts/?feed=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertEqual(sum('"posts_timelineentry"' in sql for sql in queries), 1)
+        self.assertEqual(sum(sql.startswith('SELECT "posts_post"."id"') for sql in queries), 1)
+
+    def test_like_and_counter_changes_invalidate_the_etag(self):
+        etag = self.client.get('/api/posts/?feed=true')['ETag']
+
+        Like.objects.create(user=self.user, post=self.post)
+        response = self.revalidate(etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data[0]['is_liked'])
+        etag = response['ETag']
+
+        # Curtida de outra pessoa: só o contador do post muda
+        Like.objects.create(user=self.author, post=self.post)
+        response = self.revalidate(etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['likes_count'], 2)
+
+    def test_etag_depends_on_the_viewer(self):
+        etag = self.client.get('/api/posts/?feed=true')['ETag']
+        self.client.force_authenticate(user=self.author)
+
+        self.assertEqual(self.revalidate(etag).status_code, status.HTTP_200_OK)
+
+    def test_large_responses_are_compressed(self):
+        response = self.client.get('/api/posts/?feed=true', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content)[:1], b'[')
+
+
+class TimelineTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.author = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.post = Post.objects.create(user=self.author, content='post antigo')
+        self.client.force_authenticate(user=self.user)
+
+    def feed_ids(self):
+        response = self.client.get('/api/posts/?feed=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {item['id'] for item in response.data}
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        self.assertNotIn(self.post.id, self.feed_ids())
+
+        self.user.following.add(self.author)
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.user, post=self.post).exists())
+        self.assertIn(self.post.id, self.feed_ids())
+
+        self.user.following.remove(self.author)
+        self.assertNotIn(self.post.id, self.feed_ids())
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=1)
+    def test_celebrity_posts_are_pulled_on_read(self):
+        self.user.following.add(self.author)
+        new_post = Post.objects.create(user=self.author, content='post novo')
+
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user, post=new_post).exists())
+        self.assertIn(new_post.id, self.feed_ids())
+
+    @override_settings(TIMELINE_MAX_LENGTH=3)
+    def test_trim_job_caps_stored_timelines(self):
+        self.user.following.add(self.author)
+        for i in range(5):
+            Post.objects.create(user=self.author, content=f'post {i}')
+
+        call_command('trim_timelines', stdout=StringIO())
+
+        for owner in (self.user, self.author):
+            self.assertEqual(TimelineEntry.objects.filter(owner=owner).count(), 3)
+
+    @override_settings(TIMELINE_MAX_LENGTH=2)
+    def test_trim_keeps_entries_sharing_the_cutoff_time(self):
+        posts = [Post.objects.create(user=self.user, content=f'post {i}') for i in range(3)]
+        TimelineEntry.objects.filter(owner=self.user).update(created_at=posts[0].created_at)
+
+        timeline.trim(self.user)
+
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(owner=self.user).values_list('post_id', flat=True)),
+            {posts[1].id, posts[2].id},
+        )
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=2)
+    def test_posts_written_as_celebrity_survive_the_demotion(self):
+        fan = User.objects.create_user(username='carol', email='carol@example.com', password='pass12345')
+        self.user.following.add(self.author)
+        fan.following.add(self.author)
+        celebrity_post = Post.objects.create(user=self.author, content='post famoso')
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user, post=celebrity_post).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fan.following.remove(self.author)
+
+        self.assertIn(celebrity_post.id, self.feed_ids())
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.user, post=celebrity_post).exists())
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.posts = [Post.objects.create(user=self.user, content=f'post {i}') for i in range(5)]
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_pages_follow_next_link_without_gaps(self):
+        response = self.get('/api/posts/?page_size=2')
+        seen = [item['id'] for item in response.data]
+        while 'rel="next"' in response.get('Link', ''):
+            next_url = response['Link'].split(';')[0].strip('<>')
+            response = self.get(next_url)
+            seen += [item['id'] for item in response.data]
+
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+
+    def test_since_cursor_returns_only_new_posts(self):
+        response = self.get('/api/posts/?page_size=2')
+        prev_url = [link for link in response['Link'].split(', ') if 'rel="prev"' in link][0]
+        prev_url = prev_url.split(';')[0].strip('<>')
+
+        new_post = Post.objects.create(user=self.user, content='post novo')
+        response = self.get(prev_url)
+
+        self.assertEqual([item['id'] for item in response.data], [new_post.id])
+
+    def test_malformed_cursor_is_not_found(self):
+        for values in (['not-a-date', 1], [{'x': 1}, 1], [self.posts[0].created_at.isoformat(), 'abc']):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.client.get(f'/api/posts/?until={cursor}')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, values)
+
+
+class FeedQueryCountTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        for i in range(15):
+            author = User.objects.create_user(username=f'autor{i}', email=f'autor{i}@example.com', password='pass12345')
+            self.user.following.add(author)
+            post = Post.objects.create(user=author, content=f'post {i}')
+            Like.objects.create(user=self.user, post=post)
+            post.retweets.add(self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def count_queries(self, page_size):
+        # Mesmas condições nas duas medições: conjunto de follows fora do cache
+        # (force_authenticate reaproveita a instância, que memoriza o conjunto)
+        cache.clear()
+        graph.invalidate([self.user])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/posts/?feed=true&page_size={page_size}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), page_size)
+        self.assertTrue(all(item['is_liked'] and item['is_retweeted'] for item in response.data))
+        self.assertTrue(all(item['user']['is_following'] for item in response.data))
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.assertEqual(self.count_queries(5), self.count_queries(15))
+
+
+class RenderCacheTests(APITestCase):
+    def setUp(self):
+        caches['render'].clear()
+        metrics.reset()
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.post = Post.objects.create(user=self.bob, content='post popular')
+        Like.objects.create(user=self.alice, post=self.post)
+
+    def get_post(self, viewer):
+        self.client.force_authenticate(user=viewer)
+        return self.client.get(f'/api/posts/{self.post.id}/').data
+
+    def test_fragment_is_shared_and_overlaid_per_viewer(self):
+        uncached = PostSerializer(
+            Post.objects.select_related('user').get(pk=self.post.pk),
+            context={'request': self.client.get('/').wsgi_request},
+        ).data
+        first = self.get_post(self.alice)
+        second = self.get_post(self.bob)
+
+        self.assertEqual(metrics.snapshot()['counters']['render_cache.post.hit'], 1)
+        self.assertTrue(first['is_liked'])
+        self.assertFalse(second['is_liked'])
+        self.assertEqual({**first, 'is_liked': False, 'is_retweeted': False}, {**uncached, 'is_liked': False})
+
+    def test_counters_and_profile_changes_invalidate_fragments(self):
+        self.get_post(self.alice)
+
+        Like.objects.create(user=self.bob, post=self.post)
+        self.bob.bio = 'bio nova'
+        self.bob.save(update_fields=['bio'])
+
+        data = self.get_post(self.alice)
+        self.assertEqual(data['likes_count'], 2)
+        self.assertEqual(data['user']['bio'], 'bio nova')
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.get_post(self.alice)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass12345')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.data['counters']['render_cache.post.miss'], 1)
+        self.assertEqual(response.data['ratios']['render_cache.post.hit_ratio'], 0.0)
+
+
+class CounterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.author = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.post = Post.objects.create(user=self.author, content='post')
+        self.client.force_authenticate(user=self.user)
+
+    def test_interactions_update_stored_counters(self):
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        self.client.post(f'/api/posts/{self.post.id}/retweet/')
+        self.client.post(f'/api/interactions/posts/{self.post.id}/comments/', {'content': 'oi'})
+        self.client.post(f'/api/user/{self.author.username}/follow/')
+
+        self.post.refresh_from_db()
+        self.author.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.retweets_count, self.post.comments_count), (1, 1, 1))
+        self.assertEqual((self.author.followers_count, self.author.posts_count), (1, 1))
+        self.assertEqual(self.user.following_count, 1)
+
+        self.client.post(f'/api/posts/{self.post.id}/like/')
+        self.client.post(f'/api/user/{self.author.username}/follow/')
+        self.post.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.author.followers_count, 0)
+
+    def assert_follow_counts(self, *expected):
+        users = [self.user, self.author, self.other]
+        for user in users:
+            user.refresh_from_db()
+        self.assertEqual([(user.followers_count, user.following_count) for user in users], list(expected))
+        self.assertEqual(
+            [(user.followers.count(), user.following.count()) for user in users], list(expected)
+        )
+
+    def test_orm_follow_changes_match_rows(self):
+        self.other = User.objects.create_user(username='carol', email='carol@example.com', password='pass12345')
+        self.author.followers.add(self.user)
+        self.user.following.remove(self.other)
+        self.assert_follow_counts((0, 1), (1, 0), (0, 0))
+
+        self.other.following.add(self.user, self.author)
+        self.user.following.clear()
+        self.assert_follow_counts((1, 0), (1, 0), (0, 2))
+
+        self.author.delete()
+        self.author = User.objects.create_user(username='dave', email='dave@example.com', password='pass12345')
+        self.assert_follow_counts((1, 0), (0, 0), (0, 1))
+
+    def test_orm_retweet_changes_match_rows(self):
+        self.post.retweets.add(self.user)
+        self.post.retweets.remove(self.user)
+        self.post.retweets.remove(self.user)
+        self.post.retweets.add(self.user, self.author)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.retweets_count, 2)
+
+        self.user.delete()
+        self.post.retweets.clear()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.retweets_count, 0)
+
+    def test_profile_and_feed_render_without_aggregates(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(f'/api/user/{self.author.username}/')
+            self.client.get('/api/posts/?feed=true')
+        self.assertFalse(any('COUNT(' in query['sql'] for query in context.captured_queries))
+
+    def test_reconcile_repairs_drift(self):
+        Post.objects.filter(pk=self.post.pk).update(likes_count=42)
+        User.objects.filter(pk=self.author.pk).update(posts_count=0)
+
+        call_command('reconcile_counters', stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.author.posts_count, 1)
+
+
+class HashtagMentionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+
+    def create_post(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/posts/', {'content': content})
+        pipeline.flush()
+        return Post.objects.latest('id')
+
+    def test_content_is_parsed_into_tags_and_mentions(self):
+        post = self.create_post('Oi @bob, olha #Django e #django. @alice @ninguem')
+
+        self.assertEqual(list(post.hashtags.values_list('name', flat=True)), ['django'])
+        self.assertEqual(list(post.mentions.all()), [self.bob])
+        self.assertEqual(Notification.objects.filter(recipient=self.bob, notification_type='mention').count(), 1)
+
+        post.content = 'agora só #python'
+        post.save()
+        self.assertEqual(list(post.hashtags.values_list('name', flat=True)), ['python'])
+        self.assertFalse(post.mentions.exists())
+
+    def test_tag_filter_and_trends(self):
+        tagged = self.create_post('post #Django')
+        self.create_post('outro #django #python')
+        self.create_post('sem tags')
+
+        response = self.client.get('/api/posts/', {'tag': '#DJANGO'})
+        self.assertEqual(len(response.data), 2)
+        self.assertIn(tagged.id, [post['id'] for post in response.data])
+
+        response = self.client.get('/api/trends/')
+        self.assertEqual(response.data, [{'hashtag': 'django', 'count': 2}, {'hashtag': 'python', 'count': 1}])
+
+        cache.clear()
+        tagged.delete()
+        self.assertEqual(self.client.get('/api/trends/').data[0], {'hashtag': 'django', 'count': 1})
+
+
+class AsyncPostListTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        author = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.user.following.add(author)
+        posts = [Post.objects.create(user=author, content=f'post {i} #tag') for i in range(3)]
+        Like.objects.create(user=self.user, post=posts[1])
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    async def assert_same_as_sync(self, query):
+        expected = await sync_to_async(self.client.get)(f'/api/posts/{query}')
+        response = await self.async_client.get(
+            f'/api/async/posts/{query}', headers={'authorization': f'Token {self.token.key}'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response.get('Link'), expected.get('Link', '').replace('/api/', '/api/async/') or None)
+
+    async def test_matches_the_sync_listing(self):
+        await self.assert_same_as_sync('?feed=true&page_size=2')
+        await self.assert_same_as_sync('?user=bob')
+        await self.assert_same_as_sync('?tag=tag')
+        await self.assert_same_as_sync('?user=ninguem')
+
+    async def test_anonymous_access_follows_the_sync_view(self):
+        self.client.credentials()
+        expected = await sync_to_async(self.client.get)('/api/posts/?feed=true')
+        response = await self.async_client.get('/api/async/posts/?feed=true')
+        self.assertEqual(expected.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.status_code, expected.status_code)
+
+        with mock.patch.object(PostListCreateAPI, 'permission_classes', [permissions.IsAuthenticatedOrReadOnly]):
+            expected = await sync_to_async(self.client.get)('/api/posts/?user=bob')
+            response = await self.async_client.get('/api/async/posts/?user=bob')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), expected.json())
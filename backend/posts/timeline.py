@@ -0,0 +1,219 @@
+"""
+Timeline materializada (fan-out na escrita) para o feed ``?feed=true``.
+
+Cada post novo é empurrado para a caixa de entrada (``TimelineEntry``) do autor
+e de todos os seus seguidores. Autores com muitos seguidores não fazem fan-out:
+seus posts são puxados na leitura e mesclados com a timeline materializada.
+Quando um autor cai abaixo do limite, os posts recentes que ele escreveu sem
+fan-out são empurrados para os seguidores (``fanout_demoted``).
+
+O fan-out não apara as timelines (seria um DELETE por seguidor a cada post);
+o comando ``trim_timelines`` roda periodicamente e corta o que passou de
+``TIMELINE_MAX_LENGTH``.
+"""
+import asyncio
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+
+from .models import Post, TimelineEntry
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+def max_length():
+    return getattr(settings, 'TIMELINE_MAX_LENGTH', 800)
+
+
+def fanout_threshold():
+    return getattr(settings, 'TIMELINE_FANOUT_THRESHOLD', 10000)
+
+
+def is_celebrity(user):
+    """Autores acima do limite de seguidores são lidos pelo caminho de pull"""
+    return User.objects.filter(pk=user.pk, followers_count__gte=fanout_threshold()).exists()
+
+
+def _celebrity_following_ids(user):
+    return list(
+        user.following.filter(followers_count__gte=fanout_threshold()).values_list('id', flat=True)
+    )
+
+
+def _insert_entries(owner_ids, post):
+    _bulk_insert(
+        TimelineEntry(owner_id=owner_id, post_id=post.id, created_at=post.created_at)
+        for owner_id in owner_ids
+    )
+
+
+def _bulk_insert(entries):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fanout_post(post):
+    """Empurra um post novo para a timeline do autor e dos seguidores"""
+    author = post.user
+    if is_celebrity(author):
+        _insert_entries([author.id], post)
+        return
+
+    follower_ids = author.followers.values_list('id', flat=True).iterator()
+    _insert_entries([author.id, *follower_ids], post)
+
+
+def fanout_demoted(removed_followers):
+    """
+    Fan-out dos posts recentes de quem deixou de ser famoso
+
+    ``removed_followers`` conta os seguidores perdidos por autor, já descontados
+    de ``followers_count``. Os posts escritos acima do limite só estavam na
+    timeline do autor e sumiriam dos feeds ao sair do caminho de pull.
+    """
+    threshold = fanout_threshold()
+    authors = User.objects.filter(id__in=removed_followers, followers_count__lt=threshold)
+    for author in authors:
+        if author.followers_count + removed_followers[author.id] < threshold:
+            continue
+        recent = list(
+            Post.objects.filter(user=author)
+            .order_by('-created_at')
+            .values_list('id', 'created_at')[:max_length()]
+        )
+        follower_ids = author.followers.values_list('id', flat=True).iterator()
+        _bulk_insert(
+            TimelineEntry(owner_id=follower_id, post_id=post_id, created_at=created_at)
+            for follower_id in follower_ids
+            for post_id, created_at in recent
+        )
+
+
+def _merge_feed(rows, limit):
+    """Ids sem repetição, na ordem de ``rows``"""
+    post_ids = []
+    seen = set()
+    for post_id, _ in rows:
+        if post_id not in seen:
+            seen.add(post_id)
+            post_ids.append(post_id)
+    return post_ids[:limit]
+
+
+def get_feed_post_ids(user, limit=None):
+    """IDs do feed, do mais recente ao mais antigo, limitados a ``limit``"""
+    limit = limit or max_length()
+    rows = list(
+        TimelineEntry.objects.filter(owner=user)
+        .order_by('-created_at')
+        .values_list('post_id', 'created_at')[:limit]
+    )
+
+    celebrity_ids = _celebrity_following_ids(user)
+    if celebrity_ids:
+        rows += list(
+            Post.objects.filter(user_id__in=celebrity_ids)
+            .order_by('-created_at')
+            .values_list('id', 'created_at')[:limit]
+        )
+        rows.sort(key=lambda row: row[1], reverse=True)
+    return _merge_feed(rows, limit)
+
+
+async def _alist(queryset):
+    # values_list com aiterator() executa a consulta fora do executor no Django 4.2
+    return [row async for row in queryset]
+
+
+async def aget_feed_post_ids(user, limit=None):
+    """``get_feed_post_ids`` pelo ORM assíncrono; a timeline e os famosos seguidos são lidos juntos"""
+    limit = limit or max_length()
+    rows, celebrity_ids = await asyncio.gather(
+        _alist(
+            TimelineEntry.objects.filter(owner=user)
+            .order_by('-created_at')
+            .values_list('post_id', 'created_at')[:limit]
+        ),
+        _alist(user.following.filter(followers_count__gte=fanout_threshold()).values_list('id', flat=True)),
+    )
+    if celebrity_ids:
+        rows += await _alist(
+            Post.objects.filter(user_id__in=celebrity_ids)
+            .order_by('-created_at')
+            .values_list('id', 'created_at')[:limit]
+        )
+        rows.sort(key=lambda row: row[1], reverse=True)
+    return _merge_feed(rows, limit)
+
+
+def backfill(owner, author_ids):
+    """Copia os posts recentes dos autores seguidos para a timeline do dono"""
+    author_ids = list(
+        User.objects.filter(id__in=author_ids)
+        .filter(Q(followers_count__lt=fanout_threshold()) | Q(id=owner.id))
+        .values_list('id', flat=True)
+    )
+    if not author_ids:
+        return
+
+    recent = (
+        Post.objects.filter(user_id__in=author_ids)
+        .order_by('-created_at')
+        .values_list('id', 'created_at')[:max_length()]
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner=owner, post_id=post_id, created_at=created_at) for post_id, created_at in recent],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim(owner)
+
+
+def remove_authors(owner, author_ids):
+    """Remove da timeline do dono os posts de autores que ele deixou de seguir"""
+    TimelineEntry.objects.filter(owner=owner, post__user_id__in=author_ids).exclude(
+        post__user_id=owner.id
+    ).delete()
+
+
+def trim(owner):
+    """Mantém apenas as ``TIMELINE_MAX_LENGTH`` entradas mais recentes"""
+    # (created_at, id) desempata entradas com o mesmo horário
+    cutoff = list(
+        TimelineEntry.objects.filter(owner=owner)
+        .order_by('-created_at', '-id')
+        .values_list('created_at', 'id')[max_length():max_length() + 1]
+    )
+    if cutoff:
+        created_at, entry_id = cutoff[0]
+        TimelineEntry.objects.filter(owner=owner).filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lte=entry_id)
+        ).delete()
+
+
+def trim_oversized():
+    """Apara as timelines acima de ``TIMELINE_MAX_LENGTH``; devolve quantas foram aparadas"""
+    owner_ids = list(
+        TimelineEntry.objects.values('owner_id')
+        .annotate(entries=Count('id'))
+        .filter(entries__gt=max_length())
+        .values_list('owner_id', flat=True)
+    )
+    for owner_id in owner_ids:
+        trim(owner_id)
+    return len(owner_ids)
+
+
+def rebuild(owner):
+    """Reconstrói do zero a timeline de um usuário"""
+    TimelineEntry.objects.filter(owner=owner).delete()
+    backfill(owner, [owner.id, *owner.following.values_list('id', flat=True)])
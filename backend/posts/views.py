@@ -1,17 +1,24 @@
 from rest_framework import generics, permissions, filters, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Post
 from .serializers import PostSerializer, PostCreateSerializer
-from interactions.models import Like
-from django.db.models import Q
+from . import ingest, timeline
+from .queries import feed_queryset, fingerprint_annotations, page_fingerprint
+from .rendering import render_posts
+from backend import conditional
+from backend.conditional import ConditionalGetMixin
+from interactions import services
+from interactions.views import RelationAPI
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-class PostListCreateAPI(generics.ListCreateAPIView):
+class PostListCreateAPI(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = PostSerializer 
     permission_classes = [permissions.IsAuthenticated]
+    page = None
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -41,21 +48,36 @@ class PostListCreateAPI(generics.ListCreateAPIView):
   
         elif self.request.query_params.get('feed'):
             print("📱 Carregando feed")
-            following = self.request.user.following.all()
-            queryset = queryset.filter(
-                Q(user__in=following) | Q(user=self.request.user)
-            ).distinct()
+            post_ids = timeline.get_feed_post_ids(self.request.user)
+            queryset = queryset.filter(id__in=post_ids)
+
+        tag = self.request.query_params.get('tag')
+        if tag:
+            # Join pelos índices únicos de Hashtag.name e PostHashtag
+            queryset = queryset.filter(hashtag_links__hashtag__name=ingest.normalize_tag(tag))
     
-        return queryset.order_by('-created_at')
+        return feed_queryset(queryset).order_by('-created_at')
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
+    def get_etag_parts(self, request, *args, **kwargs):
+        # A página é carregada uma vez aqui e reaproveitada por list() quando não há 304
+        queryset = self.filter_queryset(self.get_queryset()).annotate(**fingerprint_annotations())
+        self.page = self.paginate_queryset(queryset)
+        return [conditional.get_version('viewer', request.user.id), page_fingerprint(self.page)]
+
+    def list(self, request, *args, **kwargs):
+        if self.page is None:
+            self.page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        serializer = self.get_serializer(self.page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
 class PostDetailAPI(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Post.objects.all()
+    queryset = feed_queryset(Post.objects.all())
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -64,49 +86,46 @@ class PostDetailAPI(generics.RetrieveUpdateDestroyAPIView):
         context['request'] = self.request
         return context
 
+    def retrieve(self, request, *args, **kwargs):
+        return Response(render_posts([self.get_object()], self.get_serializer_context())[0])
 
-class LikePostAPI(generics.GenericAPIView):
-    permission_classes = [permissions.IsAuthenticated]
-    
-    def post(self, request, pk):
-        try:
-            post = Post.objects.get(pk=pk)
-        except Post.DoesNotExist:
-            return Response({'error': 'Post não encontrado'}, status=404)
-        
-        like, created = Like.objects.get_or_create(
-            user=request.user,
-            post=post
-        )
-        
-        if not created:
-            like.delete()
-            return Response({'status': 'unliked'})
-        
-        return Response({'status': 'liked'})
 
+class PostRelationAPI(RelationAPI):
+    not_found_message = 'Post não encontrado'
+
+    def get_target(self, pk):
+        return Post.objects.select_related('user').filter(pk=pk).first()
 
-class RetweetPostAPI(generics.GenericAPIView):
+
+class LikePostAPI(PostRelationAPI):
+    activate = staticmethod(services.like)
+    deactivate = staticmethod(services.unlike)
+    statuses = ('liked', 'unliked')
+    counter_field = 'likes_count'
+
+
+class RetweetPostAPI(PostRelationAPI):
+    activate = staticmethod(services.retweet)
+    deactivate = staticmethod(services.unretweet)
+    statuses = ('retweeted', 'unretweeted')
+    counter_field = 'retweets_count'
+
+
+class BookmarkPostAPI(PostRelationAPI):
+    activate = staticmethod(services.bookmark)
+    deactivate = staticmethod(services.unbookmark)
+    statuses = ('bookmarked', 'unbookmarked')
+    counter_field = None
+
+
+class TrendsAPI(APIView):
+    """Hashtags em alta na janela deslizante (``?hours=``, ``?limit=``)"""
     permission_classes = [permissions.IsAuthenticated]
-    
-    def post(self, request, pk):
+
+    def get(self, request):
         try:
-            post = Post.objects.get(pk=pk)
-        except Post.DoesNotExist:
-            return Response(
-                {'error': 'Post não encontrado'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        if request.user in post.retweets.all():
-            post.retweets.remove(request.user)
-            return Response({
-                'status': 'unretweeted',
-                'retweets_count': post.retweets.count()
-            })
-        else:
-            post.retweets.add(request.user)
-            return Response({
-                'status': 'retweeted',
-                'retweets_count': post.retweets.count()
-            })
\ No newline at end of file
+            hours = max(0, min(int(request.query_params.get('hours', 0)), 24 * 7)) or None
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            return Response({'error': 'Parâmetros inválidos'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ingest.trending(hours=hours, limit=limit))
@@ -0,0 +1,110 @@
+"""
+Camada de pub/sub para o canal de push em tempo real.
+
+Cada usuário tem um canal (``user:<id>``). Os eventos recebem ids crescentes
+e ficam num backlog limitado por canal, o que permite retomar a conexão a
+partir do último id recebido (``Last-Event-ID``) sem recarregar tudo.
+O backend é configurável em ``settings.REALTIME['BACKEND']``.
+"""
+import asyncio
+import itertools
+import threading
+from collections import defaultdict, deque, namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+Event = namedtuple('Event', ['id', 'event', 'data'])
+
+# Enviado quando o backlog não cobre mais o cursor do cliente: recarregue tudo
+RESET = 'reset'
+
+
+class BaseBroker:
+    def publish(self, channel, event, data):
+        """Publica um evento e devolve o seu id"""
+        raise NotImplementedError
+
+    def since(self, channel, last_id):
+        """Eventos do canal após ``last_id`` e se o backlog ainda cobre o cursor"""
+        raise NotImplementedError
+
+    async def listen(self, channel, last_id=0, timeout=15):
+        """Gera eventos novos do canal; gera ``None`` a cada ``timeout`` sem eventos"""
+        raise NotImplementedError
+
+
+class InMemoryBroker(BaseBroker):
+    """Broker de processo único (desenvolvimento, um nó só e testes)"""
+
+    def __init__(self, backlog=200):
+        self.backlog = backlog
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._events = defaultdict(lambda: deque(maxlen=self.backlog))
+        self._evicted = {}
+        self._waiters = defaultdict(set)
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            event_id = next(self._ids)
+            events = self._events[channel]
+            if len(events) == events.maxlen:
+                self._evicted[channel] = events[0].id
+            events.append(Event(event_id, event, data))
+            waiters = list(self._waiters[channel])
+
+        for loop, flag in waiters:
+            loop.call_soon_threadsafe(flag.set)
+        return event_id
+
+    def since(self, channel, last_id):
+        with self._lock:
+            complete = last_id >= self._evicted.get(channel, 0)
+            events = [event for event in self._events.get(channel, ()) if event.id > last_id]
+        return events, complete
+
+    async def listen(self, channel, last_id=0, timeout=15):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters[channel].add(waiter)
+        try:
+            while True:
+                waiter[1].clear()
+                events, complete = self.since(channel, last_id)
+                if not complete:
+                    events.insert(0, Event(events[0].id - 1 if events else last_id, RESET, {}))
+                for event in events:
+                    last_id = max(last_id, event.id)
+                    yield event
+                if events:
+                    continue
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._waiters[channel].discard(waiter)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    config = getattr(settings, 'REALTIME', {})
+    backend = import_string(config.get('BACKEND', 'realtime.brokers.InMemoryBroker'))
+    return backend(**config.get('OPTIONS', {}))
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def publish_to_user(user_id, event, data):
+    return get_broker().publish(user_channel(user_id), event, data)
+
+
+def publish_on_commit(user_id, event, data):
+    """Publica só depois que a transação atual for confirmada"""
+    transaction.on_commit(lambda: publish_to_user(user_id, event, data))
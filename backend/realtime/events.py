@@ -0,0 +1,19 @@
+"""Eventos publicados no canal de cada usuário"""
+from chats.serializers import MessageSerializer
+from notifications.serializers import NotificationSerializer
+from .brokers import publish_on_commit, publish_to_user
+
+
+def publish_notification(notification):
+    """Chamado pelo pipeline de notificações, depois que o lote foi gravado"""
+    publish_to_user(
+        notification.recipient_id,
+        'notification',
+        NotificationSerializer(notification).data,
+    )
+
+
+def publish_message(message, recipient_id):
+    data = MessageSerializer(message).data
+    data['conversation_id'] = message.conversation_id
+    publish_on_commit(recipient_id, 'message', data)
@@ -0,0 +1,83 @@
+from django.test import TestCase, TransactionTestCase
+from rest_framework.authtoken.models import Token
+
+from chats.models import Conversation, Message
+from notifications import pipeline
+from users.models import User
+from .brokers import RESET, InMemoryBroker, get_broker, user_channel
+
+
+class InMemoryBrokerTests(TestCase):
+    def test_resume_from_last_event_id(self):
+        broker = InMemoryBroker(backlog=10)
+        first = broker.publish('user:1', 'message', {'n': 1})
+        broker.publish('user:1', 'message', {'n': 2})
+        broker.publish('user:2', 'message', {'n': 3})
+
+        events, complete = broker.since('user:1', first)
+
+        self.assertTrue(complete)
+        self.assertEqual([event.data for event in events], [{'n': 2}])
+
+    def test_cursor_older_than_backlog_requires_reset(self):
+        broker = InMemoryBroker(backlog=2)
+        first = broker.publish('user:1', 'message', {'n': 1})
+        for n in range(2, 5):
+            broker.publish('user:1', 'message', {'n': n})
+
+        events, complete = broker.since('user:1', first)
+
+        self.assertFalse(complete)
+        self.assertEqual([event.data['n'] for event in events], [3, 4])
+
+
+class SignalPublishingTests(TestCase):
+    def setUp(self):
+        get_broker.cache_clear()
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+
+    def test_new_message_is_pushed_to_recipient(self):
+        conversation, _ = Conversation.get_or_create_conversation(self.alice, self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.create(conversation=conversation, sender=self.alice, content='oi')
+        pipeline.flush()
+
+        events, _ = get_broker().since(user_channel(self.bob.id), 0)
+
+        self.assertEqual([event.event for event in events], ['message', 'notification'])
+        self.assertEqual(events[0].data['content'], 'oi')
+        self.assertEqual(get_broker().since(user_channel(self.alice.id), 0)[0], [])
+
+
+class EventStreamViewTests(TransactionTestCase):
+    def setUp(self):
+        get_broker.cache_clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.token = Token.objects.create(user=self.user)
+
+    def test_wsgi_is_not_implemented(self):
+        response = self.client.get(f'/api/stream/?token={self.token.key}')
+        self.assertEqual(response.status_code, 501)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get('/api/stream/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_resumes_after_last_event_id(self):
+        broker = get_broker()
+        first = broker.publish(user_channel(self.user.id), 'notification', {'n': 1})
+        broker.publish(user_channel(self.user.id), 'notification', {'n': 2})
+
+        response = await self.async_client.get(
+            f'/api/stream/?token={self.token.key}', headers={'Last-Event-ID': str(first)}
+        )
+        chunks = response.streaming_content
+        await anext(chunks)  # retry
+        chunk = (await anext(chunks)).decode()
+        await chunks.aclose()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn('event: notification', chunk)
+        self.assertIn('data: {"n": 2}', chunk)
+        self.assertNotIn(RESET, chunk)
@@ -0,0 +1,49 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+
+from backend import aio
+from .brokers import get_broker, user_channel
+
+
+def _format(event):
+    if event is None:
+        return ': ping\n\n'
+    data = json.dumps(event.data, cls=DjangoJSONEncoder)
+    return f'id: {event.id}\nevent: {event.event}\ndata: {data}\n\n'
+
+
+async def _stream(channel, last_id, heartbeat):
+    yield f'retry: {heartbeat * 1000}\n\n'
+    async for event in get_broker().listen(channel, last_id, timeout=heartbeat):
+        yield _format(event)
+
+
+async def event_stream(request):
+    """Stream SSE com as mensagens e notificações do usuário logado"""
+    if not isinstance(request, ASGIRequest):
+        # No WSGI o Django consome o iterador assíncrono inteiro antes de enviar:
+        # a conexão prenderia uma thread para sempre sem entregar nada
+        return JsonResponse({'detail': 'O stream exige um servidor ASGI (backend.asgi).'}, status=501)
+
+    user = await sync_to_async(aio.authenticate)(request)
+    if user is None:
+        return aio.unauthorized()
+
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or 0)
+    except ValueError:
+        last_id = 0
+
+    heartbeat = getattr(settings, 'REALTIME', {}).get('HEARTBEAT', 15)
+    response = StreamingHttpResponse(
+        _stream(user_channel(user.id), last_id, heartbeat),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
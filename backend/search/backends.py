@@ -0,0 +1,249 @@
+"""
+Índice invertido de busca sobre posts (``content``) e usuários (``username``
+e ``bio``).
+
+Cada documento é uma linha da tabela ``search_index`` criada pela migração
+conforme o banco: FTS5 no SQLite e ``tsvector`` + GIN no PostgreSQL. Em
+outros bancos cai na varredura com ``icontains``. O id da linha codifica o
+tipo do documento (``object_id * 2 + KINDS[kind]``), o que permite atualizar
+e remover pela chave primária. Os sinais de ``search.signals`` mantêm o
+índice em dia; ``rebuild_search_index`` o reconstrói do zero. Buscas passam
+pelo roteador de bancos (podem ir para a réplica); escritas vão para o
+principal.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, router
+
+from posts.models import Post
+
+User = get_user_model()
+
+TABLE = 'search_index'
+KINDS = {'post': 0, 'user': 1}
+# Termos além deste limite são ignorados (consultas longas demais custam caro)
+MAX_TERMS = 8
+
+Hit = namedtuple('Hit', ['kind', 'object_id', 'score'])
+
+_TERM_RE = re.compile(r'[^\W_]+')
+
+
+def terms(query):
+    return _TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def document_id(kind, object_id):
+    return object_id * 2 + KINDS[kind]
+
+
+def _split_id(doc_id):
+    kind = 'user' if doc_id % 2 else 'post'
+    return kind, doc_id // 2
+
+
+def post_document(post):
+    return document_id('post', post.id), post.content, ''
+
+
+def user_document(user):
+    return document_id('user', user.id), user.username, user.bio or ''
+
+
+def _config():
+    return getattr(settings, 'SEARCH', {})
+
+
+class BaseBackend:
+    name = None
+
+    def index(self, documents):
+        """Insere ou substitui documentos ``(id, título, corpo)``"""
+        raise NotImplementedError
+
+    def remove(self, kind, object_id):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, kinds, limit, offset=0):
+        """Lista de ``Hit`` ordenada por relevância"""
+        raise NotImplementedError
+
+    def index_post(self, post):
+        self.index([post_document(post)])
+
+    def index_user(self, user):
+        self.index([user_document(user)])
+
+    def rebuild(self, batch_size=1000):
+        """Reindexa todos os posts e usuários; devolve quantos documentos foram gravados"""
+        self.clear()
+        total = 0
+        sources = (
+            (Post.objects.values_list('id', 'content'), lambda row: (document_id('post', row[0]), row[1], '')),
+            (User.objects.values_list('id', 'username', 'bio'), lambda row: (document_id('user', row[0]), row[1], row[2] or '')),
+        )
+        for queryset, build in sources:
+            batch = []
+            for row in queryset.order_by('id').iterator(chunk_size=batch_size):
+                batch.append(build(row))
+                if len(batch) >= batch_size:
+                    self.index(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                self.index(batch)
+                total += len(batch)
+        return total
+
+    def _read_cursor(self):
+        return connections[router.db_for_read(Post)].cursor()
+
+    def _write_cursor(self):
+        return connections[router.db_for_write(Post)].cursor()
+
+    def _kind_filter(self, column, kinds):
+        if len(kinds) == len(KINDS):
+            return '', []
+        return f' AND {column} %% 2 = %s', [KINDS[kinds[0]]]
+
+    def _hits(self, rows):
+        hits = []
+        for doc_id, score in rows:
+            kind, object_id = _split_id(doc_id)
+            hits.append(Hit(kind, object_id, float(score)))
+        return hits
+
+
+class FTS5Backend(BaseBackend):
+    """SQLite FTS5; ``bm25`` com peso maior para o título (conteúdo do post ou username)"""
+    name = 'fts5'
+
+    @staticmethod
+    def match_expression(query):
+        # Cada termo entre aspas (sem operadores do usuário) e com prefixo
+        return ' '.join(f'"{term}"*' for term in terms(query))
+
+    def index(self, documents):
+        with self._write_cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(doc[0],) for doc in documents])
+            cursor.executemany(f'INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)', documents)
+
+    def remove(self, kind, object_id):
+        with self._write_cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [document_id(kind, object_id)])
+
+    def clear(self):
+        with self._write_cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+
+    def search(self, query, kinds, limit, offset=0):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        kind_sql, kind_params = self._kind_filter('rowid', kinds)
+        with self._read_cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, -bm25({TABLE}, 10.0, 1.0) AS score FROM {TABLE} '
+                f'WHERE {TABLE} MATCH %s{kind_sql} ORDER BY score DESC, rowid DESC LIMIT %s OFFSET %s',
+                [expression, *kind_params, limit, offset],
+            )
+            return self._hits(cursor.fetchall())
+
+
+class PostgresBackend(BaseBackend):
+    """``tsvector`` com pesos A (título) e B (corpo), indexado por GIN"""
+    name = 'postgres'
+
+    document_sql = "setweight(to_tsvector(%s::regconfig, %s), 'A') || setweight(to_tsvector(%s::regconfig, %s), 'B')"
+
+    @property
+    def ts_config(self):
+        return _config().get('POSTGRES_CONFIG', 'simple')
+
+    @staticmethod
+    def tsquery(query):
+        return ' & '.join(f'{term}:*' for term in terms(query))
+
+    def index(self, documents):
+        config = self.ts_config
+        with self._write_cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (id, document) VALUES (%s, {self.document_sql}) '
+                'ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document',
+                [(doc_id, config, title, config, body) for doc_id, title, body in documents],
+            )
+
+    def remove(self, kind, object_id):
+        with self._write_cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE id = %s', [document_id(kind, object_id)])
+
+    def clear(self):
+        with self._write_cursor() as cursor:
+            cursor.execute(f'TRUNCATE {TABLE}')
+
+    def search(self, query, kinds, limit, offset=0):
+        tsquery = self.tsquery(query)
+        if not tsquery:
+            return []
+        kind_sql, kind_params = self._kind_filter('id', kinds)
+        with self._read_cursor() as cursor:
+            cursor.execute(
+                f'SELECT id, ts_rank(document, query) AS score '
+                f'FROM {TABLE}, to_tsquery(%s::regconfig, %s) query '
+                f'WHERE document @@ query{kind_sql} ORDER BY score DESC, id DESC LIMIT %s OFFSET %s',
+                [self.ts_config, tsquery, *kind_params, limit, offset],
+            )
+            return self._hits(cursor.fetchall())
+
+
+class ScanBackend(BaseBackend):
+    """Sem índice: varredura com ``icontains`` (comportamento anterior)"""
+    name = 'scan'
+
+    def index(self, documents):
+        pass
+
+    def remove(self, kind, object_id):
+        pass
+
+    def clear(self):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        return 0
+
+    def _querysets(self, query):
+        return {
+            'user': User.objects.filter(username__icontains=query).order_by('-id'),
+            'post': Post.objects.filter(content__icontains=query).order_by('-id'),
+        }
+
+    def search(self, query, kinds, limit, offset=0):
+        query = query.strip()
+        if not query:
+            return []
+        hits = []
+        querysets = self._querysets(query)
+        # Sem ranking: usuários antes dos posts, mais novos primeiro
+        for kind in ('user', 'post'):
+            if kind in kinds:
+                ids = querysets[kind].values_list('id', flat=True)[:offset + limit]
+                hits.extend(Hit(kind, object_id, 0.0) for object_id in ids)
+        return hits[offset:offset + limit]
+
+
+BACKENDS = {backend.name: backend for backend in (FTS5Backend, PostgresBackend, ScanBackend)}
+VENDOR_BACKENDS = {'sqlite': 'fts5', 'postgresql': 'postgres'}
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    name = _config().get('BACKEND') or VENDOR_BACKENDS.get(connection.vendor, 'scan')
+    return BACKENDS[name]()
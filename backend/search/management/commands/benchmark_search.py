@@ -0,0 +1,69 @@
+import random
+import string
+import time
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from search.backends import ScanBackend, get_backend
+
+User = get_user_model()
+
+VOCABULARY = (
+    'python django react sqlite postgres cache fila índice busca timeline '
+    'notificação mensagem futebol música viagem café praia trabalho projeto '
+    'código deploy servidor banco consulta desempenho teste amigo cidade'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Compara a busca indexada com a varredura icontains'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', help='Termos a buscar (padrão: amostra do vocabulário)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Cria N posts sintéticos (descartados ao final)')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed']:
+                self.seed(options['seed'])
+            queries = options['queries'] or [VOCABULARY[0], VOCABULARY[-1], 'djan', 'inexistente']
+            self.run(queries, options['repeat'], options['limit'])
+            # Nada do que foi criado aqui deve ficar no banco
+            transaction.set_rollback(True)
+
+    def seed(self, total):
+        # Vocabulário com distribuição de Zipf: poucos termos comuns, muitos raros
+        words = list(VOCABULARY) + [
+            ''.join(random.choices(string.ascii_lowercase, k=random.randint(4, 9))) for _ in range(5000)
+        ]
+        weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+        author, _ = User.objects.get_or_create(username='benchmark_search')
+        batch = [
+            Post(user=author, content=' '.join(random.choices(words, cum_weights=weights, k=random.randint(5, 30))))
+            for _ in range(total)
+        ]
+        Post.objects.bulk_create(batch, batch_size=1000)
+        started = time.perf_counter()
+        get_backend().rebuild()
+        self.stdout.write(f'{total} post(s) criados; reindexação em {time.perf_counter() - started:.2f}s')
+
+    def run(self, queries, repeat, limit):
+        backends = [get_backend(), ScanBackend()]
+        self.stdout.write(f'{Post.objects.count()} post(s), {repeat} repetição(ões), limite {limit}')
+        self.stdout.write(f'{"consulta":<20}' + ''.join(f'{backend.name:>14}{"itens":>7}' for backend in backends))
+        for query in queries:
+            columns = []
+            for backend in backends:
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    hits = backend.search(query, ('post',), limit)
+                elapsed = (time.perf_counter() - started) / repeat * 1000
+                columns.append(f'{elapsed:>12.2f}ms{len(hits):>7}')
+            self.stdout.write(f'{query:<20}' + ''.join(columns))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search.backends import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca de posts e usuários'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        with transaction.atomic():
+            total = backend.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Índice "{backend.name}" reconstruído: {total} documento(s)'))
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE search_index USING fts5("
+    "title, body, tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO search_index (rowid, title, body) SELECT id * 2, content, '' FROM posts_post",
+    "INSERT INTO search_index (rowid, title, body) "
+    "SELECT id * 2 + 1, username, COALESCE(bio, '') FROM users_user",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE TABLE search_index (id bigint PRIMARY KEY, document tsvector NOT NULL)",
+    "CREATE INDEX search_index_document ON search_index USING GIN (document)",
+    "INSERT INTO search_index (id, document) SELECT id * 2, "
+    "setweight(to_tsvector(%(config)s::regconfig, content), 'A') FROM posts_post",
+    "INSERT INTO search_index (id, document) SELECT id * 2 + 1, "
+    "setweight(to_tsvector(%(config)s::regconfig, username), 'A') || "
+    "setweight(to_tsvector(%(config)s::regconfig, COALESCE(bio, '')), 'B') FROM users_user",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # Outros bancos ficam sem tabela e usam o backend de varredura
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements, params = SQLITE_FORWARD, None
+    elif vendor == 'postgresql':
+        config = getattr(settings, 'SEARCH', {}).get('POSTGRES_CONFIG', 'simple')
+        statements, params = POSTGRES_FORWARD, {'config': config}
+    else:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement, params)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS search_index')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('posts', '0007_counters'),
+        ('users', '0006_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
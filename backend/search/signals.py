@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from posts.models import Post
+from .backends import get_backend
+
+User = get_user_model()
+
+# Campos de User que entram no índice
+INDEXED_USER_FIELDS = {'username', 'bio'}
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'content' in update_fields:
+        get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post(sender, instance, **kwargs):
+    get_backend().remove('post', instance.id)
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, update_fields=None, **kwargs):
+    # Logins salvam só last_login; não há o que reindexar
+    if update_fields is None or INDEXED_USER_FIELDS & set(update_fields):
+        get_backend().index_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_user(sender, instance, **kwargs):
+    get_backend().remove('user', instance.id)
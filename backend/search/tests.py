@@ -0,0 +1,71 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import router
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from users.models import User
+from .backends import get_backend
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.python_dev = User.objects.create_user(
+            username='pythonista', email='py@example.com', password='pass12345', bio='Escrevo Django'
+        )
+        self.match = Post.objects.create(user=self.python_dev, content='Aprendendo Django com Python')
+        self.other = Post.objects.create(user=self.python_dev, content='Café da manhã')
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_index_follows_saves_and_deletes(self):
+        response = self.search(q='djan', type='posts')
+        self.assertEqual([item['post']['id'] for item in response.data], [self.match.id])
+
+        self.match.content = 'Outro assunto'
+        self.match.save()
+        self.other.delete()
+        self.assertEqual(self.search(q='djan', type='posts').data, [])
+        self.assertEqual(len(self.search(q='outro assunto').data), 1)
+
+    def test_username_ranks_above_bio_and_accents_are_ignored(self):
+        User.objects.create_user(username='maria', email='m@example.com', password='pass12345', bio='Fã de python')
+        response = self.search(q='python', type='users')
+        self.assertEqual([item['user']['username'] for item in response.data], ['pythonista', 'maria'])
+        self.assertEqual(len(self.search(q='CAFE').data), 1)
+
+    def test_results_are_paginated_with_link_header(self):
+        for index in range(3):
+            Post.objects.create(user=self.user, content=f'django {index}')
+        first = self.search(q='django', type='posts', page_size=2)
+        self.assertEqual(len(first.data), 2)
+        self.assertIn('offset=2', first['Link'])
+
+        second = self.client.get(first['Link'].split(';')[0].strip('<>'))
+        seen = {item['post']['id'] for item in first.data + second.data}
+        self.assertEqual(len(seen), 4)
+
+    def test_user_list_search_keeps_substring_matching_on_username(self):
+        User.objects.create_user(username='maria', email='m@example.com', password='pass12345', bio='Fã de python')
+        response = self.client.get('/api/users/', {'search': 'thon'})
+        self.assertEqual([user['username'] for user in response.data], ['pythonista'])
+
+    def test_searches_are_routed_to_the_replica(self):
+        backend = get_backend()
+        with mock.patch.object(router, 'db_for_read', return_value='default') as db_for_read:
+            self.assertEqual(len(backend.search('django', ('post',), limit=10)), 1)
+        db_for_read.assert_called_once_with(Post)
+
+    def test_rebuild_restores_documents_written_without_signals(self):
+        Post.objects.bulk_create([Post(user=self.user, content='sem sinal')])
+        self.assertEqual(get_backend().search('sinal', ('post',), limit=10), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(get_backend().search('sinal', ('post',), limit=10)), 1)
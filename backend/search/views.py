@@ -0,0 +1,72 @@
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+
+from backend.pagination import OffsetPagination
+from posts.models import Post
+from posts.queries import feed_queryset
+from posts.serializers import PostSerializer
+from users.models import User
+from users.serializers import UserSerializer
+from .backends import get_backend
+
+# Valores aceitos em ``?type=`` e os tipos de documento correspondentes
+SEARCH_TYPES = {
+    'all': ('post', 'user'),
+    'posts': ('post',),
+    'users': ('user',),
+}
+
+
+class SearchResults:
+    """Resultado preguiçoso: o fatiamento vira LIMIT/OFFSET no backend"""
+
+    def __init__(self, backend, query, kinds):
+        self.backend = backend
+        self.query = query
+        self.kinds = kinds
+
+    def __getitem__(self, item):
+        return self.backend.search(self.query, self.kinds, limit=item.stop - item.start, offset=item.start)
+
+
+class SearchView(generics.GenericAPIView):
+    """Busca ranqueada em posts e usuários (``?q=``, ``?type=all|posts|users``)"""
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OffsetPagination
+    # Só leitura: pode ir para a réplica (backend.database)
+    use_replica = True
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        search_type = request.query_params.get('type', 'all')
+        if search_type not in SEARCH_TYPES:
+            return Response(
+                {'error': f'Tipo de busca inválido: {search_type}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not query:
+            return Response([])
+
+        hits = self.paginate_queryset(SearchResults(get_backend(), query, SEARCH_TYPES[search_type]))
+        return self.get_paginated_response(self.serialize(hits))
+
+    def serialize(self, hits):
+        post_ids = [hit.object_id for hit in hits if hit.kind == 'post']
+        user_ids = [hit.object_id for hit in hits if hit.kind == 'user']
+        context = self.get_serializer_context()
+
+        posts = feed_queryset(Post.objects.filter(id__in=post_ids))
+        post_data = {item['id']: item for item in PostSerializer(posts, many=True, context=context).data}
+
+        users = list(User.objects.filter(id__in=user_ids))
+        following = set(self.request.user.following.filter(id__in=user_ids).values_list('id', flat=True))
+        user_context = {**context, 'viewer_state': {'following': following}}
+        user_data = {item['id']: item for item in UserSerializer(users, many=True, context=user_context).data}
+
+        results = []
+        for hit in hits:
+            data = post_data.get(hit.object_id) if hit.kind == 'post' else user_data.get(hit.object_id)
+            # O índice pode apontar para algo removido entre a busca e a leitura
+            if data is not None:
+                results.append({'type': hit.kind, 'score': hit.score, hit.kind: data})
+        return results
@@ -0,0 +1,157 @@
+"""
+Grafo de follows em memória, em formato CSR (compressed sparse row).
+
+Cada direção (quem o usuário segue / quem segue o usuário) é um par de
+``array('q')``: ``offsets`` e ``targets``; os vizinhos do i-ésimo id são
+``targets[offsets[i]:offsets[i + 1]]``, já ordenados. Com 5M arestas cada
+direção ocupa ~40 MB, contra alguns GB de sets de ints em Python.
+
+O grafo é montado a partir da tabela de follows (``FollowGraph.from_database``)
+ou do snapshot binário gravado por ``save``/``load`` — o comando
+``compute_suggestions`` regrava o snapshot a cada execução.
+"""
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .models import User
+
+MAGIC = b'FGR1'
+TYPECODE = 'q'
+
+
+def _array(values=()):
+    return array(TYPECODE, values)
+
+
+class Adjacency:
+    def __init__(self, ids, offsets, targets):
+        self.ids = ids
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_edges(cls, ids, sources, targets):
+        """Counting sort das arestas por origem (sem ordenar tuplas em Python)"""
+        counts = [0] * (len(ids) + 1)
+        positions = _array(bisect_left(ids, source) for source in sources)
+        for position in positions:
+            counts[position + 1] += 1
+        for i in range(len(ids)):
+            counts[i + 1] += counts[i]
+        offsets = _array(counts)
+
+        cursor = counts[:-1]
+        sorted_targets = _array([0]) * len(targets)
+        for position, target in zip(positions, targets):
+            sorted_targets[cursor[position]] = target
+            cursor[position] += 1
+        adjacency = cls(ids, offsets, sorted_targets)
+        adjacency._sort_rows()
+        return adjacency
+
+    def _sort_rows(self):
+        for i in range(len(self.ids)):
+            start, end = self.offsets[i], self.offsets[i + 1]
+            if end - start > 1:
+                self.targets[start:end] = _array(sorted(self.targets[start:end]))
+
+    def index(self, user_id):
+        i = bisect_left(self.ids, user_id)
+        if i < len(self.ids) and self.ids[i] == user_id:
+            return i
+        return None
+
+    def neighbors(self, user_id):
+        i = self.index(user_id)
+        if i is None:
+            return _array()
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def degree(self, user_id):
+        i = self.index(user_id)
+        return 0 if i is None else self.offsets[i + 1] - self.offsets[i]
+
+    @property
+    def nbytes(self):
+        return sum(len(values) * values.itemsize for values in (self.ids, self.offsets, self.targets))
+
+
+class FollowGraph:
+    def __init__(self, following, followers):
+        self.following = following
+        self.followers = followers
+
+    @property
+    def ids(self):
+        return self.following.ids
+
+    @property
+    def edge_count(self):
+        return len(self.following.targets)
+
+    @property
+    def nbytes(self):
+        return self.following.nbytes + self.followers.nbytes
+
+    @classmethod
+    def from_edges(cls, ids, followers, followed):
+        """``followers[k]`` segue ``followed[k]``; ``ids`` ordenados e sem repetição"""
+        ids = _array(ids)
+        return cls(
+            Adjacency.from_edges(ids, followers, followed),
+            Adjacency.from_edges(ids, followed, followers),
+        )
+
+    @classmethod
+    def from_database(cls):
+        ids = _array(User.objects.order_by('id').values_list('id', flat=True).iterator())
+        followers, followed = _array(), _array()
+        # Na tabela de follows, from_user é quem é seguido e to_user quem segue
+        edges = User.followers.through.objects.values_list('to_user_id', 'from_user_id')
+        for follower, target in edges.iterator(chunk_size=10000):
+            followers.append(follower)
+            followed.append(target)
+        return cls.from_edges(ids, followers, followed)
+
+    def save(self, path=None):
+        path = path or snapshot_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f'{path}.tmp'
+        with open(temp, 'wb') as file:
+            file.write(MAGIC)
+            for values in self._arrays():
+                file.write(struct.pack('<q', len(values)))
+                values.tofile(file)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or snapshot_path(), 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError('Snapshot do grafo em formato desconhecido')
+            arrays = []
+            for _ in range(5):
+                (length,) = struct.unpack('<q', file.read(8))
+                values = _array()
+                values.fromfile(file, length)
+                arrays.append(values)
+        ids, following_offsets, following_targets, followers_offsets, followers_targets = arrays
+        return cls(
+            Adjacency(ids, following_offsets, following_targets),
+            Adjacency(ids, followers_offsets, followers_targets),
+        )
+
+    def _arrays(self):
+        return (
+            self.ids,
+            self.following.offsets, self.following.targets,
+            self.followers.offsets, self.followers.targets,
+        )
+
+
+def snapshot_path():
+    return str(settings.FOLLOW_GRAPH['SNAPSHOT_PATH'])
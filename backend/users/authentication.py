@@ -0,0 +1,215 @@
+"""
+Autenticação sem ir ao banco a cada requisição.
+
+``JWTAuthentication`` verifica tokens de acesso assinados (``users.tokens``)
+e ``CachedTokenAuthentication`` atende os tokens do ``authtoken``, que
+faziam o join ``Token`` + ``User`` em toda chamada. O usuário de ambos
+vem de snapshots em dois níveis:
+
+- um LRU por processo, limitado em tamanho e com TTL curto;
+- o cache compartilhado do Django, com TTL maior.
+
+Os dois guardam um snapshot dos campos do usuário (sem a senha, que fica
+adiada) e cada requisição recebe uma instância nova montada com
+``User.from_db``: nada do que uma requisição memoriza no ``request.user``
+vaza para a seguinte.
+
+``invalidate_user``/``invalidate_token`` são chamados pelos sinais de
+``User`` (perfil, senha, desativação) e de ``Token`` (logout). O LRU de
+outros processos não é avisado e expira pelo TTL, por isso ele é curto.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from backend import metrics
+from . import tokens
+from .models import User
+
+SNAPSHOT_FIELDS = tuple(field.attname for field in User._meta.concrete_fields if field.attname != 'password')
+
+
+def _config():
+    return getattr(settings, 'AUTH_CACHE', {})
+
+
+def _cache():
+    return caches[_config().get('CACHE', 'default')]
+
+
+def _key(token_key):
+    # A chave do token não vai em claro para o cache compartilhado
+    return 'auth:token:' + hashlib.sha256(token_key.encode()).hexdigest()
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _snapshot_key(user_id):
+    return f'auth:snapshot:{user_id}'
+
+
+class LocalCache:
+    """LRU com TTL, seguro entre threads"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if value['id'] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local = LocalCache(_config().get('LOCAL_MAX_ENTRIES', 1024), _config().get('LOCAL_TTL', 5))
+
+
+def snapshot(user):
+    return {name: getattr(user, name) for name in SNAPSHOT_FIELDS}
+
+
+def hydrate(data):
+    return User.from_db(router.db_for_read(User), SNAPSHOT_FIELDS, [data[name] for name in SNAPSHOT_FIELDS])
+
+
+def _remember(token_key, data):
+    cache = _cache()
+    timeout = _config().get('TIMEOUT', 300)
+    cache.set(_key(token_key), data, timeout)
+    # Índice usuário -> tokens, para invalidar sem consultar o banco
+    keys = cache.get(_user_key(data['id'])) or set()
+    cache.set(_user_key(data['id']), keys | {_key(token_key)}, timeout)
+    local.set(token_key, data)
+
+
+def _lookup(local_key, shared_key):
+    data = local.get(local_key)
+    if data is not None:
+        metrics.incr('auth.local.hit')
+        return data
+    metrics.incr('auth.local.miss')
+    data = _cache().get(shared_key)
+    if data is not None:
+        metrics.incr('auth.shared.hit')
+        local.set(local_key, data)
+        return data
+    metrics.incr('auth.shared.miss')
+    return None
+
+
+def get_user(user_id):
+    """Usuário pelo id, montado do snapshot; ``None`` se não existe"""
+    data = _lookup(f'user:{user_id}', _snapshot_key(user_id))
+    if data is None:
+        metrics.incr('auth.db_queries')
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        data = snapshot(user)
+        _cache().set(_snapshot_key(user_id), data, _config().get('TIMEOUT', 300))
+        local.set(f'user:{user_id}', data)
+    return hydrate(data)
+
+
+class JWTAuthentication(BaseAuthentication):
+    """``Authorization: Bearer <acesso>``: assinatura, lista de negação e snapshot"""
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed('Cabeçalho de autorização inválido.')
+        started = time.perf_counter()
+        try:
+            claims = tokens.decode_access(auth[1].decode('latin-1'))
+            user = get_user(int(claims['sub']))
+            if user is None or not user.is_active:
+                raise AuthenticationFailed('Usuário inativo ou removido.')
+            if tokens.issued_before_revocation(user, claims):
+                raise AuthenticationFailed('Token revogado.')
+            return user, claims
+        finally:
+            metrics.observe('auth.jwt', time.perf_counter() - started)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` com o usuário servido do cache"""
+
+    def authenticate_credentials(self, key):
+        started = time.perf_counter()
+        try:
+            return self._authenticate(key)
+        finally:
+            metrics.observe('auth.token', time.perf_counter() - started)
+
+    def _authenticate(self, key):
+        data = _lookup(key, _key(key))
+        if data is None:
+            metrics.incr('auth.db_queries')
+            # Token inválido ou usuário inativo levantam AuthenticationFailed
+            user, token = super().authenticate_credentials(key)
+            _remember(key, snapshot(user))
+            return user, token
+        return hydrate(data), Token(key=key, user_id=data['id'])
+
+
+def _delete(keys):
+    cache = _cache()
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_user(user_id):
+    """Descarta os snapshots de todos os tokens do usuário"""
+    local.delete_user(user_id)
+    keys = _cache().get(_user_key(user_id)) or set()
+    _delete(list(keys) + [_user_key(user_id), _snapshot_key(user_id)])
+
+
+def invalidate_token(token_key):
+    local.delete(token_key)
+    _delete([_key(token_key)])
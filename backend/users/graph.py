@@ -0,0 +1,49 @@
+"""
+Grafo de follows consultado pelos serializers.
+
+``following_ids`` carrega de uma vez os ids que o usuário segue: o conjunto
+fica memorizado na instância (``request.user`` vive uma requisição) e no
+cache compartilhado, invalidado pelos sinais de follow/unfollow. A partir
+daí ``is_following`` é uma consulta O(1) a um ``frozenset``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ATTRIBUTE = '_following_ids'
+
+
+def _key(user_id):
+    return f'graph:following:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'FOLLOW_GRAPH', {}).get('CACHE_TIMEOUT', 300)
+
+
+def following_ids(user):
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    ids = getattr(user, ATTRIBUTE, None)
+    if ids is None:
+        ids = cache.get(_key(user.id))
+        if ids is None:
+            ids = frozenset(user.following.values_list('id', flat=True))
+            cache.set(_key(user.id), ids, _timeout())
+        setattr(user, ATTRIBUTE, ids)
+    return ids
+
+
+def is_following(user, other_id):
+    return other_id in following_ids(user)
+
+
+def invalidate(users):
+    """Descarta o conjunto memorizado dos ``users`` (agora e de novo no commit)"""
+    keys = []
+    for user in users:
+        user.__dict__.pop(ATTRIBUTE, None)
+        keys.append(_key(user.id))
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,75 @@
+import os
+import random
+import tempfile
+import time
+from array import array
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+
+from users import suggestions
+from users.adjacency import FollowGraph
+
+
+class Command(BaseCommand):
+    help = 'Mede montagem, snapshot e sugestões do grafo de follows com um grafo sintético (sem banco)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--edges', type=int, default=5_000_000)
+        parser.add_argument('--sample', type=int, default=1000, help='Usuários usados para medir as sugestões')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        users, edges = options['users'], options['edges']
+
+        started = time.perf_counter()
+        followers, followed = self.generate(rng, users, edges)
+        self.report('geração das arestas', started)
+
+        started = time.perf_counter()
+        follow_graph = FollowGraph.from_edges(range(1, users + 1), followers, followed)
+        self.report(f'montagem CSR ({follow_graph.edge_count} arestas, {follow_graph.nbytes / 2**20:.1f} MiB)', started)
+        del followers, followed
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'follow_graph.bin')
+            started = time.perf_counter()
+            follow_graph.save(path)
+            self.report(f'snapshot gravado ({os.path.getsize(path) / 2**20:.1f} MiB)', started)
+            started = time.perf_counter()
+            follow_graph = FollowGraph.load(path)
+            self.report('snapshot carregado', started)
+
+        sample = rng.sample(range(1, users + 1), min(options['sample'], users))
+        started = time.perf_counter()
+        for user_id in sample:
+            suggestions.suggest(follow_graph, user_id)
+        elapsed = time.perf_counter() - started
+        per_user = elapsed / len(sample)
+        self.stdout.write(
+            f'sugestões: {per_user * 1000:.2f} ms/usuário; '
+            f'estimativa para {users} usuário(s): {per_user * users:.0f}s'
+        )
+
+    def generate(self, rng, users, edges):
+        """Popularidade com cauda longa (Zipf): poucos perfis concentram os seguidores"""
+        ids = range(1, users + 1)
+        ranks = list(ids)
+        rng.shuffle(ranks)
+        cum_weights = list(accumulate(1 / rank for rank in ranks))
+        average = edges / users
+        followers, followed = array('q'), array('q')
+        for source in ids:
+            degree = min(users - 1, int(rng.expovariate(1 / average)))
+            targets = set()
+            while len(targets) < degree:
+                targets.update(rng.choices(ids, cum_weights=cum_weights, k=degree - len(targets)))
+                targets.discard(source)
+            followers.extend([source] * len(targets))
+            followed.extend(sorted(targets))
+        return followers, followed
+
+    def report(self, label, started):
+        self.stdout.write(f'{label}: {time.perf_counter() - started:.2f}s')
@@ -0,0 +1,90 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework import exceptions
+
+from users import throttling
+
+
+class Command(BaseCommand):
+    help = (
+        'Simula uma rajada de logins com senha errada num pool de workers, com e sem users.throttling, '
+        'e mede quanto requisições comuns esperam por um worker (sem banco)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=200)
+        parser.add_argument('--probes', type=int, default=50, help='Requisições comuns intercaladas na rajada')
+        parser.add_argument('--ips', type=int, default=50)
+        parser.add_argument('--usernames', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        encoded = make_password('senha-correta-123')
+        for enabled in (False, True):
+            with override_settings(AUTH_THROTTLE={**throttling._config(), 'ENABLED': enabled}):
+                result = self.run(options, encoded)
+            label = 'com throttle' if enabled else 'sem throttle'
+            probes = sorted(result['probes'])
+            self.stdout.write(
+                f'{label}: {result["elapsed"]:.2f}s, {result["hashed"]} hash(es), {result["rejected"]} recusada(s); '
+                f'espera das requisições comuns p50 {statistics.median(probes) * 1000:.1f} ms, '
+                f'p95 {probes[int(len(probes) * 0.95) - 1] * 1000:.1f} ms, max {probes[-1] * 1000:.1f} ms; '
+                f'workers livres {result["available"]:.0%}'
+            )
+
+    def run(self, options, encoded):
+        rng = random.Random(options['seed'])
+        # Chaves novas a cada execução: os baldes de rodadas anteriores não interferem
+        run = uuid.uuid4().hex[:8]
+        ips = [f'bench-{run}-{i}' for i in range(options['ips'])]
+        usernames = [f'bench-{run}-user{i}' for i in range(options['usernames'])]
+        probe_every = max(1, options['attempts'] // max(1, options['probes']))
+        stats = {'hashed': 0, 'rejected': 0, 'busy': 0.0}
+        lock = threading.Lock()
+
+        def count(**values):
+            with lock:
+                for name, value in values.items():
+                    stats[name] += value
+
+        def attempt(ip, username):
+            if throttling.check(ip, username):
+                count(rejected=1)
+                return
+            started = time.perf_counter()
+            try:
+                with throttling.hashing_slot():
+                    check_password('senha-errada', encoded)
+            except exceptions.Throttled:
+                count(rejected=1, busy=time.perf_counter() - started)
+                return
+            count(hashed=1, busy=time.perf_counter() - started)
+            throttling.record_failure(username)
+
+        def probe(submitted):
+            return time.perf_counter() - submitted
+
+        started = time.perf_counter()
+        probes = []
+        with ThreadPoolExecutor(options['workers']) as pool:
+            for i in range(options['attempts']):
+                pool.submit(attempt, rng.choice(ips), rng.choice(usernames))
+                if i % probe_every == 0:
+                    probes.append(pool.submit(probe, time.perf_counter()))
+        elapsed = time.perf_counter() - started
+        return {
+            'elapsed': elapsed,
+            'hashed': stats['hashed'],
+            'rejected': stats['rejected'],
+            'probes': [future.result() for future in probes],
+            'available': 1 - stats['busy'] / (elapsed * options['workers']),
+        }
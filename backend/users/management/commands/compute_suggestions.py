@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users import suggestions
+from users.adjacency import FollowGraph
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as sugestões de "quem seguir" e regrava o snapshot do grafo de follows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from-snapshot', action='store_true',
+                            help='Usa o último snapshot em vez de ler a tabela de follows')
+        parser.add_argument('--limit', type=int, default=None, help='Sugestões por usuário')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['from_snapshot']:
+            follow_graph = FollowGraph.load()
+        else:
+            follow_graph = FollowGraph.from_database()
+            follow_graph.save()
+        self.stdout.write(
+            f'Grafo: {len(follow_graph.ids)} usuário(s), {follow_graph.edge_count} follow(s) '
+            f'em {time.perf_counter() - started:.2f}s'
+        )
+
+        started = time.perf_counter()
+        total = suggestions.compute_all(follow_graph, limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} sugestão(ões) gravada(s) em {time.perf_counter() - started:.2f}s'
+        ))
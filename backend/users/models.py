@@ -11,5 +11,41 @@ class User(AbstractUser):
     social_provider = models.CharField(max_length=50, blank=True, null=True)
     social_id = models.CharField(max_length=255, blank=True, null=True)
     
+    # Contadores desnormalizados (mantidos por posts.counters)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
+
+    # Tokens de acesso emitidos antes disso são rejeitados (ver users.tokens)
+    tokens_valid_after = models.DateTimeField(null=True, blank=True)
+    
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+
+class FollowSuggestion(models.Model):
+    """Sugestão de "quem seguir" pré-calculada (ver users.suggestions)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follow_suggestions')
+    suggested = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'suggested'], name='unique_follow_suggestion'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score'], name='suggestion_user_score_idx'),
+        ]
+
+
+class RefreshToken(models.Model):
+    """Refresh token rotativo; só o hash SHA-256 fica no banco (ver users.tokens)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='refresh_tokens')
+    family = models.UUIDField(db_index=True)
+    token_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    used_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
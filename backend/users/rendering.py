@@ -0,0 +1,39 @@
+"""
+Representação de usuários em duas camadas: fragmento compartilhado do
+``UserSerializer`` (``backend.fragments``) + ``is_following`` de quem está vendo.
+"""
+from backend import fragments
+from . import graph
+from .models import User
+from .serializers import UserSerializer
+
+VIEWER_FIELDS = ('is_following',)
+
+
+def render_fragments(users, context):
+    """``{user_id: fragmento}``, serializando só os que faltam no cache"""
+    users = {user.id: user for user in users}
+    variant = fragments.variant_for(context.get('request'))
+    found = fragments.get_many(User, users, variant)
+    missing = [user for user_id, user in users.items() if user_id not in found]
+    if missing:
+        # Estado vazio: evita consultas de is_following que seriam descartadas
+        context = {**context, 'viewer_state': {'following': set()}}
+        fresh = {}
+        for item in UserSerializer(missing, many=True, context=context).data:
+            for field in VIEWER_FIELDS:
+                item.pop(field)
+            fresh[item['id']] = dict(item)
+        fragments.set_many(User, fresh, variant)
+        found.update(fresh)
+    return found
+
+
+def render_users(users, context, following=None):
+    """Lista de dicts no formato do ``UserSerializer``"""
+    users = list(users)
+    found = render_fragments(users, context)
+    if following is None:
+        request = context.get('request')
+        following = graph.following_ids(request.user if request is not None else None)
+    return [{**found[user.id], 'is_following': user.id in following} for user in users]
@@ -2,25 +2,51 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from images import processing as images
+from images.serializers import RenditionsField
 from .models import User
+from . import graph
+
+
+# Colunas de User exibidas pelo UserSerializer (impressão digital dos ETags)
+PROFILE_FINGERPRINT_FIELDS = (
+    'id', 'username', 'email', 'bio', 'profile_picture', 'banner_image', 'date_joined',
+    'followers_count', 'following_count', 'posts_count',
+)
+
+
+class UserListSerializer(serializers.ListSerializer):
+    """Resolve as renditions de todas as fotos da página em uma consulta"""
+
+    def to_representation(self, data):
+        users = list(data.all() if hasattr(data, 'all') else data)
+        images.resolve_into(self.context, users)
+        return super().to_representation(users)
 
 
 class UserSerializer(serializers.ModelSerializer):
-    followers_count = serializers.IntegerField(source='followers.count', read_only=True)
-    following_count = serializers.IntegerField(source='following.count', read_only=True)
-    posts_count = serializers.IntegerField(source='posts.count', read_only=True)
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
+    posts_count = serializers.IntegerField(read_only=True)
     is_following = serializers.SerializerMethodField()
+    profile_picture_renditions = RenditionsField(source='profile_picture')
+    banner_image_renditions = RenditionsField(source='banner_image')
     
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'bio', 'profile_picture', 'banner_image',
+                  'profile_picture_renditions', 'banner_image_renditions',
                   'date_joined', 'followers_count', 'following_count', 'posts_count', 'is_following']
         read_only_fields = ['date_joined']
+        list_serializer_class = UserListSerializer
 
     def get_is_following(self, obj):
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state['following']
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return request.user.following.filter(id=obj.id).exists()
+            return graph.is_following(request.user, obj.id)
         return False
 
 
@@ -1,7 +1,14 @@
-from django.db.models.signals import m2m_changed
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 from .models import User
-from notifications.models import Notification
+from . import authentication, graph
+from notifications import pipeline
+from backend import conditional, fragments
+from posts import counters, timeline
 
 @receiver(m2m_changed, sender=User.following.through)
 def create_follow_notification(sender, instance, action, pk_set, **kwargs):
@@ -10,9 +17,117 @@ def create_follow_notification(sender, instance, action, pk_set, **kwargs):
         for followed_id in pk_set:
             followed_user = User.objects.get(id=followed_id)
             if followed_user != instance: 
-                Notification.objects.create(
+                pipeline.notify(
                     recipient=followed_user,
                     sender=instance,
                     notification_type='follow',
                     text=f"{instance.username} começou a seguir você"
-                )
\ No newline at end of file
+                )
+
+
+def _pairs(instance, reverse, pk_set):
+    """Pares (seguidor, seguido) de uma mudança, a partir de quem disparou o sinal"""
+    if reverse:
+        return [(instance.id, followed_id) for followed_id in pk_set]
+    return [(follower_id, instance.id) for follower_id in pk_set]
+
+
+def _existing_pairs(instance, reverse, pk_set):
+    """Pares que existem de fato entre os que serão removidos (``pk_set`` None = clear)"""
+    # Na tabela de follows, from_user é quem é seguido e to_user quem segue
+    rows = User.followers.through.objects
+    if reverse:
+        rows = rows.filter(to_user_id=instance.id)
+        if pk_set is not None:
+            rows = rows.filter(from_user_id__in=pk_set)
+    else:
+        rows = rows.filter(from_user_id=instance.id)
+        if pk_set is not None:
+            rows = rows.filter(to_user_id__in=pk_set)
+    return list(rows.values_list('to_user_id', 'from_user_id'))
+
+
+def _adjust_counts(field, user_ids, sign):
+    """Um UPDATE por valor de delta (cada id pode aparecer várias vezes)"""
+    by_delta = defaultdict(list)
+    for user_id, total in Counter(user_ids).items():
+        by_delta[total].append(user_id)
+    for total, ids in by_delta.items():
+        counters.adjust(User, ids, **{field: sign * total})
+
+
+def _fanout_demoted(removed_followers):
+    # Depois do commit: na exclusão de um usuário, ele ainda aparece como seguidor até a cascata
+    transaction.on_commit(lambda: timeline.fanout_demoted(removed_followers))
+
+
+@receiver(m2m_changed, sender=User.following.through)
+def follows_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Contadores, timelines, conjunto de seguidos e ETags de quem segue/deixa de seguir
+
+    Um só receptor porque os pares removidos são lidos no ``pre_`` (só as linhas
+    que existem) e usados no ``post_``; ``pk_set`` de ``remove()`` inclui ids
+    que não eram seguidos e ``clear()`` não tem ``pk_set``.
+    """
+    if action in ('pre_remove', 'pre_clear'):
+        instance._removed_follows = _existing_pairs(instance, reverse, pk_set)
+        return
+    if action == 'post_add':
+        pairs, sign = _pairs(instance, reverse, pk_set), 1
+    elif action in ('post_remove', 'post_clear'):
+        # interactions.services remove com DELETE ... RETURNING e só avisa o que mudou
+        pairs = instance.__dict__.pop('_removed_follows', None)
+        if pairs is None:
+            pairs = _pairs(instance, reverse, pk_set or ())
+        sign = -1
+    else:
+        return
+    if not pairs:
+        return
+
+    _adjust_counts('following_count', [follower_id for follower_id, _ in pairs], sign)
+    _adjust_counts('followers_count', [followed_id for _, followed_id in pairs], sign)
+    if sign < 0:
+        _fanout_demoted(Counter(followed_id for _, followed_id in pairs))
+
+    followed_by = defaultdict(set)
+    for follower_id, followed_id in pairs:
+        followed_by[follower_id].add(followed_id)
+    followers = [instance] if reverse else list(User.objects.filter(id__in=followed_by))
+    for follower in followers:
+        if sign > 0:
+            timeline.backfill(follower, followed_by[follower.id])
+        else:
+            timeline.remove_authors(follower, followed_by[follower.id])
+    graph.invalidate(followers)
+    # ``is_following`` mudou para quem segue: invalida os ETags dessa pessoa
+    conditional.bump('viewer', list(followed_by))
+
+
+@receiver(pre_delete, sender=User)
+def discount_deleted_user_follows(sender, instance, **kwargs):
+    """A cascata apaga as linhas de follow sem ``m2m_changed``: corrige o outro lado"""
+    follows = User.followers.through.objects
+    follower_ids = list(follows.filter(from_user_id=instance.id).values_list('to_user_id', flat=True))
+    followed_ids = list(follows.filter(to_user_id=instance.id).values_list('from_user_id', flat=True))
+    counters.adjust(User, follower_ids, following_count=-1)
+    counters.adjust(User, followed_ids, followers_count=-1)
+    _fanout_demoted(Counter(followed_ids))
+    graph.invalidate(User.objects.filter(id__in=follower_ids))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_fragment(sender, instance, **kwargs):
+    fragments.invalidate(User, instance.id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    """Perfil, senha ou ``is_active`` mudaram: o snapshot da autenticação expira"""
+    authentication.invalidate_user(instance.id)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    authentication.invalidate_token(instance.key)
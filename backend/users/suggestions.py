@@ -0,0 +1,81 @@
+"""
+Sugestões de "quem seguir", calculadas offline sobre o ``FollowGraph``.
+
+Candidatos são os perfis seguidos por quem o usuário segue (amigos de
+amigos); a pontuação é o número desses amigos em comum, com um bônus para
+quem já segue o usuário e ainda não foi seguido de volta. O resultado vai
+para ``FollowSuggestion`` (comando ``compute_suggestions``) e a API só lê a
+tabela. Quem ainda não segue ninguém recebe os perfis mais seguidos.
+"""
+import heapq
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from . import graph
+from .models import FollowSuggestion, User
+
+
+def _config():
+    return getattr(settings, 'FOLLOW_GRAPH', {})
+
+
+def suggest(follow_graph, user_id, limit=None, fanout=None):
+    """``[(candidato, pontuação, em comum)]`` em ordem decrescente de pontuação"""
+    limit = limit or _config().get('SUGGESTIONS_PER_USER', 20)
+    fanout = fanout or _config().get('SUGGESTIONS_FANOUT', 100)
+    following = follow_graph.following.neighbors(user_id)
+    friends = following
+    if len(friends) > fanout:
+        # Amostra estável por usuário: o custo fica limitado para quem segue milhares
+        friends = random.Random(user_id).sample(list(friends), fanout)
+
+    mutual = Counter()
+    for friend in friends:
+        mutual.update(follow_graph.following.neighbors(friend))
+    follows_back = set(follow_graph.followers.neighbors(user_id))
+
+    excluded = set(following)
+    excluded.add(user_id)
+    bonus = _config().get('FOLLOW_BACK_BONUS', 2)
+    scores = (
+        (candidate, mutual[candidate] + (bonus if candidate in follows_back else 0), mutual[candidate])
+        for candidate in mutual.keys() | follows_back
+        if candidate not in excluded
+    )
+    return heapq.nlargest(limit, scores, key=lambda item: (item[1], -item[0]))
+
+
+def compute_all(follow_graph, batch_size=1000, limit=None):
+    """Regrava ``FollowSuggestion`` para todos os usuários do grafo; devolve quantas linhas"""
+    total = 0
+    ids = list(follow_graph.ids)
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        rows = [
+            FollowSuggestion(user_id=user_id, suggested_id=candidate, score=score, mutual_count=mutual)
+            for user_id in batch
+            for candidate, score, mutual in suggest(follow_graph, user_id, limit)
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=batch).delete()
+            FollowSuggestion.objects.bulk_create(rows, batch_size=1000)
+        total += len(rows)
+    return total
+
+
+def for_user(user, limit):
+    """Sugestões pré-calculadas, sem quem o usuário passou a seguir depois do cálculo"""
+    excluded = graph.following_ids(user) | {user.id}
+    suggestions = [
+        suggestion
+        for suggestion in FollowSuggestion.objects.filter(user=user).select_related('suggested')
+        .order_by('-score', 'suggested_id')[:limit + len(excluded)]
+        if suggestion.suggested_id not in excluded
+    ][:limit]
+    if suggestions:
+        return suggestions
+    popular = User.objects.exclude(id__in=excluded).order_by('-followers_count', 'id')[:limit]
+    return [FollowSuggestion(user=user, suggested=candidate, score=0, mutual_count=0) for candidate in popular]
@@ -1,3 +1,340 @@
-from django.test import TestCase
+import os
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from backend import metrics
+from . import authentication, graph, throttling, tokens
+from .adjacency import FollowGraph
+from .models import RefreshToken, User
+from .suggestions import suggest
+
+
+class ConditionalProfileTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='pass12345')
+        self.client.force_authenticate(user=self.alice)
+
+    def test_profile_revalidation(self):
+        etag = self.client.get('/api/user/bob/')['ETag']
+
+        response = self.client.get('/api/user/bob/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Seguir muda ``is_following`` e ``followers_count``
+        self.alice.following.add(self.bob)
+        response = self.client.get('/api/user/bob/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_following'])
+
+        self.bob.bio = 'nova bio'
+        self.bob.save(update_fields=['bio'])
+        response = self.client.get('/api/user/bob/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.data['bio'], 'nova bio')
+
+    def test_missing_profile_is_404(self):
+        response = self.client.get('/api/user/ninguem/', HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FollowGraphTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='pass12345')
+        self.hub = User.objects.create_user(username='hub', email='hub@example.com', password='pass12345')
+        self.client.force_authenticate(user=self.viewer)
+
+    def add_users(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='pass12345')
+            user.following.add(self.hub)
+            self.hub.following.add(user)
+            if i % 2:
+                self.viewer.following.add(user)
+
+    def count_queries(self, url):
+        cache.clear()
+        graph.invalidate([self.viewer])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_user_lists_use_a_constant_number_of_queries(self):
+        for url in ('/api/users/', '/api/user/hub/followers/', '/api/user/hub/following/'):
+            self.add_users(2)
+            small = self.count_queries(url)
+            self.add_users(8)
+            self.assertEqual(self.count_queries(url), small, url)
+
+    def test_is_following_follows_the_graph(self):
+        self.add_users(2)
+        followed = {user.username for user in self.viewer.following.all()}
+
+        response = self.client.get('/api/user/hub/followers/')
+        self.assertEqual(
+            {item['username'] for item in response.data if item['is_following']}, followed
+        )
+
+        self.client.post('/api/user/hub/follow/')
+        response = self.client.get('/api/users/')
+        self.assertTrue(next(item for item in response.data if item['username'] == 'hub')['is_following'])
+
+
+class FollowSuggestionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = {
+            name: User.objects.create_user(username=name, email=f'{name}@example.com', password='pass12345')
+            for name in ('alice', 'bob', 'carol', 'dave', 'eve', 'frank')
+        }
+        for follower, followed in [
+            ('alice', 'bob'), ('alice', 'carol'), ('bob', 'dave'), ('carol', 'dave'),
+            ('carol', 'eve'), ('frank', 'alice'),
+        ]:
+            self.users[follower].following.add(self.users[followed])
+        self.snapshot = tempfile.NamedTemporaryFile(suffix='.bin', delete=False).name
+        self.addCleanup(os.unlink, self.snapshot)
+
+    def test_friends_of_friends_and_follow_back(self):
+        follow_graph = FollowGraph.from_database()
+        ids = {user.id: name for name, user in self.users.items()}
+
+        result = [(ids[candidate], score, mutual)
+                  for candidate, score, mutual in suggest(follow_graph, self.users['alice'].id)]
+
+        self.assertEqual(result, [('dave', 2, 2), ('frank', 2, 0), ('eve', 1, 1)])
+
+    def test_snapshot_round_trip(self):
+        follow_graph = FollowGraph.from_database()
+        follow_graph.save(self.snapshot)
+        loaded = FollowGraph.load(self.snapshot)
+
+        self.assertEqual(list(loaded.ids), list(follow_graph.ids))
+        for user in self.users.values():
+            self.assertEqual(list(loaded.following.neighbors(user.id)), list(follow_graph.following.neighbors(user.id)))
+            self.assertEqual(list(loaded.followers.neighbors(user.id)), list(follow_graph.followers.neighbors(user.id)))
+
+    def test_suggestions_endpoint_serves_precomputed_rows(self):
+        with override_settings(FOLLOW_GRAPH={**settings.FOLLOW_GRAPH, 'SNAPSHOT_PATH': self.snapshot}):
+            call_command('compute_suggestions', stdout=StringIO())
+        self.client.force_authenticate(user=self.users['alice'])
+
+        response = self.client.get('/api/users/suggestions/')
+        self.assertEqual([item['user']['username'] for item in response.data], ['dave', 'frank', 'eve'])
+        self.assertEqual(response.data[0]['mutual_count'], 2)
+
+        self.client.post('/api/user/dave/follow/')
+        response = self.client.get('/api/users/suggestions/?limit=1')
+        self.assertEqual([item['user']['username'] for item in response.data], ['frank'])
+
+    def test_users_without_suggestions_get_popular_profiles(self):
+        self.client.force_authenticate(user=self.users['eve'])
+
+        response = self.client.get('/api/users/suggestions/?limit=2')
+
+        self.assertEqual([item['user']['username'] for item in response.data], ['dave', 'alice'])
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        authentication.local.clear()
+        metrics.reset()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def token_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/user/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query for query in queries if 'authtoken_token' in query['sql']]
+
+    def test_token_is_resolved_once(self):
+        self.assertEqual(len(self.token_queries()), 1)
+        self.assertEqual(self.token_queries(), [])
+
+        # Sem o LRU local, o cache compartilhado ainda atende
+        authentication.local.clear()
+        self.assertEqual(self.token_queries(), [])
+        counters = metrics.snapshot()['counters']
+        self.assertEqual(counters['auth.db_queries'], 1)
+        self.assertEqual(counters['auth.shared.hit'], 1)
+        self.assertEqual(metrics.snapshot()['timings']['auth.token']['count'], 3)
+
+    def test_profile_and_password_changes_invalidate(self):
+        self.token_queries()
+        response = self.client.put('/api/profile/update/', {'bio': 'nova bio'})
+        self.assertEqual(response.data['bio'], 'nova bio')
+        self.assertEqual(len(self.token_queries()), 1)
+
+        response = self.client.post('/api/profile/change-password/', {
+            'current_password': 'pass12345', 'new_password': 'outra-senha-987', 'confirm_new_password': 'outra-senha-987',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.token_queries()), 1)
+
+    def test_logout_and_deactivation_revoke_cached_tokens(self):
+        self.token_queries()
+        self.assertEqual(self.client.post('/api/logout/').status_code, status.HTTP_200_OK)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get('/api/user/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(self.client.get('/api/user/').status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        self.assertEqual(self.client.get('/api/user/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SignedTokenTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        authentication.local.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+
+    def login(self):
+        self.client.credentials()
+        response = self.client.post('/api/login/', {'username': 'alice', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('token', response.data)
+        return response.data
+
+    def bearer(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_access_token_costs_no_query_once_warm(self):
+        self.bearer(self.login()['access'])
+        self.assertEqual(self.client.get('/api/user/').status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):
+            # Só a leitura da linha pelo próprio UserAPI
+            response = self.client.get('/api/user/')
+        self.assertEqual(response.data['username'], 'alice')
+
+        self.bearer('a.b.c')
+        self.assertEqual(self.client.get('/api/user/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_and_reuse_revokes_the_family(self):
+        first = self.login()
+        second = self.client.post('/api/token/refresh/', {'refresh': first['refresh']}).data
+        self.assertNotEqual(second['refresh'], first['refresh'])
+        # Só o hash vai para o banco, e o refresh usado fica marcado
+        self.assertFalse(RefreshToken.objects.filter(token_hash=first['refresh']).exists())
+        self.assertEqual(RefreshToken.objects.filter(used_at__isnull=False).count(), 1)
+
+        # Reapresentar o refresh já usado derruba a família toda
+        response = self.client.post('/api/token/refresh/', {'refresh': first['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/token/refresh/', {'refresh': second['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.bearer(second['access'])
+        self.assertEqual(self.client.get('/api/user/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_and_password_change_revoke(self):
+        pair = self.login()
+        self.bearer(pair['access'])
+        self.assertEqual(self.client.post('/api/logout/').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/user/').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/token/refresh/', {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        old = self.login()
+        self.bearer(old['access'])
+        response = self.client.post('/api/profile/change-password/', {
+            'current_password': 'pass12345', 'new_password': 'outra-senha-987', 'confirm_new_password': 'outra-senha-987',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # iat em segundos: um acesso anterior à troca fica para trás
+        self.user.refresh_from_db()
+        claims = tokens.decode_access(old['access'])
+        claims['iat'] = int(self.user.tokens_valid_after.timestamp()) - 1
+        self.assertTrue(tokens.issued_before_revocation(self.user, claims))
+        self.bearer(response.data['access'])
+        self.assertEqual(self.client.get('/api/user/').status_code, status.HTTP_200_OK)
+        response = self.client.post('/api/token/refresh/', {'refresh': old['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_legacy_tokens_keep_working(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.login()["token"]}')
+        self.assertEqual(self.client.get('/api/user/').status_code, status.HTTP_200_OK)
+
+
+THROTTLE = {
+    **throttling.DEFAULTS,
+    'IP': {'CAPACITY': 100, 'PER_SECOND': 1},
+    'USERNAME': {'CAPACITY': 10, 'PER_SECOND': 0.001},
+    'FREE_FAILURES': 2,
+    'BACKOFF_BASE': 60,
+    'HASH_WAIT': 0,
+}
+
+
+@override_settings(AUTH_THROTTLE=THROTTLE)
+class AuthThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+
+    def login(self, password, username='alice'):
+        return self.client.post('/api/login/', {'username': username, 'password': password})
+
+    def test_failures_back_off_before_hashing(self):
+        for _ in range(2):
+            self.assertEqual(self.login('errada').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.login('pass12345').status_code, status.HTTP_200_OK)
+
+        # Sucesso zera as falhas; a terceira falha seguida passa a bloquear
+        for _ in range(3):
+            self.login('errada')
+        response = self.login('pass12345')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        counters = metrics.snapshot()['counters']
+        self.assertEqual(counters['auth_throttle.rejected.backoff'], 1)
+        self.assertEqual(metrics.snapshot()['timings']['auth.password_check']['count'], 6)
+
+    @override_settings(AUTH_THROTTLE={**THROTTLE, 'USERNAME': {'CAPACITY': 3, 'PER_SECOND': 0.001}})
+    def test_username_bucket_is_case_insensitive(self):
+        for username in ('alice', 'ALICE', ' Alice'):
+            self.login('pass12345', username=username)
+        response = self.login('pass12345')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(metrics.snapshot()['counters']['auth_throttle.rejected.username'], 1)
+
+    @override_settings(AUTH_THROTTLE={**THROTTLE, 'IP': {'CAPACITY': 1, 'PER_SECOND': 0.001}})
+    def test_ip_bucket_covers_password_change_from_login(self):
+        data = {
+            'username': 'alice', 'current_password': 'errada',
+            'new_password': 'outra-senha-987', 'confirm_new_password': 'outra-senha-987',
+        }
+        self.assertEqual(self.client.post('/api/change-password-login/', data).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/change-password-login/', {**data, 'username': 'bob'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_busy_hashing_slots_reject_fast(self):
+        semaphore = throttling._semaphore(THROTTLE['HASH_CONCURRENCY'])
+        for _ in range(THROTTLE['HASH_CONCURRENCY']):
+            semaphore.acquire()
+        try:
+            response = self.login('pass12345')
+        finally:
+            for _ in range(THROTTLE['HASH_CONCURRENCY']):
+                semaphore.release()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(metrics.snapshot()['counters']['auth_throttle.rejected.hash_busy'], 1)
@@ -0,0 +1,192 @@
+"""
+Limites para as rotas que verificam senha (login e troca de senha).
+
+Cada tentativa passa, antes de qualquer hash, por:
+
+- backoff exponencial do usuário: depois de ``FREE_FAILURES`` falhas
+  seguidas, cada nova falha dobra a espera (até ``BACKOFF_MAX``);
+- balde de fichas por IP e balde por nome de usuário, no cache
+  compartilhado (locmem nos testes).
+
+O hash em si (PBKDF2) roda dentro de ``hashing_slot``: no máximo
+``HASH_CONCURRENCY`` ao mesmo tempo por processo. Num ataque de credential
+stuffing vindo de muitos IPs e usuários, o excedente recebe 429 em vez de
+prender os workers na CPU, e o resto do site continua respondendo.
+
+Os baldes fazem leitura e escrita no cache sem operação atômica: com vários
+processos algumas tentativas a mais podem passar numa rajada, o que é
+aceitável para um limite de abuso.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.throttling import BaseThrottle
+
+from backend import metrics
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    'IP': {'CAPACITY': 30, 'PER_SECOND': 0.5},
+    'USERNAME': {'CAPACITY': 10, 'PER_SECOND': 1 / 60},
+    'FREE_FAILURES': 5,
+    'BACKOFF_BASE': 1,
+    'BACKOFF_MAX': 300,
+    'HASH_CONCURRENCY': 4,
+    'HASH_WAIT': 0.1,
+}
+
+_lock = threading.Lock()
+_semaphores = {}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'AUTH_THROTTLE', {})}
+
+
+def _cache():
+    return caches[_config()['CACHE']]
+
+
+def _normalize(username):
+    return (username or '').strip().lower()[:150]
+
+
+def _take(key, capacity, per_second):
+    """Consome uma ficha do balde; devolve 0 ou os segundos até haver uma"""
+    cache = _cache()
+    now = time.time()
+    with _lock:
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Sem a chave o balde está cheio: ela só precisa durar até encher de novo
+        cache.set(key, (tokens, now), math.ceil(capacity / per_second))
+    return 0 if allowed else (1 - tokens) / per_second
+
+
+def _failures_key(username):
+    return f'auth-throttle:failures:{username}'
+
+
+def backoff_remaining(username):
+    state = _cache().get(_failures_key(username))
+    if state is None:
+        return 0
+    return max(0, state[1] - time.time())
+
+
+def check(ip, username):
+    """Segundos de espera se a tentativa deve ser recusada, senão 0"""
+    config = _config()
+    if not config['ENABLED']:
+        return 0
+    username = _normalize(username)
+    if username:
+        wait = backoff_remaining(username)
+        if wait:
+            metrics.incr('auth_throttle.rejected.backoff')
+            return wait
+    wait = _take(f'auth-throttle:ip:{ip}', config['IP']['CAPACITY'], config['IP']['PER_SECOND'])
+    if wait:
+        metrics.incr('auth_throttle.rejected.ip')
+        return wait
+    if username:
+        wait = _take(f'auth-throttle:user:{username}', config['USERNAME']['CAPACITY'], config['USERNAME']['PER_SECOND'])
+        if wait:
+            metrics.incr('auth_throttle.rejected.username')
+            return wait
+    metrics.incr('auth_throttle.allowed')
+    return 0
+
+
+def record_failure(username):
+    username = _normalize(username)
+    if not username:
+        return
+    config = _config()
+    metrics.incr('auth_throttle.failures')
+    with _lock:
+        failures, _ = _cache().get(_failures_key(username)) or (0, 0)
+        failures += 1
+        blocked_until = 0
+        if failures > config['FREE_FAILURES']:
+            delay = min(config['BACKOFF_BASE'] * 2 ** (failures - config['FREE_FAILURES'] - 1), config['BACKOFF_MAX'])
+            blocked_until = time.time() + delay
+        # O histórico de falhas some depois de um período inteiro de backoff máximo sem tentativas
+        _cache().set(_failures_key(username), (failures, blocked_until), config['BACKOFF_MAX'] * 2)
+
+
+def record_success(username):
+    username = _normalize(username)
+    if username:
+        _cache().delete(_failures_key(username))
+
+
+def _semaphore(concurrency):
+    with _lock:
+        if concurrency not in _semaphores:
+            _semaphores[concurrency] = threading.BoundedSemaphore(concurrency)
+        return _semaphores[concurrency]
+
+
+@contextmanager
+def hashing_slot():
+    """Limita os hashes de senha simultâneos no processo"""
+    config = _config()
+    if not config['ENABLED']:
+        yield
+        return
+    semaphore = _semaphore(config['HASH_CONCURRENCY'])
+    if not semaphore.acquire(timeout=config['HASH_WAIT']):
+        metrics.incr('auth_throttle.rejected.hash_busy')
+        raise exceptions.Throttled(wait=1, detail='Servidor ocupado. Tente novamente em instantes.')
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        semaphore.release()
+        metrics.observe('auth.password_check', time.perf_counter() - started)
+
+
+class AuthAttemptThrottle(BaseThrottle):
+    """Backoff e baldes por IP/usuário, checados antes do hash"""
+
+    def allow_request(self, request, view):
+        self.delay = check(self.get_ident(request), username_for(request))
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+def username_for(request):
+    if request.user and request.user.is_authenticated:
+        return request.user.username
+    return request.data.get('username') if hasattr(request.data, 'get') else None
+
+
+class AuthThrottleMixin:
+    """Para views que verificam senha: throttle antes do hash e registro do resultado"""
+    throttle_classes = [AuthAttemptThrottle]
+
+    def throttled(self, request, wait):
+        raise exceptions.Throttled(wait=wait, detail='Muitas tentativas. Tente novamente mais tarde.')
+
+    @contextmanager
+    def checking_credentials(self, request):
+        username = username_for(request)
+        with hashing_slot():
+            try:
+                yield
+            except exceptions.ValidationError:
+                record_failure(username)
+                raise
+        record_success(username)
@@ -0,0 +1,157 @@
+"""
+Tokens de acesso assinados (JWT) com refresh rotativo.
+
+- Acesso: vida curta (``ACCESS_LIFETIME``), verificado só pela assinatura;
+  o usuário vem dos snapshots de ``users.authentication``, então o caso
+  comum não consulta o banco.
+- Refresh: valor opaco, guardado só como hash. Cada uso marca a linha como
+  usada e emite outro na mesma família; apresentar de novo um refresh já
+  usado indica vazamento e revoga a família inteira.
+
+Revogação sem consultar o banco a cada requisição:
+
+- família na lista de negação do cache, pelo tempo de vida de um acesso
+  (logout e reuso de refresh);
+- ``User.tokens_valid_after``, que vai no snapshot do usuário (troca de
+  senha derruba os acessos emitidos antes).
+
+Os tokens do ``rest_framework.authtoken`` continuam aceitos durante a
+migração dos clientes.
+"""
+import hashlib
+import secrets
+import uuid
+from datetime import timedelta
+
+import jwt
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import RefreshToken
+
+DEFAULTS = {
+    'ALGORITHM': 'HS256',
+    'SIGNING_KEY': None,
+    'ACCESS_LIFETIME': timedelta(minutes=5),
+    'REFRESH_LIFETIME': timedelta(days=14),
+    'LEEWAY': 10,
+    'CACHE': 'default',
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'JWT_AUTH', {})}
+
+
+def _signing_key():
+    return _config()['SIGNING_KEY'] or settings.SECRET_KEY
+
+
+def _hash(raw):
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _deny_key(family):
+    return f'auth:deny:{family}'
+
+
+def access_token(user, family):
+    config = _config()
+    now = timezone.now()
+    payload = {
+        'type': 'access',
+        'sub': str(user.id),
+        'fam': str(family),
+        'iat': int(now.timestamp()),
+        'exp': now + config['ACCESS_LIFETIME'],
+    }
+    return jwt.encode(payload, _signing_key(), algorithm=config['ALGORITHM'])
+
+
+def decode_access(raw):
+    """Claims do token de acesso; ``AuthenticationFailed`` se inválido, expirado ou negado"""
+    config = _config()
+    try:
+        claims = jwt.decode(
+            raw, _signing_key(), algorithms=[config['ALGORITHM']], leeway=config['LEEWAY'],
+            options={'require': ['type', 'sub', 'fam', 'iat', 'exp']},
+        )
+    except jwt.ExpiredSignatureError:
+        raise AuthenticationFailed('Token expirado.')
+    except jwt.InvalidTokenError:
+        raise AuthenticationFailed('Token inválido.')
+    if claims['type'] != 'access':
+        raise AuthenticationFailed('Token inválido.')
+    if is_denied(claims['fam']):
+        raise AuthenticationFailed('Token revogado.')
+    return claims
+
+
+def issued_before_revocation(user, claims):
+    return user.tokens_valid_after is not None and claims['iat'] < int(user.tokens_valid_after.timestamp())
+
+
+def _pair(user, family):
+    config = _config()
+    raw = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user, family=family, token_hash=_hash(raw), expires_at=timezone.now() + config['REFRESH_LIFETIME'],
+    )
+    return {
+        'access': access_token(user, family),
+        'refresh': raw,
+        'expires_in': int(config['ACCESS_LIFETIME'].total_seconds()),
+    }
+
+
+def issue(user):
+    """Par acesso + refresh de uma família nova (login, cadastro)"""
+    return _pair(user, uuid.uuid4())
+
+
+def rotate(raw):
+    """Troca um refresh válido por um par novo da mesma família"""
+    token = RefreshToken.objects.select_related('user').filter(token_hash=_hash(raw)).first()
+    if token is None:
+        raise AuthenticationFailed('Refresh token inválido.')
+    now = timezone.now()
+    # Condicional: de dois usos simultâneos do mesmo refresh só um vence
+    consumed = RefreshToken.objects.filter(pk=token.pk, used_at__isnull=True, revoked_at__isnull=True).update(used_at=now)
+    if not consumed:
+        revoke_family(token.family)
+        raise AuthenticationFailed('Refresh token já utilizado; sessão revogada.')
+    if token.expires_at <= now or not token.user.is_active:
+        raise AuthenticationFailed('Refresh token expirado.')
+    return _pair(token.user, token.family)
+
+
+def deny(family):
+    config = _config()
+    timeout = int(config['ACCESS_LIFETIME'].total_seconds()) + config['LEEWAY']
+    caches[config['CACHE']].set(_deny_key(family), True, timeout)
+
+
+def is_denied(family):
+    return caches[_config()['CACHE']].get(_deny_key(family)) is not None
+
+
+def revoke_family(family):
+    RefreshToken.objects.filter(family=family, revoked_at__isnull=True).update(revoked_at=timezone.now())
+    deny(family)
+
+
+def revoke_refresh(user, raw):
+    family = RefreshToken.objects.filter(user=user, token_hash=_hash(raw)).values_list('family', flat=True).first()
+    if family is not None:
+        revoke_family(family)
+
+
+def revoke_user(user):
+    """Invalida todos os acessos e refresh tokens já emitidos para o usuário"""
+    now = timezone.now()
+    # Em segundos inteiros, como o ``iat``: um par emitido logo depois continua válido
+    user.tokens_valid_after = now.replace(microsecond=0)
+    user.save(update_fields=['tokens_valid_after'])
+    RefreshToken.objects.filter(user=user, revoked_at__isnull=True).update(revoked_at=now)
@@ -1,8 +1,9 @@
 from django.urls import path
 from .views import (
-    AppleLoginAPI, RegisterAPI, LoginAPI, UserAPI, ProfileUpdateAPI,
+    AppleLoginAPI, RegisterAPI, LoginAPI, LogoutAPI, TokenRefreshAPI, UserAPI, ProfileUpdateAPI,
     ChangePasswordAPI, ChangePasswordFromLoginAPI,
     UserDetailAPI, UserListAPI, FollowUserAPI, FollowersListAPI, FollowingListAPI,
+    FollowSuggestionsAPI,
     GoogleLoginAPI,
 )
 
@@ -10,6 +11,8 @@ urlpatterns = [
     # Autenticação
     path('register/', RegisterAPI.as_view(), name='register'),
     path('login/', LoginAPI.as_view(), name='login'),
+    path('logout/', LogoutAPI.as_view(), name='logout'),
+    path('token/refresh/', TokenRefreshAPI.as_view(), name='token-refresh'),
     path('change-password-login/', ChangePasswordFromLoginAPI.as_view(), name='change-password-login'),
     path('google-login/', GoogleLoginAPI.as_view(), name='google-login'),
     path('apple-login/', AppleLoginAPI.as_view(), name='apple-login'),
@@ -21,6 +24,7 @@ urlpatterns = [
     
     # Outros usuários
     path('users/', UserListAPI.as_view(), name='users-list'),
+    path('users/suggestions/', FollowSuggestionsAPI.as_view(), name='follow-suggestions'),
     path('user/<str:username>/', UserDetailAPI.as_view(), name='user-detail'),
     path('user/<str:username>/follow/', FollowUserAPI.as_view(), name='follow-user'),
     path('user/<str:username>/followers/', FollowersListAPI.as_view(), name='followers-list'),
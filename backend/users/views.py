@@ -14,6 +14,24 @@ from .serializers import (
     get_or_create_social_user, 
 )
 from .models import User
+from . import suggestions, tokens
+from .throttling import AuthThrottleMixin
+from .rendering import render_users
+from .serializers import PROFILE_FINGERPRINT_FIELDS
+from backend import conditional
+from backend.conditional import ConditionalGetMixin
+from backend.pagination import KeysetPagination
+from images.processing import ready_annotations
+from interactions import services
+from interactions.views import RelationAPI
+
+
+class UsernamePagination(KeysetPagination):
+    ordering = ('username', 'id')
+
+
+class DateJoinedPagination(KeysetPagination):
+    ordering = ('-date_joined', '-id')
 
 
 class RegisterAPI(generics.CreateAPIView):
@@ -28,32 +46,61 @@ class RegisterAPI(generics.CreateAPIView):
         
         return Response({
             'user': UserSerializer(user).data,
-            'token': token.key
+            'token': token.key,
+            **tokens.issue(user),
         }, status=status.HTTP_201_CREATED)
 
 
-class LoginAPI(ObtainAuthToken):
+class LoginAPI(AuthThrottleMixin, ObtainAuthToken):
     permission_classes = [permissions.AllowAny]
     
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data,
                                            context={'request': request})
-        serializer.is_valid(raise_exception=True)
+        with self.checking_credentials(request):
+            serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         token, created = Token.objects.get_or_create(user=user)
         
         return Response({
             'user': UserSerializer(user).data,
-            'token': token.key
+            'token': token.key,
+            **tokens.issue(user),
         })
 
 
+class TokenRefreshAPI(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        refresh = request.data.get('refresh')
+        if not refresh:
+            return Response({'refresh': ['Este campo é obrigatório.']}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(tokens.rotate(refresh))
+
+
+class LogoutAPI(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        if request.data.get('refresh'):
+            tokens.revoke_refresh(request.user, request.data['refresh'])
+        if isinstance(request.auth, dict):
+            # Token de acesso: revoga a família dele (refresh e acessos ainda válidos)
+            tokens.revoke_family(request.auth['fam'])
+        else:
+            # Apagar o token também descarta o usuário do cache da autenticação
+            Token.objects.filter(user=request.user).delete()
+        return Response({'detail': 'Sessão encerrada.'}, status=status.HTTP_200_OK)
+
+
 class UserAPI(generics.RetrieveAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user pode vir do cache da autenticação, com contadores atrasados
+        return User.objects.get(pk=self.request.user.pk)
 
 
 class ProfileUpdateAPI(generics.UpdateAPIView):
@@ -62,7 +109,8 @@ class ProfileUpdateAPI(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # O save grava todos os campos: parte da linha atual, não do snapshot em cache
+        return User.objects.get(pk=self.request.user.pk)
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', True)
@@ -75,25 +123,30 @@ class ProfileUpdateAPI(generics.UpdateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ChangePasswordAPI(generics.GenericAPIView):
+class ChangePasswordAPI(AuthThrottleMixin, generics.GenericAPIView):
     serializer_class = ChangePasswordSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response({'detail': 'Senha alterada com sucesso.'}, status=status.HTTP_200_OK)
+        with self.checking_credentials(request):
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        # As outras sessões caem; esta segue com um par novo
+        tokens.revoke_user(request.user)
+        return Response({'detail': 'Senha alterada com sucesso.', **tokens.issue(request.user)}, status=status.HTTP_200_OK)
 
 
-class ChangePasswordFromLoginAPI(generics.GenericAPIView):
+class ChangePasswordFromLoginAPI(AuthThrottleMixin, generics.GenericAPIView):
     serializer_class = ChangePasswordFromLoginSerializer
     permission_classes = [permissions.AllowAny]
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with self.checking_credentials(request):
+            serializer.is_valid(raise_exception=True)
+            user = serializer.save()
+        tokens.revoke_user(user)
         return Response({'detail': 'Senha alterada com sucesso. Faça login com a nova senha.'}, status=status.HTTP_200_OK)
 
 
@@ -111,7 +164,8 @@ class GoogleLoginAPI(generics.GenericAPIView):
         
         return Response({
             'user': UserSerializer(user).data,
-            'token': token.key
+            'token': token.key,
+            **tokens.issue(user),
         })
 
 
@@ -129,20 +183,37 @@ class AppleLoginAPI(generics.GenericAPIView):
         
         return Response({
             'user': UserSerializer(user).data,
-            'token': token.key
+            'token': token.key,
+            **tokens.issue(user),
         })
 
 
-class UserDetailAPI(generics.RetrieveAPIView):
+class UserDetailAPI(ConditionalGetMixin, generics.RetrieveAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'username'
 
+    def get_etag_parts(self, request, *args, **kwargs):
+        annotations = ready_annotations('profile_picture', 'banner_image')
+        row = (
+            User.objects.filter(username=kwargs['username'])
+            .annotate(**annotations)
+            .values_list(*PROFILE_FINGERPRINT_FIELDS, *annotations)
+            .first()
+        )
+        if row is None:
+            return None
+        return [conditional.get_version('viewer', request.user.id), conditional.fingerprint([row])]
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(render_users([self.get_object()], self.get_serializer_context())[0])
+
 
 class UserListAPI(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UsernamePagination
 
     def get_queryset(self):
         queryset = User.objects.exclude(id=self.request.user.id).order_by('username')
@@ -152,29 +223,43 @@ class UserListAPI(generics.ListAPIView):
         return queryset
 
 
-class FollowUserAPI(APIView):
+class FollowSuggestionsAPI(APIView):
+    """Quem seguir: lido de ``FollowSuggestion`` (ver ``compute_suggestions``)"""
     permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
 
-    def post(self, request, username):
+    def get(self, request):
         try:
-            user_to_follow = User.objects.get(username=username)
-        except User.DoesNotExist:
-            return Response({'error': 'Usuário não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+            limit = min(int(request.query_params.get('limit', 10)), self.max_limit)
+        except ValueError:
+            limit = 10
+        found = suggestions.for_user(request.user, max(limit, 1))
+        users = render_users([item.suggested for item in found], {'request': request})
+        return Response([
+            {'user': user, 'score': item.score, 'mutual_count': item.mutual_count}
+            for item, user in zip(found, users)
+        ])
 
-        if request.user == user_to_follow:
-            return Response({'error': 'Não é possível seguir a si mesmo'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if user_to_follow in request.user.following.all():
-            request.user.following.remove(user_to_follow)
-            return Response({'status': 'unfollowed'})
-        else:
-            request.user.following.add(user_to_follow)
-            return Response({'status': 'followed'})
+class FollowUserAPI(RelationAPI):
+    activate = staticmethod(services.follow)
+    deactivate = staticmethod(services.unfollow)
+    statuses = ('followed', 'unfollowed')
+    counter_field = 'followers_count'
+    not_found_message = 'Usuário não encontrado'
+
+    def get_target(self, username):
+        return User.objects.filter(username=username).first()
+
+    def validate_target(self, target):
+        if target == self.request.user:
+            return 'Não é possível seguir a si mesmo'
 
 
 class FollowersListAPI(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DateJoinedPagination
 
     def get_queryset(self):
         username = self.kwargs['username']
@@ -188,6 +273,7 @@ class FollowersListAPI(generics.ListAPIView):
 class FollowingListAPI(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DateJoinedPagination
 
     def get_queryset(self):
         username = self.kwargs['username']
@@ -13,6 +13,7 @@ import {
 import { Delete as DeleteIcon } from '@mui/icons-material';
 import { useAuth } from '../../context/AuthContext';
 import { chatsAPI } from '../../services/api';
+import { subscribe } from '../../services/realtime';
 import { format } from 'date-fns';
 import { ptBR } from 'date-fns/locale';
 
@@ -23,8 +24,7 @@ const ChatList = ({ onSelectConversation, onConversationDeleted }) => {
 
   useEffect(() => {
     loadConversations();
-    const interval = setInterval(loadConversations, 10000);
-    return () => clearInterval(interval);
+    return subscribe('message', loadConversations, 10000);
   }, []);
 
   const loadConversations = async () => {
@@ -22,6 +22,7 @@ import {
 import { Link } from "react-router-dom";
 import { useAuth } from "../../context/AuthContext";
 import { chatsAPI, notificationsAPI } from "../../services/api"; 
+import { subscribe } from "../../services/realtime";
 
 const Sidebar = () => {
   const { user } = useAuth();
@@ -47,9 +48,8 @@ const Sidebar = () => {
 
     loadUnreadMessages();
     
-    // Atualizar a cada 30 segundos
-    const interval = setInterval(loadUnreadMessages, 30000);
-    return () => clearInterval(interval);
+    // Atualizar quando chegar uma mensagem pelo canal em tempo real (ou a cada 30s sem ele)
+    return subscribe('message', loadUnreadMessages);
   }, [user]);
 
   // Carregar notificações não lidas
@@ -67,9 +67,8 @@ const Sidebar = () => {
 
     loadUnreadNotifications();
     
-    // Atualizar a cada 30 segundos
-    const interval = setInterval(loadUnreadNotifications, 30000);
-    return () => clearInterval(interval);
+    // Atualizar quando chegar uma notificação pelo canal em tempo real (ou a cada 30s sem ele)
+    return subscribe('notification', loadUnreadNotifications);
   }, [user]);
 
   if (!user) return null;
@@ -179,11 +179,35 @@ const PostItem = ({ post, onDelete, onUpdate }) => {
           {/* Image */}
           {post.image && (
             <div className="mb-3 rounded-2xl overflow-hidden border border-gray-200">
-              <img
-                src={post.image}
-                alt="Post"
-                className="w-full max-h-96 object-cover"
-              />
+              {post.image_renditions ? (
+                <picture>
+                  <source
+                    type="image/webp"
+                    srcSet={post.image_renditions.srcset.webp}
+                    sizes="(max-width: 640px) 100vw, 600px"
+                  />
+                  <img
+                    src={post.image_renditions.renditions.medium.jpeg}
+                    srcSet={post.image_renditions.srcset.jpeg}
+                    sizes="(max-width: 640px) 100vw, 600px"
+                    width={post.image_renditions.width}
+                    height={post.image_renditions.height}
+                    loading="lazy"
+                    alt="Post"
+                    className="w-full max-h-96 object-cover"
+                    style={{
+                      backgroundImage: `url(${post.image_renditions.placeholder})`,
+                      backgroundSize: 'cover',
+                    }}
+                  />
+                </picture>
+              ) : (
+                <img
+                  src={post.image}
+                  alt="Post"
+                  className="w-full max-h-96 object-cover"
+                />
+              )}
             </div>
           )}
 
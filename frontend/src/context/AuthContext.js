@@ -62,6 +62,11 @@ const login = async (username, password) => {
 
   const logout = () => {
     console.log('🔍 Fazendo logout');
+    // Revoga o token no servidor; a saída local não depende da resposta
+    const token = localStorage.getItem('access_token');
+    if (token) {
+      authAPI.logout(token).catch(() => {});
+    }
     localStorage.removeItem('access_token');
     localStorage.removeItem('user');
     setUser(null);
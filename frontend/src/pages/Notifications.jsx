@@ -20,6 +20,7 @@ import {
   Message as MessageIcon,
 } from '@mui/icons-material';
 import { notificationsAPI } from '../services/api';
+import { subscribe } from '../services/realtime';
 import { formatDistanceToNow } from 'date-fns';
 import { ptBR } from 'date-fns/locale';
 import { useNavigate } from 'react-router-dom';
@@ -33,9 +34,8 @@ const NotificationsPage = () => {
   useEffect(() => {
     loadNotifications();
     
-    // Atualizar a cada 30 segundos
-    const interval = setInterval(loadNotifications, 30000);
-    return () => clearInterval(interval);
+    // Atualizar quando chegar uma notificação pelo canal em tempo real (ou a cada 30s sem ele)
+    return subscribe('notification', loadNotifications);
   }, []);
 
   const loadNotifications = async () => {
@@ -62,6 +62,8 @@ export const authAPI = {
     console.log('📤 Enviando login para:', `${API_URL}/login/`);
     return api.post('/login/', data);
   },
+  // O token vai explícito: o interceptor roda depois de o logout limpar o localStorage
+  logout: (token) => api.post('/logout/', null, { headers: { Authorization: `Token ${token}` } }),
   changePasswordFromLogin: (data) => api.post('/change-password-login/', data),
   getProfile: () => {
     console.log('📤 Buscando perfil...');
@@ -0,0 +1,56 @@
+import api from './api';
+
+// Conexão SSE compartilhada com /api/stream/. O navegador reenvia o
+// Last-Event-ID ao reconectar, então o servidor só manda o que faltou.
+// Enquanto o stream estiver com erro (servidor WSGI responde 501, rede caiu),
+// cada assinatura volta a consultar a API no seu intervalo.
+const POLL_INTERVAL = 30000;
+
+let source = null;
+const subscriptions = new Set();
+
+const startPolling = (subscription) => {
+  if (!subscription.timer) {
+    subscription.timer = setInterval(subscription.poll, subscription.interval);
+  }
+};
+
+const stopPolling = (subscription) => {
+  clearInterval(subscription.timer);
+  subscription.timer = null;
+};
+
+const connect = (token) => {
+  if (source) return source;
+  source = new EventSource(`${api.defaults.baseURL}/stream/?token=${encodeURIComponent(token)}`);
+  source.addEventListener('open', () => subscriptions.forEach(stopPolling));
+  source.addEventListener('error', () => subscriptions.forEach(startPolling));
+  return source;
+};
+
+// Assina um tipo de evento ('message' ou 'notification'); o evento 'reset'
+// também dispara o handler para que o componente recarregue tudo. Sem token
+// não há stream nem consulta.
+export const subscribe = (eventType, handler, interval = POLL_INTERVAL) => {
+  const token = localStorage.getItem('access_token');
+  if (!token) return () => {};
+
+  const stream = connect(token);
+  const listener = (event) => handler(event.data ? JSON.parse(event.data) : null);
+  const subscription = { poll: () => handler(null), interval, timer: null };
+  stream.addEventListener(eventType, listener);
+  stream.addEventListener('reset', listener);
+  subscriptions.add(subscription);
+  if (stream.readyState === EventSource.CLOSED) startPolling(subscription);
+
+  return () => {
+    stream.removeEventListener(eventType, listener);
+    stream.removeEventListener('reset', listener);
+    stopPolling(subscription);
+    subscriptions.delete(subscription);
+    if (subscriptions.size === 0) {
+      stream.close();
+      source = null;
+    }
+  };
+};